@@ -0,0 +1,41 @@
+"""
+Compare one vectorized ControllerBank update with the per-controller control law, for growing numbers of rooms.
+
+    python -m benchmarks.bench_controller_bank [--rooms 8 100 1000 10000] [--number N]
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from demo.devices.controller_bank import ControllerBank
+
+
+def per_controller(integrals, k_P, k_I, setpoints, temperatures, dt):
+    controls = []
+    for i, (setpoint, temperature) in enumerate(zip(setpoints, temperatures)):
+        error = setpoint - temperature
+        integrals[i] = max(-10 * k_P, min(integrals[i] + error * dt, 10 * k_P))
+        controls.append(k_P * error + k_I * integrals[i])
+
+    return controls
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rooms', type=int, nargs='+', default=[8, 100, 1000, 10_000])
+    parser.add_argument('--number', type=int, default=1000)
+    args = parser.parse_args()
+
+    for num_rooms in args.rooms:
+        bank = ControllerBank([40.0] * num_rooms, 1.0)
+        rows = np.arange(num_rooms)
+        setpoints, temperatures = np.full(num_rooms, 298.0), np.linspace(290.0, 300.0, num_rooms)
+        integrals = [0.0] * num_rooms
+        setpoint_list, temperature_list = setpoints.tolist(), temperatures.tolist()
+        bank_us = 1e6 * timeit.timeit(lambda: bank.update(rows, setpoints, temperatures, 10.0), number=args.number)
+        loop_us = 1e6 * timeit.timeit(
+                lambda: per_controller(integrals, 40.0, 1.0, setpoint_list, temperature_list, 10.0),
+                number=args.number,
+        )
+        print(f'rooms={num_rooms}  bank_us={bank_us / args.number:.1f}  per_controller_us={loop_us / args.number:.1f}')
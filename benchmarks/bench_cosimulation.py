@@ -0,0 +1,124 @@
+"""
+Co-simulation benchmark, runs ArrowheadEnvironment with in-process devices on grid buildings of growing size.
+
+Reports simulated steps per second, the time spent waiting at the read and update barriers, the time
+spent in the thermal model, the ipyc round trip seen by the devices, memory allocated while building
+the environment, the peak resident memory of the process after the run, and the time to register all
+devices with in-process core systems. The peak only grows over a run of several sizes, so sizes are
+best given in increasing order.
+
+    python -m benchmarks.bench_cosimulation [--rooms 8 100 1000 10000] [--steps N] [--state-plane]
+"""
+import argparse
+import asyncio
+import math
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.state_plane import StatePlaneReader
+from demo.registration import DesiredState, apply_registration
+from demo.topology import BuildingTopology, grid_topology
+from demo.utils import device_specs
+
+from benchmarks.inprocess import FakeCoreSystems, InProcessDevices
+
+
+def building(num_rooms: int) -> BuildingTopology:
+    """
+    Single floor grid with exactly ``num_rooms`` rooms, as close to square as possible.
+    """
+    rows = max(divisor for divisor in range(1, math.isqrt(num_rooms) + 1) if num_rooms % divisor == 0)
+    return grid_topology(rows, num_rooms // rows)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+async def run_steps(env: ArrowheadEnvironment, steps: int, state_plane: bool = False) -> Dict[str, float]:
+    env.sync_init()
+    env.simulation_started.set()
+    reader = StatePlaneReader(env.start_state_plane().name) if state_plane else None
+    devices = InProcessDevices(env, state_plane=reader)
+    running = devices.start(steps)
+    timings: Dict[str, List[float]] = {}
+    start = time.perf_counter()
+    for _ in range(steps):
+        await env.step(10.0, env.timestep * 10.0, 25.0)
+        for name, seconds in env.step_timings.items():
+            timings.setdefault(name, []).append(seconds)
+    elapsed = time.perf_counter() - start
+    await running
+    devices.stop()
+    if reader is not None:
+        reader.close()
+        env.stop_state_plane()
+
+    return {
+        'steps_per_second': steps / elapsed,
+        **{f'{name}_ms': 1e3 * statistics.mean(seconds) for name, seconds in timings.items()},
+        'ipc_round_trip_p50_ms': 1e3 * percentile(devices.round_trips, 0.5),
+        'ipc_round_trip_p99_ms': 1e3 * percentile(devices.round_trips, 0.99),
+    }
+
+
+async def time_registration(topology: BuildingTopology) -> float:
+    core = FakeCoreSystems()
+    runner, config = await core.serve()
+    state = DesiredState(device_specs(
+            topology.room_names,
+            [spec['position'] for spec in topology.room_specs],
+    ))
+    try:
+        start = time.perf_counter()
+        await apply_registration(state, config)
+        return time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+
+
+def run(num_rooms: int, steps: int, register: bool, state_plane: bool = False) -> Dict[str, float]:
+    tracemalloc.start()
+    topology = building(num_rooms)
+    env = ArrowheadEnvironment(topology, verbose=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results = {'rooms': num_rooms, 'setup_memory_mb': peak / 2 ** 20}
+    results.update(asyncio.run(run_steps(env, steps, state_plane)))
+    results['peak_rss_mb'] = peak_rss_mb()
+    if register:
+        results['registration_s'] = asyncio.run(time_registration(topology))
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rooms', type=int, nargs='+', default=[8, 100, 1000, 10_000])
+    parser.add_argument('--steps', type=int, default=10, help='Simulation steps per building size')
+    parser.add_argument('--register', action='store_true', help='Also time device registration')
+    parser.add_argument('--state-plane', action='store_true', help='Read temperatures and setpoints from shared memory')
+    args = parser.parse_args()
+
+    for num_rooms in args.rooms:
+        results = run(num_rooms, args.steps, args.register, args.state_plane)
+        print('  '.join(
+                f'{name}={value:.3f}' if isinstance(value, float) else f'{name}={value}'
+                for name, value in results.items()
+        ))
@@ -0,0 +1,79 @@
+"""
+Compare the SenML codec with the dict building and linear scans the devices used before.
+
+    python -m benchmarks.bench_senml [--number N]
+"""
+import argparse
+import timeit
+
+from demo.devices import senml
+from demo.devices.senml import RecordTemplate, decode, dumps, loads
+
+COORDINATE = (1, 2)
+
+
+def build_located(timestep, value):
+    return [
+        {"bn": "temp_sensor", "bt": timestep},
+        {"u": "Lon", "v": COORDINATE[0]},
+        {"u": "Lat", "v": COORDINATE[1]},
+        {"u": "Cel", "v": value},
+    ]
+
+
+def scan_located(message):
+    for measurement in message:
+        if "bn" in measurement:
+            name = measurement["bn"]
+        elif measurement["u"] in {"Lon", "lat"}:
+            if measurement["v"] < 0:
+                raise RuntimeError(f'{measurement["u"]} = {measurement["v"]} < 0!!')
+        elif measurement["u"] == "Cel":
+            break
+    else:
+        raise RuntimeError(f'Message {message} does not contain a celsius measurement')
+
+    return measurement["v"]
+
+
+def build_flat(timestep, value):
+    return [{"n": "A11_temp_sensor", "t": timestep, "u": "K", "v": value}]
+
+
+def scan_flat(message):
+    measurement = message[0]
+    if measurement["n"] != 'A11_temp_sensor':
+        raise RuntimeError(f'Unexpected name in message: {message}')
+
+    return measurement["v"]
+
+
+def run(number: int):
+    flat = RecordTemplate('A11_temp_sensor', 'K')
+    located = RecordTemplate('temp_sensor', 'Cel', COORDINATE)
+    message = located.encode(1, 20.0)
+    cases = {
+        'flat dict build + read': lambda: scan_flat(build_flat(1, 293.15)),
+        'flat codec encode + decode': lambda: decode(flat.encode(1, 293.15), 'K').value,
+        'located dict build + scan': lambda: scan_located(build_located(1, 20.0)),
+        'located codec encode + decode': lambda: decode(located.encode(1, 20.0), 'Cel').value,
+        'located json dumps + loads': lambda: loads(dumps(message)),
+    }
+    if senml.cbor2 is not None:
+        cases['located cbor dumps + loads'] = lambda: loads(dumps(message, 'cbor'), 'cbor')
+
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=number, repeat=5))
+        print(f'{name:32} {1e9 * seconds / number:8.0f} ns/message')
+
+    print(f'located json size: {len(dumps(message))} bytes')
+    if senml.cbor2 is not None:
+        print(f'located cbor size: {len(dumps(message, "cbor"))} bytes')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=100_000)
+    args = parser.parse_args()
+
+    run(args.number)
@@ -0,0 +1,89 @@
+"""
+Startup cost of the device processes.
+
+Reports, for every entry point, the time a fresh interpreter spends importing it and the time to import it
+and create one of its devices, with ``--profile`` also the slowest imports of the latter by cumulative time.
+Then starts ``--processes`` processes that each create a sensor and exit, once with spawn and once from the
+launcher's preloaded forkserver.
+
+    python -m benchmarks.bench_startup [--processes N] [--profile] [--top N]
+"""
+import argparse
+import multiprocessing
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+from demo.launcher import device_context, start_processes
+from demo.start_temperature_sensors import create_sensor_a
+from demo.utils import get_core_config
+
+# Entry point module and the statement that creates one of its devices
+ENTRY_POINTS = {
+    'demo.start_temperature_sensors': "create_sensor_a('A11', (0, 0), 5000, get_core_config())",
+    'demo.start_actuators': "create_actuator_a('A11', (0, 0), 5100, get_core_config())",
+    'demo.start_controllers': "create_controller_a('A11', (0, 0), 5200, get_core_config())",
+    'demo.device_host': "DEVICE_FACTORIES['sensor_a']('A11', (0, 0), 5000, get_core_config())",
+}
+
+
+def interpreter_seconds(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], check=True)
+    return time.perf_counter() - start
+
+
+def slowest_imports(code: str, top: int) -> List[Tuple[int, str]]:
+    """
+    Cumulative import time in microseconds of the ``top`` slowest imports made by running ``code``.
+    """
+    result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            check=True,
+            capture_output=True,
+            text=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split('|')
+        imports.append((int(cumulative), name.strip()))
+
+    return sorted(imports, reverse=True)[:top]
+
+
+def create_and_exit(port: int):
+    create_sensor_a('A11', (0, 0), port, get_core_config())
+
+
+def launch_seconds(context: multiprocessing.context.BaseContext, num_processes: int) -> float:
+    start = time.perf_counter()
+    processes = start_processes([(create_and_exit, (5000 + i,)) for i in range(num_processes)], context)
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f'Device process exited with {process.exitcode}')
+
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=64)
+    parser.add_argument('--profile', action='store_true', help='Show the slowest imports of every entry point')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = interpreter_seconds('pass')
+    for module, create in ENTRY_POINTS.items():
+        create_code = f'from {module} import *\n{create}'
+        import_s = interpreter_seconds(f'import {module}') - baseline
+        create_s = interpreter_seconds(create_code) - baseline
+        print(f'{module}  import_s={import_s:.3f}  import_and_create_s={create_s:.3f}')
+        if args.profile:
+            for cumulative, name in slowest_imports(create_code, args.top):
+                print(f'    {cumulative / 1e6:.3f}s  {name}')
+
+    spawn_s = launch_seconds(multiprocessing.get_context('spawn'), args.processes)
+    forkserver_s = launch_seconds(device_context(), args.processes)
+    print(f'processes={args.processes}  spawn_s={spawn_s:.2f}  forkserver_s={forkserver_s:.2f}')
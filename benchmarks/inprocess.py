@@ -0,0 +1,241 @@
+"""
+In-process stand-ins for the ipyc links, devices, and core systems, used by the tests and benchmarks.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from demo.devices.ipc_mixin import IPyCBatcher
+from demo.devices.senml import RecordTemplate, decode
+from demo.state_plane import StatePlaneReader
+
+
+class InProcessLink:
+    """
+    Both ends of an ipyc link as a pair of queues, :meth:`client_side` returns the device end.
+    """
+
+    def __init__(self):
+        self.to_host: asyncio.Queue = asyncio.Queue()
+        self.to_client: asyncio.Queue = asyncio.Queue()
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    async def close(self):
+        self.active = False
+
+    async def receive(self):
+        return await self.to_host.get()
+
+    async def send(self, message):
+        await self.to_client.put(message)
+
+    async def request(self, message):
+        await self.to_host.put(message)
+        return await self.to_client.get()
+
+    def client_side(self) -> 'InProcessLink':
+        client = InProcessLink()
+        client.to_host, client.to_client = self.to_client, self.to_host
+        return client
+
+
+class EnvironmentLinks:
+    """
+    ipyc requests of one device, answered by the environment over an in-process link per kind of message.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.links: Dict[str, InProcessLink] = {}
+
+    async def request(self, message):
+        if message["system"] not in self.links:
+            self.links[message["system"]] = InProcessLink()
+            asyncio.create_task(self.env.on_connect(self.links[message["system"]]))
+
+        return await self.links[message["system"]].request(message)
+
+
+class InProcessDevices:
+    """
+    The sensor, controller, and actuator of every room and unit of an environment as tasks on one event loop.
+
+    Each room runs the same exchange as the Arrowhead devices: read the temperature, encode and decode
+    it as SenML, read the setpoint, run a PI controller, and send the actuation. Messages of the same
+    kind are batched over one link per kind, like in a device host. With a ``state_plane`` the
+    temperatures and setpoints are read from the environment's shared memory instead.
+    """
+    SYSTEMS = ('sensor', 'controller', 'actuator')
+
+    def __init__(
+            self,
+            env,
+            units=('heater', 'cooler'),
+            k_P: float = 40.0,
+            k_I: float = 1.0,
+            state_plane: Optional[StatePlaneReader] = None,
+    ):
+        self.env = env
+        self.state_plane = state_plane
+        self.units = units
+        self.k_P = k_P
+        self.k_I = k_I
+        self.links = {system: InProcessLink() for system in self.SYSTEMS}
+        # Seconds from sending each ipyc request to receiving its reply
+        self.round_trips: List[float] = []
+        self._tasks: List[asyncio.Task] = []
+        self._batchers: Dict[str, IPyCBatcher] = {}
+
+    async def request(self, message: Dict) -> Dict:
+        start = time.perf_counter()
+        reply = await self._batchers[message["system"]].request(message)
+        self.round_trips.append(time.perf_counter() - start)
+        return reply
+
+    async def room_loop(self, room_name: str, unit: str, steps: Optional[int]):
+        template = RecordTemplate(f'{room_name}_temp_sensor', 'K')
+        sign = 1.0 if unit == 'heater' else -1.0
+        integral = 0.0
+        step = 0
+        timestep = -1
+        while steps is None or step < steps:
+            if self.state_plane is not None:
+                reading = await self.state_plane.temperature(room_name, timestep)
+                setpoint = (await self.state_plane.setpoint(room_name))["setpoint"]
+            else:
+                reading = await self.request({"name": room_name, "unit": unit, "system": "sensor"})
+                setpoint = (await self.request({"name": room_name, "unit": unit, "system": "controller"}))["setpoint"]
+            timestep = reading["timestep"]
+            temperature = decode(template.encode(timestep, reading["temp"]), 'K').value
+            error = setpoint - temperature
+            integral = max(-10 * self.k_P, min(integral + error * 10.0, 10 * self.k_P))
+            control = sign * max(0.0, sign * (self.k_P * error + self.k_I * integral))
+            await self.request({"name": room_name, "unit": unit, "system": "actuator", "actuation": control})
+            step += 1
+
+    def start(self, steps: Optional[int] = None) -> asyncio.Future:
+        """
+        Connect to the environment and run ``steps`` exchanges per room and unit, forever if ``None``.
+        """
+        self._tasks = [asyncio.create_task(self.env.on_connect(link)) for link in self.links.values()]
+        self._batchers = {system: IPyCBatcher(link.client_side()) for system, link in self.links.items()}
+        return asyncio.gather(*(
+            self.room_loop(room_name, unit, steps)
+            for room_name in self.env.room_names
+            for unit in self.units
+        ))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+
+
+class FakeCoreSystems:
+    """
+    Management API of the service registry, orchestrator, and authorization systems, kept in memory.
+    """
+
+    def __init__(self):
+        self.systems: List[Dict] = []
+        self.services: List[Dict] = []
+        self.rules: List[Dict] = []
+        self.authorizations: List[Dict] = []
+        self.posts = 0
+
+    def system(self, system_id):
+        return next(system for system in self.systems if system['id'] == system_id)
+
+    def find_system(self, record):
+        return next(
+                system for system in self.systems
+                if (system['systemName'], system['address'], system['port'])
+                == (record['systemName'], record['address'], record['port'])
+        )
+
+    async def get_systems(self, request):
+        return web.json_response({'data': self.systems})
+
+    async def post_system(self, request):
+        self.posts += 1
+        record = await request.json()
+        self.systems.append({'id': len(self.systems) + 1, **record})
+        return web.json_response(record, status=201)
+
+    async def get_services(self, request):
+        return web.json_response({'data': self.services})
+
+    async def post_service(self, request):
+        self.posts += 1
+        record = await request.json()
+        self.services.append({
+            'id': len(self.services) + 1,
+            'serviceDefinition': {'id': 1 if record['serviceDefinition'] == 'temperature' else 2,
+                                  'serviceDefinition': record['serviceDefinition']},
+            'serviceUri': record['serviceUri'],
+            'interfaces': [{'id': 1, 'interfaceName': record['interfaces'][0]}],
+            'provider': self.find_system(record['providerSystem']),
+        })
+        return web.json_response({}, status=201)
+
+    async def get_rules(self, request):
+        return web.json_response({'data': self.rules})
+
+    async def post_rules(self, request):
+        self.posts += 1
+        for record in await request.json():
+            self.rules.append({
+                'serviceDefinition': {'serviceDefinition': record['serviceDefinitionName']},
+                'serviceInterface': {'interfaceName': record['serviceInterfaceName']},
+                'providerSystem': self.find_system(record['providerSystem']),
+                'consumerSystem': self.system(record['consumerSystemId']),
+            })
+        return web.json_response({}, status=201)
+
+    async def get_authorizations(self, request):
+        return web.json_response({'data': self.authorizations})
+
+    async def post_authorization(self, request):
+        self.posts += 1
+        record = await request.json()
+        for provider_id in record['providerIds']:
+            self.authorizations.append({
+                'consumerSystem': {'id': record['consumerId']},
+                'providerSystem': {'id': provider_id},
+                'serviceDefinition': {'id': record['serviceDefinitionIds'][0]},
+                'interfaces': [{'id': record['interfaceIds'][0]}],
+            })
+        return web.json_response({}, status=201)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get('/serviceregistry/mgmt/systems', self.get_systems),
+            web.post('/serviceregistry/mgmt/systems', self.post_system),
+            web.get('/serviceregistry/mgmt', self.get_services),
+            web.post('/serviceregistry/mgmt', self.post_service),
+            web.get('/orchestrator/mgmt/store', self.get_rules),
+            web.post('/orchestrator/mgmt/store', self.post_rules),
+            web.get('/authorization/mgmt/intracloud', self.get_authorizations),
+            web.post('/authorization/mgmt/intracloud', self.post_authorization),
+        ])
+        return app
+
+    async def serve(self, host: str = '127.0.0.1') -> Tuple[web.AppRunner, Dict]:
+        """
+        Serve the management API on a free port, returns the runner and a core system config pointing at it.
+        """
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore
+        config = {
+            core_system: {'address': host, 'port': port}
+            for core_system in ('service_registry', 'orchestrator', 'authorization')
+        }
+        return runner, config
@@ -0,0 +1,147 @@
+"""
+Arrival tracking and synchronization for the phases of a simulation step.
+"""
+import asyncio
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+UNITS = ('heater', 'cooler')
+
+
+class StepBarrier:
+    """
+    Which devices of every room have checked in during the current phase.
+
+    Arrivals are kept in one boolean array with a row per room and a column per unit, next to a count of
+    devices that have not arrived yet, so an arrival and the completion check are constant time and
+    :meth:`reset` reuses the array instead of rebuilding it.
+
+    A barrier created with ``expected=False`` waits for no device until it is added with :meth:`expect`.
+    """
+
+    def __init__(self, room_names: Sequence[str], units: Sequence[str] = UNITS, expected: bool = True):
+        self.room_index: Dict[str, int] = {room_name: i for i, room_name in enumerate(room_names)}
+        self.unit_index: Dict[str, int] = {unit: j for j, unit in enumerate(units)}
+        self.arrived: npt.NDArray[np.bool_] = np.zeros((len(room_names), len(units)), dtype=bool)
+        self.expected: npt.NDArray[np.bool_] = np.full_like(self.arrived, expected)
+        self.num_expected = int(self.expected.sum())
+        self.pending = self.num_expected
+
+    def expect(self, room_name: str, unit: str) -> bool:
+        """
+        Wait for the ``unit`` of ``room_name`` from now on, returns whether it was not waited for before.
+        """
+        position = (self.room_index[room_name], self.unit_index[unit])
+        if self.expected[position]:
+            return False
+
+        self.expected[position] = True
+        self.num_expected += 1
+        if not self.arrived[position]:
+            self.pending += 1
+        return True
+
+    def arrive(self, room_name: str, unit: str) -> bool:
+        """
+        Mark the ``unit`` of ``room_name`` as arrived, returns whether it had not arrived before.
+        """
+        position = (self.room_index[room_name], self.unit_index[unit])
+        if self.arrived[position]:
+            return False
+
+        self.arrived[position] = True
+        if self.expected[position]:
+            self.pending -= 1
+        return True
+
+    @property
+    def complete(self) -> bool:
+        return self.pending == 0
+
+    def missing(self) -> Sequence[Tuple[str, str]]:
+        """
+        Room and unit of every device that has not arrived yet.
+        """
+        room_names = list(self.room_index)
+        units = list(self.unit_index)
+        return [(room_names[i], units[j]) for i, j in zip(*np.nonzero(self.expected & ~self.arrived))]
+
+    def reset(self):
+        self.arrived.fill(False)
+        self.pending = self.num_expected
+
+
+class DeadlineMetrics:
+    """
+    Devices that had not arrived when the deadline of a step phase expired.
+
+    ``expired`` counts the phases that ran out of time per kind of device, ``misses`` counts every
+    ``(system, room, unit)`` that was missing, and ``stale`` holds the devices missing in the latest phase.
+    """
+
+    def __init__(self, systems: Sequence[str] = ('sensor', 'actuator')):
+        self.expired: Dict[str, int] = {system: 0 for system in systems}
+        self.misses: Dict[Tuple[str, str, str], int] = {}
+        self.stale: Dict[str, Sequence[Tuple[str, str]]] = {system: [] for system in systems}
+
+    def record(self, system: str, missing: Sequence[Tuple[str, str]]):
+        self.stale[system] = missing
+        if not missing:
+            return
+
+        self.expired[system] += 1
+        for room_name, unit in missing:
+            key = (system, room_name, unit)
+            self.misses[key] = self.misses.get(key, 0) + 1
+
+
+class PhaseGate:
+    """
+    Opens one phase of every step to the connection handlers, and tells the step when its devices are done.
+
+    Every opening starts a new generation. Handlers wait for the event of the next opening, which wakes
+    all of them at once, so a handler that starts waiting just before the phase opens cannot miss it.
+    Handlers do not hold a lock while they reply, so every connection is answered in the same event loop
+    iteration. Must be created on the event loop it is used from.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.is_open = False
+        self._opened = asyncio.Event()
+        self._completed = asyncio.Event()
+
+    async def wait_open(self) -> int:
+        """
+        Wait until the phase is open and return its generation.
+        """
+        while not self.is_open:
+            await self._opened.wait()
+
+        return self.generation
+
+    def open(self):
+        self.generation += 1
+        self.is_open = True
+        self._completed = asyncio.Event()
+        opened, self._opened = self._opened, asyncio.Event()
+        opened.set()
+
+    def complete(self):
+        self._completed.set()
+
+    async def wait_complete(self, timeout: Optional[float] = None):
+        """
+        Wait until :meth:`complete` is called for the current generation.
+
+        Raises ``asyncio.TimeoutError`` after ``timeout`` seconds.
+        """
+        if timeout is None:
+            await self._completed.wait()
+        else:
+            await asyncio.wait_for(self._completed.wait(), timeout)
+
+    def close(self):
+        self.is_open = False
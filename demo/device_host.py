@@ -0,0 +1,204 @@
+import asyncio
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+import os
+
+from demo.devices.ipc_mixin import IPyCBatchClient, SetpointSubscription
+from demo.launcher import DEVICE_MODULES, device_context, start_processes
+from demo.start_actuators import create_actuator_a, create_actuator_b
+from demo.start_controllers import create_controller_a, create_controller_b, register_controller_systems
+from demo.start_temperature_sensors import create_sensor_a, create_sensor_b
+from demo.utils import DeviceSpec, device_specs, get_core_config
+
+if TYPE_CHECKING:
+    from arrowhead_client.client.implementations import AsyncClient
+
+    from demo.devices.publish import LocalBroker
+    from demo.state_plane import StatePlaneReader
+
+
+DEVICE_FACTORIES: Dict[str, Callable[[str, Tuple[int, int], int, Dict], 'AsyncClient']] = {
+    'sensor_a': create_sensor_a,
+    'sensor_b': create_sensor_b,
+    'actuator_a': create_actuator_a,
+    'actuator_b': create_actuator_b,
+    'controller_a': create_controller_a,
+    'controller_b': create_controller_b,
+}
+# Unit of the environment that the devices of each flavor report for
+FLAVOR_UNITS = {'a': 'heater', 'b': 'cooler'}
+# Modules the forkserver imports once for all device hosts
+HOST_MODULES = (*DEVICE_MODULES, 'uvicorn')
+
+
+async def serve_device(kind: str, device: 'AsyncClient'):
+    """
+    Run one device on the current event loop, controllers run their control loop and
+    every other device serves its provided services.
+
+    In publish mode sensors also publish their readings every step, and actuators keep their actuation
+    for the readings that sensors held back.
+    """
+    if kind.startswith('controller'):
+        await device.main()  # type: ignore
+        return
+
+    role, flavor = kind.split('_')
+    if device.reading_broker is not None:  # type: ignore
+        loop = device.publish_readings if role == 'sensor' else device.hold_actuation  # type: ignore
+        await asyncio.gather(serve_provider(device), loop(FLAVOR_UNITS[flavor]))
+        return
+
+    await serve_provider(device)
+
+
+async def serve_provider(device: 'AsyncClient'):
+    from arrowhead_client.provider.implementations.fastapi_provider import ArrowheadAccessPolicyMiddleware
+    import uvicorn  # type: ignore
+
+    # Same setup as FastapiProvider.run_forever, without letting uvicorn own the event loop
+    provider = device.provider
+    provider.app.add_middleware(ArrowheadAccessPolicyMiddleware, policy_map=provider.policy_map)  # type: ignore
+    server = uvicorn.Server(uvicorn.Config(
+            provider.app,  # type: ignore
+            host=device.system.address,
+            port=device.system.port,
+            log_level='warning',
+    ))
+    await server.serve()
+
+
+async def host_devices(
+        specs: Sequence[DeviceSpec],
+        config: Dict,
+        ipc_port: int = 9999,
+        state_plane: Optional[str] = None,
+        bank: bool = False,
+        subscribe_setpoints: bool = False,
+        publish: bool = False,
+):
+    """
+    Run all devices in ``specs`` as tasks on one event loop, sharing batched ipyc connections.
+
+    With the name of the environment's ``state_plane``, sensors and controllers read from its shared memory.
+    With ``bank``, the control laws of all controllers are computed together in one :class:`ControllerBank`.
+    With ``subscribe_setpoints``, the environment pushes setpoint changes to the host's controllers.
+    With ``publish``, sensors publish readings to a broker shared by the host instead of being polled.
+    """
+    batch_client = IPyCBatchClient(ipc_port)
+    # The state plane, the controller bank, and the broker are only imported when used, the first two need numpy
+    reader: Optional['StatePlaneReader'] = None
+    if state_plane:
+        from demo.state_plane import StatePlaneReader
+
+        reader = StatePlaneReader(state_plane)
+    subscription = SetpointSubscription(
+            ipc_port,
+            sorted({spec['room_name'] for spec in specs if spec['kind'].startswith('controller')}),
+    ) if subscribe_setpoints else None
+    broker: Optional['LocalBroker'] = None
+    if publish:
+        from demo.devices.publish import LocalBroker
+
+        broker = LocalBroker()
+    devices = []
+    for spec in specs:
+        device = DEVICE_FACTORIES[spec['kind']](spec['room_name'], spec['position'], spec['port'], config)
+        device.ipyc_batch_client = batch_client  # type: ignore
+        device.state_plane = reader  # type: ignore
+        device.setpoint_subscription = subscription  # type: ignore
+        device.reading_broker = broker  # type: ignore
+        devices.append((spec['kind'], device))
+    if bank:
+        from demo.devices.controller_bank import bank_controllers
+
+        bank_controllers([device for kind, device in devices if kind.startswith('controller')])  # type: ignore
+
+    try:
+        await asyncio.gather(*(serve_device(kind, device) for kind, device in devices))
+    finally:
+        await batch_client.close()
+        if subscription is not None:
+            await subscription.close()
+        if reader is not None:
+            reader.close()
+
+
+def run_device_host(
+        specs: Sequence[DeviceSpec],
+        ipc_port: int = 9999,
+        state_plane: Optional[str] = None,
+        bank: bool = False,
+        subscribe_setpoints: bool = False,
+        publish: bool = False,
+):
+    asyncio.run(host_devices(specs, get_core_config(), ipc_port, state_plane, bank, subscribe_setpoints, publish))
+
+
+def partition(specs: Sequence[DeviceSpec], num_hosts: int, by_room: bool = False) -> List[List[DeviceSpec]]:
+    """
+    Split ``specs`` round-robin into at most ``num_hosts`` non-empty groups.
+
+    With ``by_room`` the rooms are split instead, so all devices of a room share a host.
+    """
+    if by_room:
+        room_names = list(dict.fromkeys(spec['room_name'] for spec in specs))
+        num_hosts = max(1, min(num_hosts, len(room_names)))
+        host_of = {room_name: i % num_hosts for i, room_name in enumerate(room_names)}
+        return [[spec for spec in specs if host_of[spec['room_name']] == i] for i in range(num_hosts)]
+
+    num_hosts = max(1, min(num_hosts, len(specs)))
+    return [list(specs[i::num_hosts]) for i in range(num_hosts)]
+
+
+def main(
+        specs: Optional[Sequence[DeviceSpec]] = None,
+        num_hosts: Optional[int] = None,
+        ipc_port: int = 9999,
+        state_plane: Optional[str] = None,
+        bank: bool = False,
+        subscribe_setpoints: bool = False,
+        publish: bool = False,
+):
+    specs = specs if specs is not None else device_specs()
+    register_controller_systems(specs)
+    host_processes = start_processes(
+            [
+                (run_device_host, (host_specs, ipc_port, state_plane, bank, subscribe_setpoints, publish))
+                # Published readings only reach controllers on the same host
+                for host_specs in partition(specs, num_hosts or os.cpu_count() or 1, by_room=publish)
+            ],
+            device_context(HOST_MODULES),
+            name='device host',
+    )
+    for process in host_processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hosts', type=int, help='Number of device host processes, defaults to the CPU count')
+    parser.add_argument('--ipc-port', type=int, default=9999, help='ipyc port of the environment or environment shard')
+    parser.add_argument('--state-plane', help='Name of the shared memory the environment publishes room state to')
+    parser.add_argument('--bank', action='store_true', help='Compute the controllers of each host in one vectorized bank')
+    parser.add_argument(
+            '--subscribe-setpoints',
+            action='store_true',
+            help='Let the environment push setpoint changes instead of polling them every cycle',
+    )
+    parser.add_argument(
+            '--publish',
+            action='store_true',
+            help='Sensors publish readings outside a deadband and controllers react to them, instead of polling',
+    )
+    args = parser.parse_args()
+
+    main(
+            num_hosts=args.hosts,
+            ipc_port=args.ipc_port,
+            state_plane=args.state_plane,
+            bank=args.bank,
+            subscribe_setpoints=args.subscribe_setpoints,
+            publish=args.publish,
+    )
@@ -1,21 +1,28 @@
 import asyncio
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from arrowhead_client.client import provided_service
-from arrowhead_client.client.implementations import AsyncClient
 from arrowhead_client.errors import NoAvailableServicesError
+import aiohttp
+from demo.devices.connection_pool import PooledAsyncClient
+from demo.devices.controller_bank import ControllerBankMixin
 from demo.devices.ipc_mixin import IPyCMixin
+from demo.devices.orchestration_cache import OrchestrationCacheMixin
+from demo.devices.publish import PublishMixin
+from demo.devices.senml import RecordTemplate, decode
 from ipyc import AsyncIPyCClient, AsyncIPyCLink
 
 #import equipment
 
 MAX_POWER = 1500
+# Errors after which a controller retries with a new orchestration result
+UNAVAILABLE_ERRORS = (asyncio.TimeoutError, aiohttp.ClientConnectionError, NoAvailableServicesError)
 
 class TemperatureSensorNoArrowhead:
     pass
 
 
-class Controller(IPyCMixin, AsyncClient):
+class Controller(PublishMixin, ControllerBankMixin, IPyCMixin, OrchestrationCacheMixin, PooledAsyncClient):
     def __init__(self, *args, k_P=40, k_I=1, **kwargs):
         super().__init__(*args, **kwargs)
         self.integral = 0.0
@@ -25,26 +32,26 @@ class Controller(IPyCMixin, AsyncClient):
         self.setpoint = 293.15
         self.temperature = 293.15
         self.timestep = 0
+        self.actuation_template = RecordTemplate(self.system.system_name, 'W')
 
     @property
     def room_name(self):
         return self.system.system_name.split('_')[0]
 
     async def get_setpoint(self):
-        await self.ipyc_connection.send({"name": self.room_name, "system": "controller", "unit": "heater"})
-        res = await self.ipyc_connection.receive()
+        res = await self.ipc_request({"name": self.room_name, "system": "controller", "unit": "heater"})
 
         return res["setpoint"], res["timestep"]
 
     def read_temperature(self, temperature_message):
-        measurement = temperature_message[0]
-        if measurement["n"] != f'{self.room_name}_temp_sensor':
+        reading = decode(temperature_message, 'K')
+        if reading.name != f'{self.room_name}_temp_sensor':
             raise RuntimeError(f'Unexpected name in message: {temperature_message}')
 
-        return measurement["v"]
+        return reading.value, int(reading.time)
 
     def control_message(self):
-        return [{"n": self.system.system_name, "t": self.timestep, "u": "W", "v": max(0.0, self.control)}]
+        return self.actuation_template.encode(self.timestep, max(0.0, self.control))
 
     def control_loop(self, dt):
         error = self.setpoint - self.temperature
@@ -52,45 +59,51 @@ class Controller(IPyCMixin, AsyncClient):
         self.integral = max(-10 * self.k_P, min(self.integral + error * dt, 10 * self.k_P))
         return self.k_P * error + self.k_I * self.integral, old_integral
 
+    async def actuate(self, message, old_control: float, old_integral: float):
+        try:
+            await self.consume_cached('actuator', json=message)
+        except UNAVAILABLE_ERRORS:
+            print(f'Actuator unavailable, waiting for a new orchestration result')
+            # Reset controller state if actuator is unavailable
+            self.control = old_control
+            self.restore_integral(old_integral)
+
     async def main(self):
         async with self:
             await self.client_setup()
-            await self.add_orchestration_rule(
-                    'temperature',
-                    'GET',
-            )
-            await self.add_orchestration_rule(
-                    'actuator',
-                    'POST',
-            )
+            self.start_orchestration_cache({'temperature': 'GET', 'actuator': 'POST'})
             print('STARTED')
+            if self.reading_broker is not None:
+                await self.react_to_readings('heater')
+                return
+            actuation: Optional[asyncio.Task] = None
             while True:
-                try:
-                    temp_message = await self.consume_service('temperature')
-                except asyncio.TimeoutError:
-                    continue
-                except NoAvailableServicesError:
-                    print(f'No available services found for service "temperature", sleeping for 10 seconds then retrying')
-                    await asyncio.sleep(10)
+                # The setpoint does not depend on the reading, and the next reading is requested
+                # while the previous actuation is still in flight
+                temp_message, setpoint = await asyncio.gather(
+                        self.consume_cached('temperature'),
+                        self.get_setpoint(),
+                        return_exceptions=True,
+                )
+                # The previous actuation has to finish first, it may roll back the controller state
+                if actuation is not None:
+                    await actuation
+                    actuation = None
+                if isinstance(temp_message, UNAVAILABLE_ERRORS):
                     continue
+                for result in (temp_message, setpoint):
+                    if isinstance(result, BaseException):
+                        raise result
 
                 old_control = self.control
-                self.setpoint, self.timestep = await self.get_setpoint()
-                self.temperature = self.read_temperature(temp_message.read_json())
-                self.control, old_integral = self.control_loop(10.0)
-                try:
-                    await self.consume_service('actuator', json=self.control_message())
-                except NoAvailableServicesError:
-                    print(f'No available services found for service "actuation", sleeping for 10 seconds then retrying')
-                    # Reset controller state if actuator is unavailable
-                    self.control = old_control
-                    self.integral = old_integral
-                    await asyncio.sleep(10)
-                #await asyncio.sleep(3)
-
-
-
-class Heater(IPyCMixin, AsyncClient):
+                self.setpoint, _ = setpoint
+                self.temperature, self.timestep = self.read_temperature(temp_message.read_json())
+                self.control, old_integral = await self.compute_control(10.0)
+                actuation = asyncio.create_task(self.actuate(self.control_message(), old_control, old_integral))
+
+
+
+class Heater(PublishMixin, IPyCMixin, PooledAsyncClient):
     def __init__(self, *args, max_power: float = MAX_POWER, **kwargs):
         super().__init__(*args, **kwargs)
         self.max_power = max_power
@@ -108,14 +121,15 @@ class Heater(IPyCMixin, AsyncClient):
             access_policy='NOT_SECURE',
     )
     async def update_actuation(self, actuation_message: List[Dict[str, Any]]):
-        name = actuation_message[0]["n"]
-        value = max(0, min(actuation_message[0]["v"], self.max_power))
+        value = max(0, min(decode(actuation_message, 'W').value, self.max_power))
         print(f"Current heater power: {value}")
+        temp_message = await self.ipc_request({"name": self.room_name, "unit": "heater", "system": "actuator", "actuation": value})
 
-        await self.ipyc_connection.send({"name": self.room_name, "unit": "heater", "system": "actuator", "actuation": value})
-        temp_message = await self.ipyc_connection.receive()
+class TemperatureSensor(PublishMixin, IPyCMixin, PooledAsyncClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature_template = RecordTemplate(self.system.system_name, 'K')
 
-class TemperatureSensor(IPyCMixin, AsyncClient):
     @property
     def room_name(self):
         return self.system.system_name.split('_')[0]
@@ -129,10 +143,12 @@ class TemperatureSensor(IPyCMixin, AsyncClient):
             access_policy='NOT_SECURE',
     )
     async def get_temperature(self):
-        await self.ipyc_connection.send({"name": self.room_name, "unit": "heater", "system": "sensor"})
-        temp_message = await self.ipyc_connection.receive()
+        return await self.read_message()
+
+    async def read_message(self):
+        temp_message = await self.ipc_request({"name": self.room_name, "unit": "heater", "system": "sensor"})
 
-        return [{"n": self.system.system_name, "t": temp_message["timestep"], "u": "K", "v": temp_message["temp"]}]
+        return self.temperature_template.encode(temp_message["timestep"], temp_message["temp"])
 
 
 if __name__ == '__main__':
@@ -1,18 +1,27 @@
 import asyncio
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from arrowhead_client.client import provided_service
-from arrowhead_client.client.implementations import AsyncClient
 from arrowhead_client.errors import NoAvailableServicesError
+import aiohttp
+from demo.devices.connection_pool import PooledAsyncClient
+from demo.devices.controller_bank import ControllerBankMixin
 from demo.devices.ipc_mixin import IPyCMixin
+from demo.devices.orchestration_cache import OrchestrationCacheMixin
+from demo.devices.publish import PublishMixin
+from demo.devices.senml import RecordTemplate, decode
 from ipyc import AsyncIPyCClient, AsyncIPyCLink
 
 #import equipment
 
 MAX_POWER = 1500
+# Errors after which a controller retries with a new orchestration result
+UNAVAILABLE_ERRORS = (asyncio.TimeoutError, aiohttp.ClientConnectionError, NoAvailableServicesError)
 
 
-class Controller(IPyCMixin, AsyncClient):
+class Controller(PublishMixin, ControllerBankMixin, IPyCMixin, OrchestrationCacheMixin, PooledAsyncClient):
+    control_limits = (-1.0, 1.0)
+
     def __init__(self, *args, k_P=0.1, k_I=0.01, room_name: str = '', coordinate: Tuple[int, int] = (-1, -1), **kwargs):
         super().__init__(*args, **kwargs)
         self.integral = 0.0
@@ -24,38 +33,27 @@ class Controller(IPyCMixin, AsyncClient):
         self.timestep = 0
         self.coordinate = coordinate
         self.room_name = room_name
+        self.actuation_template = RecordTemplate(self.system.system_name, '/', coordinate)
 
     async def get_setpoint(self):
         print('Retrieving setpoint')
-        await self.ipyc_connection.send({"name": self.room_name, "unit": "cooler", "system": "controller"})
-        res = await self.ipyc_connection.receive()
+        res = await self.ipc_request({"name": self.room_name, "unit": "cooler", "system": "controller"})
         print('Setpoint received')
 
         return res["setpoint"], res["timestep"]
 
     def read_temperature(self, temperature_message):
-        print(f'{temperature_message=}')
-        for measurement in temperature_message:
-            if "bn" in measurement:
-                name = measurement["bn"]
-            elif measurement["u"] in {"Lon", "lat"}:
-                if measurement["v"] < 0:
-                    raise RuntimeError(f'{measurement["u"]} = {measurement["v"]} < 0!!')
-            elif measurement["u"] == "Cel":
-                break
-        else:
-            raise RuntimeError(f'Message {temperature_message} does not contain a celsius measurement')
-
-        return measurement["v"] + 273.15
+        try:
+            reading = decode(temperature_message, 'Cel')
+        except ValueError as e:
+            raise RuntimeError(str(e)) from e
+        if (reading.longitude or 0) < 0 or (reading.latitude or 0) < 0:
+            raise RuntimeError(f'Negative coordinate ({reading.longitude}, {reading.latitude}) in {temperature_message}')
+
+        return reading.value + 273.15, int(reading.time)
 
     def control_message(self):
-        print(f'room {self.room_name} cooler: {-min(0.0, self.control) = }')
-        return [
-            {"bn": self.system.system_name, "bt": self.timestep},
-            {"u": "Lon", "v": self.coordinate[0]},
-            {"u": "Lat", "v": self.coordinate[1]},
-            {"u": "/", "v": -min(0.0, self.control)}
-        ]
+        return self.actuation_template.encode(self.timestep, -min(0.0, self.control))
 
     def control_loop(self, dt):
         error = self.setpoint - self.temperature
@@ -64,47 +62,54 @@ class Controller(IPyCMixin, AsyncClient):
         control = max(-1.0, min(self.k_P * error + self.k_I * self.integral, 1.0))
         return control, old_integral
 
+    async def actuate(self, message, old_control: float, old_integral: float):
+        try:
+            await self.consume_cached('actuator', json=message)
+        except UNAVAILABLE_ERRORS:
+            print(f'Actuator unavailable, waiting for a new orchestration result')
+            # Reset controller state if actuator is unavailable
+            self.control = old_control
+            self.restore_integral(old_integral)
+
     async def main(self):
         async with self:
             await self.client_setup()
-            await self.add_orchestration_rule(
-                    'temperature',
-                    'GET',
-            )
-            await self.add_orchestration_rule(
-                    'actuator',
-                    'POST',
-            )
+            self.start_orchestration_cache({'temperature': 'GET', 'actuator': 'POST'})
             print('STARTED')
+            if self.reading_broker is not None:
+                await self.react_to_readings('cooler')
+                return
+            actuation: Optional[asyncio.Task] = None
             while True:
-                try:
-                    temp_message = await self.consume_service('temperature')
-                except asyncio.TimeoutError:
-                    continue
-                except NoAvailableServicesError:
-                    print(f'No available services found for service "temperature", sleeping for 10 seconds then retrying')
-                    await asyncio.sleep(10)
+                # The setpoint does not depend on the reading, and the next reading is requested
+                # while the previous actuation is still in flight
+                temp_message, setpoint = await asyncio.gather(
+                        self.consume_cached('temperature'),
+                        self.get_setpoint(),
+                        return_exceptions=True,
+                )
+                # The previous actuation has to finish first, it may roll back the controller state
+                if actuation is not None:
+                    await actuation
+                    actuation = None
+                if isinstance(temp_message, UNAVAILABLE_ERRORS):
                     continue
+                for result in (temp_message, setpoint):
+                    if isinstance(result, BaseException):
+                        raise result
 
                 old_control = self.control
-                self.setpoint, self.timestep = await self.get_setpoint()
-                self.temperature = self.read_temperature(temp_message.read_json())
-                self.control, old_integral = self.control_loop(10.0)
-                try:
-                    await self.consume_service('actuator', json=self.control_message())
-                except NoAvailableServicesError:
-                    print(f'No available services found for service "actuation", sleeping for 10 seconds then retrying')
-                    # Reset controller state if actuator is unavailable
-                    self.control = old_control
-                    self.integral = old_integral
-                    await asyncio.sleep(10)
-                #await asyncio.sleep(3)
-
-class TemperatureSensor(IPyCMixin, AsyncClient):
+                self.setpoint, _ = setpoint
+                self.temperature, self.timestep = self.read_temperature(temp_message.read_json())
+                self.control, old_integral = await self.compute_control(10.0)
+                actuation = asyncio.create_task(self.actuate(self.control_message(), old_control, old_integral))
+
+class TemperatureSensor(PublishMixin, IPyCMixin, PooledAsyncClient):
     def __init__(self, *args, room_name: str = '', coordinate: Tuple[int, int] = (-1, -1), **kwargs):
         super().__init__(*args, **kwargs)
         self.coordinate = coordinate
         self.room_name = room_name
+        self.temperature_template = RecordTemplate('temp_sensor', 'Cel', coordinate)
 
     @provided_service(
             'temperature',
@@ -115,18 +120,15 @@ class TemperatureSensor(IPyCMixin, AsyncClient):
             access_policy='NOT_SECURE',
     )
     async def get_temperature(self):
-        await self.ipyc_connection.send({"name": self.room_name, "unit": "cooler", "system": "sensor"})
-        temp_message = await self.ipyc_connection.receive()
+        return await self.read_message()
+
+    async def read_message(self):
+        temp_message = await self.ipc_request({"name": self.room_name, "unit": "cooler", "system": "sensor"})
 
-        return [
-            {"bn": "temp_sensor", "bt": temp_message["timestep"]},
-            {"u": "Lon", "v": self.coordinate[0]},
-            {"u": "Lat", "v": self.coordinate[1]},
-            {"u": "Cel", "v": temp_message["temp"] - 273.15},
-        ]
+        return self.temperature_template.encode(temp_message["timestep"], temp_message["temp"] - 273.15)
 
 
-class Cooler(IPyCMixin, AsyncClient):
+class Cooler(PublishMixin, IPyCMixin, PooledAsyncClient):
     def __init__(self, *args, room_name: str = '', coordinate: Tuple[int, int] = (-1, -1), **kwargs):
         super().__init__(*args, **kwargs)
         self.max_power = MAX_POWER
@@ -142,15 +144,6 @@ class Cooler(IPyCMixin, AsyncClient):
             access_policy='NOT_SECURE',
     )
     async def update_actuation(self, actuation_message: List[Dict[str, Any]]):
-        name = actuation_message[0]["bn"]
-        for measurement in actuation_message:
-            if "bn" in measurement:
-                name = measurement["bn"]
-            elif measurement["u"] == "/":
-                value = measurement["v"]
-        value = min(-self.max_power * value, 0)
-        print(f"Current heater power: {value}")
-
-        await self.ipyc_connection.send({"name": self.room_name, "unit": "cooler", "system": "actuator", "actuation": value})
-        temp_message = await self.ipyc_connection.receive()
+        value = min(-self.max_power * decode(actuation_message, '/').value, 0)
+        temp_message = await self.ipc_request({"name": self.room_name, "unit": "cooler", "system": "actuator", "actuation": value})
 
@@ -0,0 +1,188 @@
+import time
+from typing import Dict, Tuple
+
+import aiohttp
+from arrowhead_client import constants
+from arrowhead_client.client.implementations import AsyncClient
+from arrowhead_client.consumer.implementations.aiohttp_consumer import (
+    AiohttpConsumer,
+    WebSocketResponse,
+    http,
+    ws,
+)
+from arrowhead_client.response import Response
+from arrowhead_client.rules import OrchestrationRule
+
+
+class PoolMetrics():
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.total_latency = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'connections_created': self.connections_created,
+            'connections_reused': self.connections_reused,
+            'mean_latency': self.mean_latency,
+        }
+
+
+class ConnectionPool():
+    """
+    Bounded keep-alive connections to one provider, with metrics.
+
+    aiohttp does not pipeline requests, so at most ``limit`` requests to the provider are in flight and
+    each one reuses an idle keep-alive connection when there is one.
+    """
+
+    def __init__(self, authority: str, limit: int, keepalive_timeout: float):
+        self.authority = authority
+        self.metrics = PoolMetrics()
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=limit, keepalive_timeout=keepalive_timeout),
+                trace_configs=[trace_config],
+        )
+
+    async def _on_connection_created(self, session, context, params):
+        self.metrics.connections_created += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self.metrics.connections_reused += 1
+
+    async def request(self, method: str, url: str, **kwargs) -> Tuple[int, bytes]:
+        metrics = self.metrics
+        metrics.requests += 1
+        metrics.in_flight += 1
+        metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        start = time.perf_counter()
+        try:
+            async with self.session.request(method, url, **kwargs) as resp:
+                return resp.status, await resp.read()
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.total_latency += time.perf_counter() - start
+
+    async def close(self):
+        await self.session.close()
+
+
+class ConnectionPools():
+    """
+    One :class:`ConnectionPool` per provider, shared by every consumer in the process that uses it.
+    """
+
+    def __init__(self, limit_per_provider: int = 4, keepalive_timeout: float = 30.0):
+        self.limit_per_provider = limit_per_provider
+        self.keepalive_timeout = keepalive_timeout
+        self.pools: Dict[str, ConnectionPool] = {}
+        self.users = 0
+
+    def pool(self, authority: str) -> ConnectionPool:
+        if authority not in self.pools:
+            self.pools[authority] = ConnectionPool(authority, self.limit_per_provider, self.keepalive_timeout)
+
+        return self.pools[authority]
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        return {authority: pool.metrics.as_dict() for authority, pool in self.pools.items()}
+
+    async def close(self):
+        for pool in self.pools.values():
+            await pool.close()
+        self.pools = {}
+
+
+shared_pools = ConnectionPools()
+
+
+class PooledAiohttpConsumer(AiohttpConsumer, protocol=constants.Protocol.HTTP):
+    """
+    AiohttpConsumer that sends requests through the process-wide connection pools instead of its own session.
+
+    Clients run ``setup`` both when entering ``async with`` and in ``client_setup``, so a consumer counts as
+    one user of the pools however often it is started.
+    """
+    pools = shared_pools
+    started = False
+
+    async def async_startup(self):
+        if self.started:
+            return
+
+        self.started = True
+        self.pools.users += 1
+
+    async def async_shutdown(self):
+        if not self.started:
+            return
+
+        self.started = False
+        self.pools.users -= 1
+        if self.pools.users == 0:
+            await self.pools.close()
+
+    def _headers(self, rule: OrchestrationRule, kwargs: Dict) -> Dict:
+        headers = kwargs.pop('headers', {})
+        if rule.secure:
+            headers = {**headers, 'Authorization': f'Bearer {rule.authorization_token}'}
+
+        return headers
+
+    async def consume_service(  # type: ignore
+            self,
+            rule: OrchestrationRule,
+            **kwargs,
+    ) -> Response:
+        headers = self._headers(rule, kwargs)
+        authority = rule.endpoint.split('/', 1)[0]
+        status_code, raw_response = await self.pools.pool(authority).request(
+                rule.method,
+                f'{http(rule.secure)}{rule.endpoint}',
+                headers=headers,
+                ssl=self.ssl_context,
+                **kwargs,
+        )
+
+        return Response(raw_response, rule.payload_type, status_code)
+
+    async def connect(
+            self,
+            rule: OrchestrationRule,
+            **kwargs,
+    ) -> WebSocketResponse:
+        headers = self._headers(rule, kwargs)
+        authority = rule.endpoint.split('/', 1)[0]
+        connection = await self.pools.pool(authority).session.ws_connect(
+                f'{ws(rule.secure)}{rule.endpoint}',
+                ssl=self.ssl_context,
+                headers=headers,
+                **kwargs,
+        )
+
+        return WebSocketResponse(connection, rule.payload_type)
+
+
+class PooledAsyncClient(AsyncClient):
+    """
+    AsyncClient whose service calls reuse shared keep-alive connections per provider.
+    """
+    __arrowhead_consumer__ = PooledAiohttpConsumer
@@ -0,0 +1,157 @@
+import asyncio
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+def pi_control(
+        k_P: npt.ArrayLike,
+        k_I: npt.ArrayLike,
+        integral: npt.ArrayLike,
+        error: npt.ArrayLike,
+        dt: npt.ArrayLike,
+        low: npt.ArrayLike = -np.inf,
+        high: npt.ArrayLike = np.inf,
+) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    One update of many PI control laws with the arithmetic of ``Controller.control_loop``, returns the new
+    integrals and the outputs.
+
+    The integral is clamped to ``10 * k_P`` in both directions and the output to ``[low, high]``.
+    """
+    integral_limit = 10 * np.asarray(k_P)
+    new_integral = np.clip(np.add(integral, np.multiply(error, dt)), -integral_limit, integral_limit)
+    return new_integral, np.clip(k_P * np.asarray(error) + k_I * new_integral, low, high)
+
+
+class ControllerBank():
+    """
+    Gains, integrals, and output limits of many PI controllers in arrays, one row per controller.
+
+    Every row is updated by :func:`pi_control`, with the output limited to its ``[low, high]``. Requests made
+    through :meth:`control` during the same event loop iteration are computed together in one vectorized
+    :meth:`update`.
+    """
+
+    def __init__(
+            self,
+            k_P: npt.ArrayLike,
+            k_I: npt.ArrayLike,
+            low: npt.ArrayLike = -np.inf,
+            high: npt.ArrayLike = np.inf,
+    ):
+        self.k_P = np.array(k_P, dtype=np.float64, ndmin=1)
+        rows = len(self.k_P)
+        self.k_I = np.broadcast_to(np.asarray(k_I, dtype=np.float64), (rows,)).copy()
+        self.low = np.broadcast_to(np.asarray(low, dtype=np.float64), (rows,)).copy()
+        self.high = np.broadcast_to(np.asarray(high, dtype=np.float64), (rows,)).copy()
+        self.integral = np.zeros(rows)
+        self.control_output = np.zeros(rows)
+        self._pending: List[Tuple[int, float, float, float, asyncio.Future]] = []
+        # Number of vectorized updates, and of rows computed by them
+        self.updates = 0
+        self.rows_updated = 0
+
+    def __len__(self):
+        return len(self.k_P)
+
+    def update(
+            self,
+            rows: npt.NDArray[np.intp],
+            setpoint: npt.ArrayLike,
+            temperature: npt.ArrayLike,
+            dt: npt.ArrayLike,
+    ) -> npt.NDArray[np.float64]:
+        """
+        Advance the controllers of ``rows`` and return their outputs, ``rows`` must not repeat.
+        """
+        self.integral[rows], control = pi_control(
+                self.k_P[rows],
+                self.k_I[rows],
+                self.integral[rows],
+                np.subtract(setpoint, temperature),
+                dt,
+                self.low[rows],
+                self.high[rows],
+        )
+        self.control_output[rows] = control
+        self.updates += 1
+        self.rows_updated += len(rows)
+        return control
+
+    async def control(self, row: int, setpoint: float, temperature: float, dt: float) -> Tuple[float, float]:
+        """
+        Output of the controller of ``row`` and its integral before the update, like ``Controller.control_loop``.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if not self._pending:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._pending.append((row, setpoint, temperature, dt, future))
+        return await future
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        # A row asking twice before a flush is computed in the next flush, so its updates stay in order
+        seen = set()
+        batch = []
+        for request in pending:
+            # A cancelled request leaves its row untouched
+            if request[4].cancelled():
+                continue
+            if request[0] in seen:
+                self._pending.append(request)
+            else:
+                seen.add(request[0])
+                batch.append(request)
+        if self._pending:
+            asyncio.get_running_loop().call_soon(self._flush)
+        if not batch:
+            return
+
+        rows = np.array([request[0] for request in batch], dtype=np.intp)
+        old_integral = self.integral[rows]
+        columns = np.array([request[1:4] for request in batch], dtype=np.float64).T
+        control = self.update(rows, columns[0], columns[1], columns[2])
+        for (_, _, _, _, future), row_control, row_integral in zip(batch, control.tolist(), old_integral.tolist()):
+            future.set_result((row_control, row_integral))
+
+
+class ControllerBankMixin():
+    """
+    Runs the control law of a controller on a shared :class:`ControllerBank` row when one is assigned.
+    """
+    controller_bank: Optional[ControllerBank] = None
+    bank_row = 0
+    # Output limits of the control law, used for the controller's bank row
+    control_limits: Tuple[float, float] = (-np.inf, np.inf)
+
+    async def compute_control(self, dt: float) -> Tuple[float, float]:
+        if self.controller_bank is None:
+            return self.control_loop(dt)  # type: ignore
+
+        return await self.controller_bank.control(self.bank_row, self.setpoint, self.temperature, dt)  # type: ignore
+
+    def restore_integral(self, integral: float):
+        if self.controller_bank is None:
+            self.integral = integral
+        else:
+            self.controller_bank.integral[self.bank_row] = integral
+
+
+def bank_controllers(controllers: Sequence[ControllerBankMixin]) -> ControllerBank:
+    """
+    Move the control law of ``controllers`` to one bank, with a row per controller in the given order.
+    """
+    bank = ControllerBank(
+            [controller.k_P for controller in controllers],  # type: ignore
+            [controller.k_I for controller in controllers],  # type: ignore
+            [controller.control_limits[0] for controller in controllers],
+            [controller.control_limits[1] for controller in controllers],
+    )
+    for row, controller in enumerate(controllers):
+        bank.integral[row] = controller.integral  # type: ignore
+        controller.controller_bank = bank
+        controller.bank_row = row
+
+    return bank
@@ -1,10 +1,204 @@
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
 from ipyc import AsyncIPyCClient, AsyncIPyCLink
 
+if TYPE_CHECKING:
+    # The state plane needs numpy, which devices without one do not import
+    from demo.state_plane import StatePlaneReader
+
+
+class IPyCBatcher():
+    """
+    Coalesces the requests of many devices into batch frames over one ipyc connection.
+
+    Requests made during the same event loop iteration are sent together as one
+    ``{"system": "batch", "messages": [...]}`` frame, and the replies are handed back to each caller.
+    Only one frame is in flight at a time, requests made meanwhile go into the next frame.
+
+    The environment answers a frame in phase order, so a frame of actuations cannot be answered before
+    every sensor of the step has been read. Use one batcher per kind of message, see :class:`IPyCBatchClient`.
+
+    After an I/O error, or a reply that does not answer every message of its frame, later replies can no
+    longer be matched to their requests, so the batcher fails every request it holds, closes the connection,
+    and refuses new requests.
+    """
+
+    def __init__(self, connection: AsyncIPyCLink):
+        self.connection = connection
+        self.closed = False
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def request(self, message: Dict) -> Dict:
+        if self.closed:
+            raise ConnectionError('The ipyc connection of this batcher was closed after an error')
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((message, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+        return await future
+
+    async def _flush(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await self.connection.send({"system": "batch", "messages": [message for message, _ in batch]})
+                reply = await self.connection.receive()
+                if reply is None:
+                    raise ConnectionError('The ipyc connection was closed by the environment')
+                replies = reply["replies"]
+                if len(replies) != len(batch):
+                    raise RuntimeError(f'Batch of {len(batch)} messages was answered with {len(replies)} replies')
+            except Exception as e:
+                await self._close(batch + self._pending, e)
+                return
+
+            for (_, future), message_reply in zip(batch, replies):
+                if not future.done():
+                    future.set_result(message_reply)
+
+    async def _close(self, requests: List[Tuple[Dict, asyncio.Future]], error: Exception):
+        self.closed = True
+        self._pending = []
+        for _, future in requests:
+            if not future.done():
+                future.set_exception(error)
+        if self.connection.is_active():
+            try:
+                await self.connection.close()
+            except OSError:
+                pass
+
+
+class IPyCBatchClient():
+    """
+    Batched ipyc requests for all devices hosted in one process.
+
+    Sensor, actuator, and controller messages each get their own connection and :class:`IPyCBatcher`,
+    so that waiting for one phase of the simulation step never blocks messages of another phase.
+    ``port`` is the ipyc port of the environment, or of the environment shard that simulates the devices' rooms.
+    """
+
+    def __init__(self, port: int = 9999):
+        self.port = port
+        self.clients: Dict[str, AsyncIPyCClient] = {}
+        self.batchers: Dict[str, IPyCBatcher] = {}
+        self._connect_lock = asyncio.Lock()
+
+    async def batcher(self, system: str) -> IPyCBatcher:
+        """
+        Batcher of ``system`` messages, connects a new one if there is none yet or the last one was closed.
+        """
+        async with self._connect_lock:
+            if system not in self.batchers or self.batchers[system].closed:
+                self.clients[system] = AsyncIPyCClient(port=self.port)
+                self.batchers[system] = IPyCBatcher(await self.clients[system].connect())
+
+        return self.batchers[system]
+
+    async def request(self, message: Dict) -> Dict:
+        batcher = self.batchers.get(message["system"])
+        if batcher is None or batcher.closed:
+            batcher = await self.batcher(message["system"])
+        return await batcher.request(message)
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.close()
+
+
+class SetpointSubscription():
+    """
+    Local copy of the setpoints of many rooms, kept up to date by the environment over one ipyc connection.
+
+    The environment sends the current setpoints when the subscription starts and afterwards only the
+    setpoints that changed, so reading a setpoint needs no request. ``room_names`` limits the subscription
+    to some rooms, all rooms are included by default.
+    """
+
+    def __init__(self, port: int = 9999, room_names: Optional[Sequence[str]] = None):
+        self.port = port
+        self.room_names = room_names
+        self.setpoints: Dict[str, float] = {}
+        self.timestep = 0
+        self.updates = 0
+        self._ready = asyncio.Event()
+        self._client: Optional[AsyncIPyCClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def subscribe(self, connection: AsyncIPyCLink):
+        """
+        Subscribe over ``connection`` and keep receiving setpoint changes in the background.
+        """
+        await connection.send({"system": "subscribe", "names": self.room_names})
+        self._task = asyncio.create_task(self._receive(connection))
+
+    async def _receive(self, connection: AsyncIPyCLink):
+        while True:
+            message = await connection.receive()
+            self.setpoints.update(message["setpoints"])
+            self.timestep = message["timestep"]
+            self.updates += 1
+            self._ready.set()
+
+    async def setpoint(self, room_name: str) -> Dict:
+        if self._task is None:
+            async with self._connect_lock:
+                if self._task is None:
+                    self._client = AsyncIPyCClient(port=self.port)
+                    await self.subscribe(await self._client.connect())
+        await self._ready.wait()
+
+        return {"setpoint": self.setpoints[room_name], "timestep": self.timestep}
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self._client is not None:
+            await self._client.close()
+
+
 class IPyCMixin():
     ipyc_client: AsyncIPyCClient
     ipyc_connection: AsyncIPyCLink
+    # Set to share batched connections between the devices of one process
+    ipyc_batch_client: Optional[IPyCBatchClient] = None
+    # Set to read temperatures and setpoints from the environment's shared memory, ipyc then only carries actuations
+    state_plane: Optional['StatePlaneReader'] = None
+    # Timestep of the last temperature read from the state plane, the next read waits for a newer step
+    state_plane_timestep = -1
+    # Set to answer setpoint requests from setpoints pushed by the environment
+    setpoint_subscription: Optional[SetpointSubscription] = None
 
     async def client_setup(self):
         await super().client_setup() # type: ignore
-        self.ipyc_client = AsyncIPyCClient()
-        self.ipyc_connection = await self.ipyc_client.connect()
+        if self.ipyc_batch_client is None:
+            self.ipyc_client = AsyncIPyCClient()
+            self.ipyc_connection = await self.ipyc_client.connect()
+
+    async def ipc_request(self, message: Dict) -> Dict:
+        if self.setpoint_subscription is not None and message["system"] == "controller":
+            return await self.setpoint_subscription.setpoint(message["name"])
+        if self.state_plane is not None and message["system"] in ("sensor", "controller"):
+            return await self.state_plane_request(message)
+        if self.ipyc_batch_client is not None:
+            return await self.ipyc_batch_client.request(message)
+
+        await self.ipyc_connection.send(message)
+        return await self.ipyc_connection.receive()
+
+    async def state_plane_request(self, message: Dict) -> Dict:
+        """
+        Answer a sensor or controller message from the state plane, with the same reply as the environment.
+        """
+        assert self.state_plane is not None
+        if message["system"] == "controller":
+            return await self.state_plane.setpoint(message["name"])
+
+        reply = await self.state_plane.temperature(message["name"], self.state_plane_timestep)
+        self.state_plane_timestep = reply["timestep"]
+        return reply
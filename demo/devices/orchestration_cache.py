@@ -0,0 +1,119 @@
+import asyncio
+import time
+from typing import Dict
+
+import aiohttp
+from arrowhead_client.errors import ArrowheadError
+
+
+class CachedRule():
+    def __init__(self, method: str):
+        self.method = method
+        self.expires_at = 0.0
+        self.ready = asyncio.Event()
+        self.stale = asyncio.Event()
+        self.backoff = 0.0
+
+
+class OrchestrationCache():
+    """
+    Keeps the orchestration rules of a client resolved, refreshing them in the background.
+
+    A rule is refreshed ``ttl`` seconds after it was resolved, while the old rule stays in use.
+    Invalidated rules are removed immediately and consumers wait in :meth:`ready` until a background
+    refresh succeeds. Failed refreshes, and refreshes after an invalidation, wait with exponential backoff
+    between ``min_backoff`` and ``max_backoff`` seconds. The backoff only resets once a consumer reports
+    through :meth:`confirm` that the rule worked, so a provider that is down but still registered does not
+    make the consumer and the orchestrator resolve the same rule in a tight loop.
+    """
+
+    def __init__(self, client, ttl: float = 60.0, min_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.client = client
+        self.ttl = ttl
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.rules: Dict[str, CachedRule] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, services: Dict[str, str]):
+        """
+        Start resolving ``services``, a mapping from service definition to method, in the background.
+        """
+        for service_definition, method in services.items():
+            self.rules[service_definition] = CachedRule(method)
+            self._refresh_tasks[service_definition] = asyncio.create_task(self._refresh_loop(service_definition))
+
+    async def stop(self):
+        for task in self._refresh_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._refresh_tasks.values(), return_exceptions=True)
+
+    async def ready(self, service_definition: str):
+        await self.rules[service_definition].ready.wait()
+
+    def confirm(self, service_definition: str):
+        """
+        Report that the rule for ``service_definition`` reached its provider.
+        """
+        self.rules[service_definition].backoff = 0.0
+
+    def invalidate(self, service_definition: str):
+        """
+        Drop the rule for ``service_definition``, e.g. after a connection error or an event handler notification.
+        """
+        cached = self.rules[service_definition]
+        self.client.orchestration_rules.pop(service_definition, None)
+        cached.ready.clear()
+        cached.stale.set()
+
+    async def _resolve(self, service_definition: str) -> bool:
+        # The old rule stays in use while the orchestrator is asked and is only replaced by a new rule,
+        # invalidate is the only way a rule is removed
+        old_rule = self.client.orchestration_rules.get(service_definition)
+        try:
+            await self.client.add_orchestration_rule(service_definition, self.rules[service_definition].method)
+        except (ArrowheadError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f'Orchestration of service "{service_definition}" failed: {e}')
+        new_rule = self.client.orchestration_rules.get(service_definition)
+
+        return new_rule is not None and new_rule is not old_rule
+
+    def _increase_backoff(self, cached: CachedRule):
+        cached.backoff = min(self.max_backoff, max(self.min_backoff, 2 * cached.backoff))
+
+    async def _refresh_loop(self, service_definition: str):
+        cached = self.rules[service_definition]
+        while True:
+            if await self._resolve(service_definition):
+                cached.expires_at = time.monotonic() + self.ttl
+                cached.stale.clear()
+                cached.ready.set()
+                try:
+                    await asyncio.wait_for(cached.stale.wait(), timeout=self.ttl)
+                except asyncio.TimeoutError:
+                    continue
+            # Failed, or invalidated before a consumer confirmed that the rule works
+            self._increase_backoff(cached)
+            await asyncio.sleep(cached.backoff)
+
+
+class OrchestrationCacheMixin():
+    orchestration_cache: OrchestrationCache
+
+    def start_orchestration_cache(self, services: Dict[str, str], ttl: float = 60.0):
+        self.orchestration_cache = OrchestrationCache(self, ttl=ttl)
+        self.orchestration_cache.start(services)
+
+    async def consume_cached(self, service_definition: str, **kwargs):
+        """
+        Consume ``service_definition`` with the cached rule, invalidating it if the provider cannot be reached.
+        """
+        await self.orchestration_cache.ready(service_definition)
+        try:
+            response = await self.consume_service(service_definition, **kwargs) # type: ignore
+        except aiohttp.ClientConnectionError:
+            self.orchestration_cache.invalidate(service_definition)
+            raise
+
+        self.orchestration_cache.confirm(service_definition)
+        return response
@@ -0,0 +1,158 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+from demo.devices.senml import Message, decode
+
+
+class Deadband():
+    """
+    Decides which readings are worth publishing.
+
+    A reading is published when it differs by at least ``threshold`` from the last published one, or when
+    ``max_interval`` steps have passed without one, so subscribers still hear from a sensor in a stable room.
+    """
+
+    def __init__(self, threshold: float = 0.05, max_interval: int = 60):
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.value: Optional[float] = None
+        self.timestep = 0
+
+    def update(self, value: float, timestep: int) -> bool:
+        if (
+                self.value is not None
+                and abs(value - self.value) < self.threshold
+                and timestep - self.timestep < self.max_interval
+        ):
+            return False
+
+        self.value = value
+        self.timestep = timestep
+        return True
+
+
+class Mailbox():
+    """
+    Latest message of one topic for one subscriber, a newer message replaces one that was not received yet.
+    """
+
+    def __init__(self):
+        self.message: Optional[Message] = None
+        self.received = 0
+        self.replaced = 0
+        self._ready = asyncio.Event()
+
+    def put(self, message: Message):
+        if self._ready.is_set():
+            self.replaced += 1
+        self.message = message
+        self._ready.set()
+
+    async def get(self) -> Message:
+        await self._ready.wait()
+        self._ready.clear()
+        self.received += 1
+        return self.message  # type: ignore
+
+
+class LocalBroker():
+    """
+    In-process stand-in for the event handler, sensors publish readings by topic and controllers subscribe to them.
+
+    Subscribers that fall behind only get the latest message of their topic.
+    """
+
+    def __init__(self):
+        self.mailboxes: Dict[str, List[Mailbox]] = {}
+        self.published = 0
+
+    def publish(self, topic: str, message: Message) -> bool:
+        """
+        Hand ``message`` to every subscriber of ``topic``, returns whether there was any.
+        """
+        self.published += 1
+        mailboxes = self.mailboxes.get(topic, ())
+        for mailbox in mailboxes:
+            mailbox.put(message)
+
+        return bool(mailboxes)
+
+    async def subscribe(self, topic: str) -> AsyncIterator[Message]:
+        mailbox = Mailbox()
+        self.mailboxes.setdefault(topic, []).append(mailbox)
+        try:
+            while True:
+                yield await mailbox.get()
+        finally:
+            self.mailboxes[topic].remove(mailbox)
+
+
+def reading_topic(room_name: str, unit: str) -> str:
+    return f'temperature/{room_name}/{unit}'
+
+
+def held_reading_topic(room_name: str, unit: str) -> str:
+    # Readings that no controller got, because of the deadband or because no controller subscribed
+    return f'temperature/{room_name}/{unit}/held'
+
+
+class PublishMixin():
+    """
+    Publish mode of the devices: sensors push readings to :attr:`reading_broker` instead of waiting to be polled,
+    controllers react to them, and actuators ask the environment to hold their actuation for the steps in between.
+
+    Every step gets exactly one actuator message per room and unit, either the actuation computed from the
+    step's reading, sent like in polling mode, or a hold message when the reading was held back, so an
+    actuation is applied at the same step in both modes.
+    """
+    reading_broker: Optional[LocalBroker] = None
+    deadband: Optional[Deadband] = None
+
+    async def publish_readings(self, unit: str):
+        """
+        Read the temperature every step and publish the readings that pass the deadband, the others are
+        published to the held reading topic of the actuator.
+        """
+        assert self.reading_broker is not None
+        deadband = self.deadband or Deadband()
+        topic = reading_topic(self.room_name, unit)  # type: ignore
+        held_topic = held_reading_topic(self.room_name, unit)  # type: ignore
+        template = self.temperature_template  # type: ignore
+        while True:
+            message = await self.read_message()  # type: ignore
+            reading = decode(message, template.unit)
+            if not (deadband.update(reading.value, int(reading.time)) and self.reading_broker.publish(topic, message)):
+                self.reading_broker.publish(held_topic, message)
+
+    async def hold_actuation(self, unit: str):
+        """
+        Ask the environment to keep the last actuation for every step whose reading was held back.
+        """
+        assert self.reading_broker is not None
+        async for _ in self.reading_broker.subscribe(held_reading_topic(self.room_name, unit)):  # type: ignore
+            await self.ipc_request({  # type: ignore
+                "name": self.room_name,  # type: ignore
+                "unit": unit,
+                "system": "actuator",
+                "actuation": None,
+            })
+
+    async def react_to_readings(self, unit: str, step_dt: float = 10.0):
+        """
+        Control loop of publish mode, one control update and actuation per published reading.
+
+        The integral advances by the simulated time since the previous reading, which spans several
+        steps when the sensor held back readings inside its deadband.
+        """
+        assert self.reading_broker is not None
+        # Timestep of the previous reading, None until the first one
+        previous_timestep: Optional[int] = None
+        async for message in self.reading_broker.subscribe(reading_topic(self.room_name, unit)):  # type: ignore
+            self.setpoint, _ = await self.get_setpoint()  # type: ignore
+            old_control = self.control  # type: ignore
+            temperature, timestep = self.read_temperature(message)  # type: ignore
+            dt = step_dt if previous_timestep is None else step_dt * max(1, timestep - previous_timestep)
+            self.temperature, self.timestep = temperature, timestep
+            previous_timestep = timestep
+            self.control, old_integral = await self.compute_control(dt)  # type: ignore
+            await self.actuate(self.control_message(), old_control, old_integral)  # type: ignore
@@ -0,0 +1,133 @@
+"""
+SenML (RFC 8428) messages exchanged by the A and B device flavors.
+
+The A devices send one flat record, ``[{"n", "t", "u", "v"}]``. The B devices send a base record
+followed by their coordinates and the measurement, ``[{"bn", "bt"}, Lon, Lat, {"u", "v"}]``.
+"""
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import cbor2  # type: ignore
+except ImportError:  # CBOR encoding is optional
+    cbor2 = None
+
+Record = Dict[str, Any]
+Message = List[Record]
+
+# Integer labels used instead of field names in CBOR encoded SenML, other fields keep their names
+CBOR_LABELS = {
+    'bver': -1, 'bn': -2, 'bt': -3, 'bu': -4, 'bv': -5, 'bs': -6,
+    'n': 0, 'u': 1, 'v': 2, 'vs': 3, 'vb': 4, 's': 5, 't': 6, 'ut': 7, 'vd': 8,
+}
+CBOR_NAMES = {label: name for name, label in CBOR_LABELS.items()}
+
+
+class Reading(NamedTuple):
+    name: str
+    time: float
+    value: float
+    longitude: Optional[float] = None
+    latitude: Optional[float] = None
+
+
+class RecordTemplate():
+    """
+    Pre-built message layout for one device, only the time and value change between messages.
+
+    Without ``coordinate`` messages have the flat A layout, with it they have the B layout. Every
+    message is built from new records, so consumers may modify the messages they receive.
+    """
+    __slots__ = ('name', 'unit', 'coordinate')
+
+    def __init__(self, name: str, unit: str, coordinate: Optional[Tuple[float, float]] = None):
+        self.name = name
+        self.unit = unit
+        self.coordinate = coordinate
+
+    def encode(self, time: float, value: float) -> Message:
+        if self.coordinate is None:
+            return [{'n': self.name, 't': time, 'u': self.unit, 'v': value}]
+
+        longitude, latitude = self.coordinate
+        return [
+            {'bn': self.name, 'bt': time},
+            {'u': 'Lon', 'v': longitude},
+            {'u': 'Lat', 'v': latitude},
+            {'u': self.unit, 'v': value},
+        ]
+
+
+def resolve(message: Message) -> List[Record]:
+    """
+    Resolve base fields into every record with a value, as described in RFC 8428 section 4.6.
+    """
+    base_name = ''
+    base_time = 0.0
+    resolved = []
+    for record in message:
+        base_name = record.get('bn', base_name)
+        base_time = record.get('bt', base_time)
+        if 'v' in record:
+            resolved.append({
+                'n': base_name + record.get('n', ''),
+                't': base_time + record.get('t', 0.0),
+                'u': record.get('u', ''),
+                'v': record['v'],
+            })
+
+    return resolved
+
+
+def decode(message: Message, unit: str) -> Reading:
+    """
+    Read the measurement with ``unit`` from ``message``.
+
+    Messages laid out like :class:`RecordTemplate` output are read by position, anything else
+    is resolved and searched. Raises :class:`ValueError` if there is no such measurement.
+    """
+    if len(message) == 1:
+        record = message[0]
+        if record.get('u') == unit and 'n' in record:
+            return Reading(record['n'], record.get('t', 0.0), record['v'])
+    elif len(message) == 4:
+        base, longitude, latitude, record = message
+        if record.get('u') == unit and longitude.get('u') == 'Lon' and latitude.get('u') == 'Lat' and 'bn' in base:
+            return Reading(base['bn'], base.get('bt', 0.0), record['v'], longitude['v'], latitude['v'])
+
+    location: Dict[str, float] = {}
+    measurement = None
+    for record in resolve(message):
+        if record['u'] in ('Lon', 'Lat'):
+            location[record['u']] = record['v']
+        elif record['u'] == unit and measurement is None:
+            measurement = record
+    if measurement is None:
+        raise ValueError(f'Message {message} does not contain a measurement in {unit}')
+
+    return Reading(measurement['n'], measurement['t'], measurement['v'], location.get('Lon'), location.get('Lat'))
+
+
+def dumps(message: Message, content_format: str = 'json') -> bytes:
+    """
+    Serialize ``message`` as ``'json'`` or as ``'cbor'``, which needs the cbor2 package.
+    """
+    if content_format == 'json':
+        return json.dumps(message, separators=(',', ':')).encode()
+    if content_format == 'cbor':
+        if cbor2 is None:
+            raise RuntimeError('CBOR encoding requires the cbor2 package')
+        return cbor2.dumps([{CBOR_LABELS.get(key, key): value for key, value in record.items()} for record in message])
+
+    raise ValueError(f'Unknown SenML content format "{content_format}"')
+
+
+def loads(payload: bytes, content_format: str = 'json') -> Message:
+    if content_format == 'json':
+        return json.loads(payload)
+    if content_format == 'cbor':
+        if cbor2 is None:
+            raise RuntimeError('CBOR decoding requires the cbor2 package')
+        return [{CBOR_NAMES.get(label, label): value for label, value in record.items()} for record in cbor2.loads(payload)]
+
+    raise ValueError(f'Unknown SenML content format "{content_format}"')
@@ -0,0 +1,219 @@
+"""
+Headless simulation, the environment runs the room controllers itself instead of talking to device processes.
+
+    python -m demo.headless [--topology building.toml] [--scenarios scenarios.json] [--steps N]
+"""
+import json
+from pathlib import Path
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TypedDict, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from demo.devices.controller_bank import pi_control
+from demo.integrators import INTEGRATORS
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.recorder import make_sink
+from demo.topology import BuildingTopology, load_topology
+
+# Same as the heater and cooler devices
+MAX_POWER = 1500.0
+# Rooms within this many Kelvin of their setpoint are comfortable
+COMFORT_BAND = 1.0
+DAY = 86400.0
+
+# Either a constant, or a daily profile of equally long periods starting at midnight
+Profile = Union[float, Sequence[float]]
+
+
+class Scenario(TypedDict, total=False):
+    name: str
+    outside_temperature: Profile
+    setpoint: Profile
+    initial_temperature: float
+    heater_k_P: float
+    heater_k_I: float
+    cooler_k_P: float
+    cooler_k_I: float
+
+
+DEFAULT_SCENARIO: Scenario = {
+    'name': 'default',
+    'outside_temperature': 25.0,
+    'setpoint': 298.0,
+    'heater_k_P': 40.0,
+    'heater_k_I': 1.0,
+    'cooler_k_P': 0.1,
+    'cooler_k_I': 0.01,
+}
+
+
+def profile_values(profile: Profile, steps: int, dt: float) -> npt.NDArray[np.float64]:
+    """
+    Value of ``profile`` at the start of each of ``steps`` steps.
+    """
+    values = np.atleast_1d(np.asarray(profile, dtype=np.float64))
+    times = np.arange(steps) * dt
+    return values[(times * len(values) / DAY).astype(int) % len(values)]
+
+
+class PIControllers:
+    """
+    One PI controller per room, updated together by :func:`pi_control`.
+    """
+
+    def __init__(
+            self,
+            num_rooms: int,
+            k_P: npt.ArrayLike,
+            k_I: npt.ArrayLike,
+            low: float = -np.inf,
+            high: float = np.inf,
+    ):
+        self.k_P = np.broadcast_to(np.asarray(k_P, dtype=np.float64), (num_rooms,))
+        self.k_I = np.broadcast_to(np.asarray(k_I, dtype=np.float64), (num_rooms,))
+        self.low = low
+        self.high = high
+        self.integral = np.zeros(num_rooms)
+
+    def update(self, setpoint: npt.ArrayLike, temperature: npt.ArrayLike, dt: float) -> npt.NDArray[np.float64]:
+        self.integral, control = pi_control(
+                self.k_P,
+                self.k_I,
+                self.integral,
+                np.subtract(setpoint, temperature),
+                dt,
+                self.low,
+                self.high,
+        )
+        return control
+
+
+class HeadlessEngine:
+    """
+    Steps an environment with in-process heater and cooler controllers for every room.
+
+    Heaters mirror the A devices, whose output is power in watts limited to ``[0, max_power]``.
+    Coolers mirror the B devices, whose output in ``[-1, 1]`` is scaled to ``max_power`` when negative.
+    A room is cooled whenever its cooler is on, and heated otherwise.
+    """
+
+    def __init__(self, env: ArrowheadEnvironment, max_power: float = MAX_POWER):
+        self.env = env
+        self.max_power = max_power
+        model = env.thermal_model
+        self.room_index = np.array([model.index[room_name] for room_name in env.room_names])
+        self.initial_temperatures = model.temperatures.copy()
+        self.power = np.zeros(len(model))
+        self.heaters: PIControllers
+        self.coolers: PIControllers
+        self.reset(DEFAULT_SCENARIO)
+
+    def reset(self, scenario: Scenario):
+        """
+        Restore the initial temperatures, clear the controllers and the integrator, and apply the gains of ``scenario``.
+        """
+        scenario = {**DEFAULT_SCENARIO, **scenario}  # type: ignore
+        self.env.thermal_model.integrator.reset()
+        temperatures = self.env.thermal_model.temperatures
+        temperatures[:] = self.initial_temperatures
+        if 'initial_temperature' in scenario:
+            # Every room but the outside, including the ghost rooms of a shard
+            temperatures[1:] = scenario['initial_temperature']
+        num_rooms = len(self.room_index)
+        self.heaters = PIControllers(num_rooms, scenario['heater_k_P'], scenario['heater_k_I'])
+        self.coolers = PIControllers(num_rooms, scenario['cooler_k_P'], scenario['cooler_k_I'], low=-1.0, high=1.0)
+        self.env.timestep = 0
+
+    def advance(self, dt: float, outside_temperature: float, setpoints: npt.ArrayLike):
+        """
+        Run every controller on the current temperatures and advance the environment one step.
+        """
+        temperatures = self.env.thermal_model.temperatures[self.room_index]
+        heating = np.clip(self.heaters.update(setpoints, temperatures, dt), 0.0, self.max_power)
+        cooling = self.max_power * np.minimum(self.coolers.update(setpoints, temperatures, dt), 0.0)
+        self.power[self.room_index] = np.where(cooling < 0.0, cooling, heating)
+        self.env.advance(dt, outside_temperature, self.power, setpoints)
+
+    def run(self, scenario: Scenario, steps: int, dt: float = 10.0) -> Dict[str, float]:
+        """
+        Run ``scenario`` for ``steps`` steps and summarize how well the rooms tracked the setpoint.
+
+        ``discomfort`` is the mean number of Kelvin hours a room spent outside :data:`COMFORT_BAND`
+        of its setpoint and ``energy`` is the heating and cooling energy of all rooms in Joule.
+        """
+        scenario = {**DEFAULT_SCENARIO, **scenario}  # type: ignore
+        self.reset(scenario)
+        setpoint_profile = profile_values(scenario['setpoint'], steps, dt)
+        outside_profile = profile_values(scenario['outside_temperature'], steps, dt)
+        temperatures = self.env.thermal_model.temperatures
+        squared_error = 0.0
+        discomfort = 0.0
+        energy = 0.0
+        for setpoint, outside_temperature in zip(setpoint_profile, outside_profile):
+            self.advance(dt, outside_temperature, setpoint)
+            error = np.abs(temperatures[self.room_index] - setpoint)
+            squared_error += float(np.mean(error ** 2))
+            discomfort += float(np.mean(np.maximum(error - COMFORT_BAND, 0.0))) * dt / 3600
+            energy += float(np.abs(self.power).sum()) * dt
+
+        return {
+            'rms_error': (squared_error / max(steps, 1)) ** 0.5,
+            'discomfort': discomfort,
+            'mean_temperature': float(temperatures[self.room_index].mean()),
+            'energy': energy,
+        }
+
+
+def run_scenarios(
+        scenarios: Iterable[Scenario],
+        steps: int,
+        dt: float = 10.0,
+        topology: Optional[BuildingTopology] = None,
+        record: Optional[str] = None,
+        integrator: str = 'euler',
+) -> Iterator[Dict]:
+    """
+    Run ``scenarios`` back to back on one environment, yielding the summary of each one.
+
+    With ``record``, every scenario is recorded to ``record/<name>``.
+    """
+    engine = HeadlessEngine(ArrowheadEnvironment(topology, verbose=False, integrator=integrator))
+    for i, scenario in enumerate(scenarios):
+        name = scenario.get('name', str(i))
+        if record:
+            engine.env.start_recording(make_sink(Path(record) / name))
+        start = time.perf_counter()
+        try:
+            summary = engine.run(scenario, steps, dt)
+        finally:
+            engine.env.stop_recording()
+        yield {'name': name, **summary, 'seconds': time.perf_counter() - start}
+
+
+def load_scenarios(path: str) -> List[Scenario]:
+    with open(path, 'r') as scenario_file:
+        return json.load(scenario_file)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--topology', help='JSON or TOML building topology, defaults to the Lübeck A-building')
+    parser.add_argument('--scenarios', help='JSON list of scenarios, defaults to one default scenario')
+    parser.add_argument('--steps', type=int, default=8640, help='Steps per scenario')
+    parser.add_argument('--dt', type=float, default=10.0, help='Simulated seconds per step')
+    parser.add_argument('--record', help='Directory to record every scenario to')
+    parser.add_argument('--integrator', choices=tuple(INTEGRATORS), default='euler')
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else [DEFAULT_SCENARIO]
+    topology = load_topology(args.topology) if args.topology else None
+    for summary in run_scenarios(scenarios, args.steps, args.dt, topology, args.record, args.integrator):
+        print(json.dumps(summary))
+
+
+if __name__ == '__main__':
+    main()
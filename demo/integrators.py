@@ -0,0 +1,194 @@
+"""
+Time integrators for :class:`demo.thermal.ThermalModel`.
+
+Within a step the power of every room is held constant, so the temperatures follow the linear system
+``dT/dt = P / C - coefficient * L @ T`` where ``L`` is the Laplacian of the building's conductance matrix.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from scipy import linalg as dense_linalg
+from scipy import sparse
+from scipy.sparse import linalg
+
+
+class Integrator(ABC):
+    """
+    Advances the temperatures of a thermal model in place by one step of length ``dt``.
+    """
+
+    @abstractmethod
+    def step(self, model, dt: float, coefficient: float, power: npt.ArrayLike) -> None:
+        pass
+
+    def reset(self):
+        """
+        Forget everything carried over from earlier steps, so the next step runs as on a new integrator.
+
+        Caches that only depend on the model, step length, and coefficient give the same result either way
+        and are kept.
+        """
+        pass
+
+
+class ExplicitEuler(Integrator):
+    """
+    First order and cheap, but only stable while ``dt * coefficient`` is small compared to the conductances.
+    """
+
+    def step(self, model, dt: float, coefficient: float, power: npt.ArrayLike) -> None:
+        model.temperatures += dt * model.derivative(model.temperatures, coefficient, power)
+
+
+class RungeKutta4(Integrator):
+    """
+    Classic fourth order Runge-Kutta, four derivative evaluations per step.
+    """
+
+    def step(self, model, dt: float, coefficient: float, power: npt.ArrayLike) -> None:
+        temperatures = model.temperatures
+        k1 = model.derivative(temperatures, coefficient, power)
+        k2 = model.derivative(temperatures + 0.5 * dt * k1, coefficient, power)
+        k3 = model.derivative(temperatures + 0.5 * dt * k2, coefficient, power)
+        k4 = model.derivative(temperatures + dt * k3, coefficient, power)
+        temperatures += dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+class BackwardEuler(Integrator):
+    """
+    Implicit Euler, stable for any step length.
+
+    Solves ``(I + dt * coefficient * L) T' = T + dt * P / C`` with a sparse LU factorization that is
+    computed once per step length and coefficient, and reused by every following step. An instance
+    caches the factorizations of one model, so models cannot share it.
+    """
+
+    def __init__(self):
+        self._factorizations: Dict[Tuple[float, float], linalg.SuperLU] = {}
+
+    def factorization(self, model, dt: float, coefficient: float) -> linalg.SuperLU:
+        key = (dt, coefficient)
+        if key not in self._factorizations:
+            system = sparse.identity(len(model), format='csc') + dt * coefficient * model.laplacian
+            self._factorizations[key] = linalg.splu(sparse.csc_matrix(system))
+
+        return self._factorizations[key]
+
+    def step(self, model, dt: float, coefficient: float, power: npt.ArrayLike) -> None:
+        rhs = model.temperatures + dt * model.inverse_capacity * power
+        model.temperatures[:] = self.factorization(model, dt, coefficient).solve(rhs)
+
+
+class Adaptive(Integrator):
+    """
+    Embedded Bogacki-Shampine 3(2) pair that splits each step into as many substeps as the error tolerance needs.
+
+    The substep length is carried over between steps, and ``substeps`` counts every accepted substep.
+    """
+
+    def __init__(self, rtol: float = 1e-6, atol: float = 1e-6, safety: float = 0.9, max_substeps: int = 100_000):
+        self.rtol = rtol
+        self.atol = atol
+        self.safety = safety
+        self.max_substeps = max_substeps
+        self.substep: Optional[float] = None
+        self.substeps = 0
+
+    def step(self, model, dt: float, coefficient: float, power: npt.ArrayLike) -> None:
+        temperatures = model.temperatures.copy()
+        k1 = model.derivative(temperatures, coefficient, power)
+        h = min(self.substep or dt, dt)
+        elapsed = 0.0
+        substeps = 0
+        while elapsed < dt:
+            if substeps >= self.max_substeps:
+                raise RuntimeError(f'Adaptive integrator needed more than {self.max_substeps} substeps for {dt = }')
+            h = min(h, dt - elapsed)
+            k2 = model.derivative(temperatures + 0.5 * h * k1, coefficient, power)
+            k3 = model.derivative(temperatures + 0.75 * h * k2, coefficient, power)
+            candidate = temperatures + h * (2 / 9 * k1 + 1 / 3 * k2 + 4 / 9 * k3)
+            k4 = model.derivative(candidate, coefficient, power)
+            error = h * (-5 / 72 * k1 + 1 / 12 * k2 + 1 / 9 * k3 - 1 / 8 * k4)
+            scale = self.atol + self.rtol * np.maximum(np.abs(temperatures), np.abs(candidate))
+            error_norm = float(np.max(np.abs(error) / scale))
+            if error_norm <= 1.0:
+                elapsed += h
+                temperatures = candidate
+                # First same as last, k4 is the derivative at the start of the next substep
+                k1 = k4
+                substeps += 1
+            growth = 5.0 if error_norm == 0.0 else self.safety * error_norm ** (-1 / 3)
+            h *= min(5.0, max(0.2, growth))
+
+        model.temperatures[:] = temperatures
+        self.substep = h
+        self.substeps += substeps
+
+    def reset(self):
+        self.substep = None
+        self.substeps = 0
+
+
+class Exact(Integrator):
+    """
+    Zero-order hold discretization, exact for any step length because power is constant within a step.
+
+    For every step length and coefficient the state transition ``expm(A dt)`` and the input matrix
+    ``integral(expm(A s) ds) / C`` are computed once from the exponential of the augmented system
+    ``[[A, 1 / C], [0, 0]]``, after which a step is two dense matrix-vector products. The dense matrices
+    grow with the square of the number of rooms, so models with more than ``max_dense`` rooms instead
+    apply the exponential of the sparse augmented system to the state every step.
+    An instance caches the propagators of one model, so models cannot share it.
+    """
+
+    def __init__(self, max_dense: int = 2000):
+        self.max_dense = max_dense
+        self._propagators: Dict[Tuple[float, float], Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]] = {}
+
+    def propagator(
+            self,
+            model,
+            dt: float,
+            coefficient: float,
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        key = (dt, coefficient)
+        if key not in self._propagators:
+            n = len(model)
+            augmented = np.zeros((2 * n, 2 * n))
+            augmented[:n, :n] = -coefficient * model.laplacian.toarray()
+            augmented[:n, n:] = np.diag(model.inverse_capacity)
+            exponential = dense_linalg.expm(dt * augmented)
+            self._propagators[key] = (exponential[:n, :n].copy(), exponential[:n, n:].copy())
+
+        return self._propagators[key]
+
+    def step(self, model, dt: float, coefficient: float, power: npt.ArrayLike) -> None:
+        if len(model) > self.max_dense:
+            augmented = sparse.bmat([
+                [-coefficient * model.laplacian, sparse.csr_matrix(model.inverse_capacity * power).T],
+                [None, sparse.csr_matrix((1, 1))],
+            ], format='csr')
+            state = linalg.expm_multiply(dt * augmented, np.append(model.temperatures, 1.0))
+            model.temperatures[:] = state[:-1]
+            return
+
+        transition, input_matrix = self.propagator(model, dt, coefficient)
+        model.temperatures[:] = transition @ model.temperatures + input_matrix @ power
+
+
+INTEGRATORS = {
+    'euler': ExplicitEuler,
+    'rk4': RungeKutta4,
+    'implicit': BackwardEuler,
+    'adaptive': Adaptive,
+    'exact': Exact,
+}
+
+
+def make_integrator(name: str) -> Integrator:
+    if name not in INTEGRATORS:
+        raise ValueError(f'Unknown integrator "{name}", expected one of {", ".join(INTEGRATORS)}')
+
+    return INTEGRATORS[name]()
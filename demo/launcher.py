@@ -0,0 +1,45 @@
+"""
+Starts device processes from a forkserver that has already imported the device modules.
+
+Importing arrowhead_client pulls in aiohttp, fastapi, and flask, which costs every spawned device process
+about half a second before it does any work. Processes started through :func:`start_processes` are forked
+from one server process that paid that cost once, so only the module of the target is imported per device.
+"""
+import multiprocessing
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Modules imported once by the forkserver, and inherited by every device process forked from it
+DEVICE_MODULES = ('demo.devices.arrowhead_a_devices', 'demo.devices.arrowhead_b_devices')
+
+
+def device_context(preload: Sequence[str] = DEVICE_MODULES) -> BaseContext:
+    """
+    Multiprocessing context whose processes fork from a server that imported ``preload``.
+
+    Falls back to spawn on platforms without forkserver. The preload only applies if the forkserver of
+    this interpreter has not been started yet.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(list(preload))
+    return context
+
+
+def start_processes(
+        targets: Sequence[Tuple[Callable[..., Any], Tuple]],
+        context: Optional[BaseContext] = None,
+        name: str = 'process',
+) -> List[multiprocessing.Process]:
+    """
+    Start a process for every ``(target, args)`` pair, with :func:`device_context` unless another is given.
+    """
+    context = context or device_context()
+    processes = [context.Process(target=target, args=args) for target, args in targets]  # type: ignore
+    for process in processes:
+        process.start()
+        print(f'Started {name} with {process.pid = }')
+
+    return processes
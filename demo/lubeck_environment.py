@@ -1,8 +1,9 @@
 import asyncio
 import random
-from typing import Dict, Mapping, TypedDict, cast
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple, cast
 from functools import partial
 import sys
+import time
 from pprint import pprint
 
 from ipyc import AsyncIPyCHost, AsyncIPyCLink
@@ -11,22 +12,24 @@ from numpy.random import RandomState
 import numpy.typing as npt
 
 #import environment
-from room import Room
+from demo.barrier import DeadlineMetrics, PhaseGate, StepBarrier
+from demo.integrators import INTEGRATORS, make_integrator
+from demo.pacing import AsFastAsPossible, StepPolicy, make_policy
+from demo.recorder import RecordingSink, StepRecorder, make_sink
+from demo.room import Room
+from demo.state_plane import StatePlane
+from demo.thermal import ThermalModel
+from demo.topology import BuildingTopology, load_topology, lubeck_topology
 from demo.utils import ROOM_NAMES, ROOM_COORDINATES
 
 
-class RoomBoolPair(TypedDict):
-    heater: bool
-    cooler: bool
-
-
-def cleared_room_bool_pair() -> RoomBoolPair:
-    return {'heater': False, 'cooler': False}
-
-
-def cleared_update_dict() -> Dict[str, RoomBoolPair]:
-    return {room_name: cleared_room_bool_pair() for room_name in ROOM_NAMES}
-
+# Order in which the messages of a batch are answered, the same order as the phases of a step
+BATCH_ORDER = ("sensor", "controller", "actuator")
+# Default scale factor of the conductances between rooms
+CONDUCTANCE_COEFFICIENT = 1e-4
+# What happens to the power of an actuator that missed the step deadline, keep its last actuation, turn it off,
+# or keep its last actuation and flag the room as stale in the sensor replies and the recording
+MISSING_POLICIES = ("hold", "zero", "stale")
 
 
 class ArrowheadEnvironment():
@@ -36,18 +39,53 @@ class ArrowheadEnvironment():
     room_coordinates = ROOM_COORDINATES
     outside: Room
     rooms: Dict[str, Room]
+    topology: BuildingTopology
+    thermal_model: ThermalModel
+    recorder: Optional[StepRecorder] = None
+    state_plane: Optional[StatePlane] = None
 
-    def __init__(self):
+    def __init__(
+            self,
+            topology: Optional[BuildingTopology] = None,
+            verbose: bool = True,
+            coefficient: float = CONDUCTANCE_COEFFICIENT,
+            integrator: str = 'euler',
+            step_deadline: Optional[float] = None,
+            missing_policy: str = 'hold',
+    ):
+        if missing_policy not in MISSING_POLICIES:
+            raise ValueError(
+                    f'Unknown missing device policy "{missing_policy}", expected one of {", ".join(MISSING_POLICIES)}'
+            )
+        self.topology = topology or lubeck_topology()
+        # Print room temperatures and heat output every step
+        self.verbose = verbose
+        self.coefficient = coefficient
+        self.room_names = self.topology.room_names
         self.room_init()
+        self.thermal_model = ThermalModel.from_rooms(
+                self.rooms,
+                self.topology.adjacency,
+                integrator=make_integrator(integrator),
+        )
         self.timestep = 0
         self._started = False
         self.heating_power = {room_name: 0.0 for room_name in self.room_names}
         self.cooling_power = {room_name: 0.0 for room_name in self.room_names}
         self.setpoints = {room_name: 293.15 for room_name in self.room_names}
-        self.actuation_updated: Dict[str, RoomBoolPair] = cleared_update_dict()
-        self.temperatures_read: Dict[str, RoomBoolPair] = cleared_update_dict()
-        self.temperatures_updated: Dict[str, RoomBoolPair] = cleared_update_dict()
-        self.setpoints_updated: Dict[str, RoomBoolPair] = cleared_update_dict()
+        # Rooms and change queue of every setpoint subscription
+        self.setpoint_subscribers: List[Tuple[FrozenSet[str], asyncio.Queue]] = []
+        # Sensors that have read, and actuators that have sent their actuation, during the current step
+        self.temperatures_read = StepBarrier(self.room_names)
+        self.temperatures_updated = StepBarrier(self.room_names)
+        # Seconds each phase of a step waits for its devices, forever if None
+        self.step_deadline = step_deadline
+        self.missing_policy = missing_policy
+        self.deadline_metrics = DeadlineMetrics()
+        # Units of every room whose power is kept from an earlier step, with the stale policy
+        self.stale_units: Dict[str, Set[str]] = {}
+        # Seconds spent in each part of the last step
+        self.step_timings: Dict[str, float] = {}
 
         #@self.ipc_host.on_connect
     async def on_connect(self, connection: AsyncIPyCLink):
@@ -55,39 +93,128 @@ class ArrowheadEnvironment():
         while connection.is_active():
             message = await connection.receive()
             try:
-                if message.get("system") == "sensor":
-                    async with self.temp_read_cond:
-                        await self.temp_read_cond.wait()
-                        await connection.send(self.send_temperature(message))
-                        self.temperatures_read[message["name"]][message["unit"]] = True # type: ignore
-                        if self.all_temperatures_read():
-                            self.temp_read_cond.notify_all()
-                elif message.get("system") == "actuator":
-                    async with self.temp_update_cond:
-                        await self.temp_update_cond.wait()
-                        confirmation_message = self.send_actuation_confirmation(message)
-                        await connection.send(confirmation_message)
-                        self.temperatures_updated[message["name"]][message["unit"]] = True # type: ignore
-                        if self.all_temperatures_updated():
-                            self.temp_update_cond.notify_all()
-                        else:
-                            #print('Still waiting for actuators to be updated')
-                            pass
-                    #print(f'Finished one actuator reading')
-                elif message.get("system") == "controller":
-                    async with self.setpoint_read_cond:
-                        #await self.setpoint_read_cond.wait()
-                        await connection.send(self.send_controller_setpoint(message))
-                    #print(f'Finished one setpoint reading')
+                system = message.get("system")
+                if system == "batch":
+                    await connection.send(await self.answer_batch(message["messages"]))
+                elif system in BATCH_ORDER:
+                    reply, = await self.answerer(system)([message])
+                    await connection.send(reply)
+                elif system == "subscribe":
+                    await self.serve_setpoint_subscription(connection, message.get("names"))
                 else:
                     raise RuntimeError(
                             f'Message "{message}" is malformed, '
                             f'"system" field must be either "sensor", '
-                            f'"actuator", or "controller".'
+                            f'"actuator", "controller", "batch", or "subscribe".'
                     )
             except AttributeError as e:
                 raise RuntimeError(f'Recevied message {message} of non-mapping type.') from e
 
+    def answerer(self, system: str) -> Callable[[List[Dict]], Awaitable[List[Dict]]]:
+        return {
+            "sensor": self.answer_sensors,
+            "controller": self.answer_controllers,
+            "actuator": self.answer_actuators,
+        }[system]
+
+    async def answer_sensors(self, messages: List[Dict]) -> List[Dict]:
+        # With the state plane, the read phase only waits for the sensors that have read over ipyc before.
+        # A sensor reading over ipyc for the first time is answered right away, since the running step
+        # does not wait for it, and every later read phase waits for it.
+        first_reads = [
+            self.state_plane is not None and self.temperatures_read.expect(message["name"], message["unit"])
+            for message in messages
+        ]
+        if not any(first_reads):
+            await self.read_gate.wait_open()
+        replies = [self.send_temperature(message) for message in messages]
+        if self.read_gate.is_open:
+            for message in messages:
+                self.temperatures_read.arrive(message["name"], message["unit"])
+            if self.all_temperatures_read():
+                self.read_gate.complete()
+
+        return replies
+
+    async def answer_actuators(self, messages: List[Dict]) -> List[Dict]:
+        await self.update_gate.wait_open()
+        replies = [self.send_actuation_confirmation(message) for message in messages]
+        for message in messages:
+            self.temperatures_updated.arrive(message["name"], message["unit"])
+        if self.all_temperatures_updated():
+            self.update_gate.complete()
+
+        return replies
+
+    async def answer_controllers(self, messages: List[Dict]) -> List[Dict]:
+        return [self.send_controller_setpoint(message) for message in messages]
+
+    async def answer_batch(self, messages: List[Dict]) -> Dict:
+        """
+        Answer a batch of sensor, controller, and actuator messages from many rooms with one reply.
+
+        Each kind of message is answered in one pass, in the order the step handles them,
+        and the replies are returned in the same order as ``messages``.
+        """
+        replies: List[Optional[Dict]] = [None] * len(messages)
+        for system in BATCH_ORDER:
+            indices = [i for i, message in enumerate(messages) if message.get("system") == system]
+            if not indices:
+                continue
+            system_replies = await self.answerer(system)([messages[i] for i in indices])
+            for i, reply in zip(indices, system_replies):
+                replies[i] = reply
+
+        if None in replies:
+            raise RuntimeError(
+                    f'Batch "{messages}" is malformed, '
+                    f'"system" field of every message must be either "sensor", '
+                    f'"actuator", or "controller".'
+            )
+
+        return {"replies": replies, "timestep": self.timestep}
+
+    async def serve_setpoint_subscription(self, connection: AsyncIPyCLink, names: Optional[Sequence[str]] = None):
+        """
+        Send the setpoints of ``names``, all rooms by default, and then every change to them until the connection closes.
+
+        Changes made while the previous push was being sent are merged into one message.
+        """
+        room_names = self.room_names if names is None else [name for name in names if name in self.setpoints]
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (frozenset(room_names), queue)
+        self.setpoint_subscribers.append(subscriber)
+        try:
+            await connection.send({
+                "setpoints": {room_name: self.setpoints[room_name] for room_name in room_names},
+                "timestep": self.timestep,
+            })
+            while connection.is_active():
+                changes = await queue.get()
+                while not queue.empty():
+                    changes.update(queue.get_nowait())
+                await connection.send({"setpoints": changes, "timestep": self.timestep})
+        finally:
+            self.setpoint_subscribers.remove(subscriber)
+
+    def set_setpoints(self, setpoints: Mapping[str, float]):
+        """
+        Update the setpoints of some rooms and push those that changed to the subscribed controllers.
+        """
+        changed = {
+            room_name: setpoint
+            for room_name, setpoint in setpoints.items()
+            if self.setpoints[room_name] != setpoint
+        }
+        if not changed:
+            return
+
+        self.setpoints.update(changed)
+        for room_names, queue in self.setpoint_subscribers:
+            subscribed = {room_name: setpoint for room_name, setpoint in changed.items() if room_name in room_names}
+            if subscribed:
+                queue.put_nowait(subscribed)
+
     @property
     def current_heat_output(self) -> Dict[str, float]:
         for room_name in self.room_names:
@@ -102,20 +229,26 @@ class ArrowheadEnvironment():
     def send_temperature(self, message: Dict) -> Dict:
         room_name = message["name"]
         temperature = self.rooms[room_name].temperature # + random.uniform(-2, 2)
+        if self.missing_policy == "stale":
+            return {"temp": temperature, "timestep": self.timestep, "stale": bool(self.stale_units.get(room_name))}
         return {"temp": temperature, "timestep": self.timestep}
 
     def send_actuation_confirmation(self, message) -> Dict:
         room_name = message["name"]
         new_actuation = message["actuation"]
-
-        if new_actuation >= 0.0:
+        stale_units = self.stale_units.get(room_name)
+        if stale_units:
+            stale_units.discard(message["unit"])
+
+        # Actuators in publish mode send None to keep their last actuation
+        if new_actuation is None:
+            pass
+        elif new_actuation >= 0.0:
             self.heating_power[room_name] = new_actuation
             self.cooling_power[room_name] = 0.0
         else:
             self.heating_power[room_name] = 0.0
             self.cooling_power[room_name] = new_actuation
-        #self.actuation_updated[room_name] = True
-        self.actuation_updated = {name: True for name in self.room_names}
 
         return {"status": True, "timestep": self.timestep}
 
@@ -128,67 +261,130 @@ class ArrowheadEnvironment():
         return {"setpoint": self.setpoints[room_name], "timestep": self.timestep}
 
     def room_init(self):
-        self.outside = Room(
-                name='OO',
-                temperature=273.0,
-                heat_capacity=float('inf'),
-                position=(0, 2),
-                static=True
-        )
-
-        self.rooms = {self.outside.name: self.outside} | {
-            name: Room(
-                    name=name,
-                    temperature=273.0,
-                    heat_capacity=46e3,
-                    position=pos,
-            ) for name, pos in zip(self.room_names, self.room_coordinates)
-        }
-
-        # Bottom row
-        self.rooms['A11'].add_neighbors({(2, self.outside), (1, self.rooms['A12']), (1, self.rooms['A21'])})
-        self.rooms['A12'].add_neighbors(
-                {(1, self.outside), (1, self.rooms['A11']), (1, self.rooms['A13']), (1, self.rooms['A22'])})
-        self.rooms['A13'].add_neighbors(
-                {(1, self.outside), (1, self.rooms['A12']), (1, self.rooms['A14']), (1, self.rooms['A23'])})
-        self.rooms['A14'].add_neighbors({(2, self.outside), (1, self.rooms['A13']), (1, self.rooms['A24'])})
-        # Top row
-        self.rooms['A21'].add_neighbors({(2, self.outside), (1, self.rooms['A22']), (1, self.rooms['A11'])})
-        self.rooms['A22'].add_neighbors(
-                {(1, self.outside), (1, self.rooms['A21']), (1, self.rooms['A23']), (1, self.rooms['A12'])})
-        self.rooms['A23'].add_neighbors(
-                {(1, self.outside), (1, self.rooms['A22']), (1, self.rooms['A24']), (1, self.rooms['A13'])})
-        self.rooms['A24'].add_neighbors({(2, self.outside), (1, self.rooms['A23']), (1, self.rooms['A14'])})
+        self.rooms = self.topology.create_rooms()
+        self.outside = self.rooms[self.topology.outside_name]
 
     def equipment_init(self):
         pass
 
-    def update_random_setpoints(self):
-        self.setpoints = {name: 298.0 for name in self.room_names}
-
-    def all_actuations_updated(self) -> bool:
-        return all(cond for room_bool_pair in self.actuation_updated.values() for cond in room_bool_pair.values())
+    def sync_init(self):
+        self.simulation_started = asyncio.Event()
+        # Sensors are answered while the read phase is open, actuators while the update phase is open
+        self.read_gate = PhaseGate()
+        self.update_gate = PhaseGate()
 
-    def all_setpoints_updated(self) -> bool:
-        return all(cond for room_bool_pair in self.setpoints_updated.values() for cond in room_bool_pair.values())
+    def update_random_setpoints(self):
+        self.set_setpoints(dict.fromkeys(self.room_names, 298.0))
 
     def all_temperatures_read(self) -> bool:
-        return all(cond for room_bool_pair in self.temperatures_read.values() for cond in room_bool_pair.values())
+        return self.temperatures_read.complete
 
     def all_temperatures_updated(self) -> bool:
-        all_temperatures_cond = all(cond for room_bool_pair in self.temperatures_updated.values() for cond in room_bool_pair.values())
-        return all_temperatures_cond
+        return self.temperatures_updated.complete
+
+    async def wait_for_devices(self, gate: PhaseGate, barrier: StepBarrier, system: str):
+        """
+        Wait until every device of ``barrier`` has arrived through the open ``gate``, or the step deadline expires.
+
+        Devices still missing at the deadline are recorded in :attr:`deadline_metrics`, and the power of
+        missing actuators is handled by :attr:`missing_policy`. A late device is answered in the next step.
+        """
+        if barrier.complete:
+            gate.complete()
+        if self.step_deadline is None:
+            await gate.wait_complete()
+            return
+
+        missing: Sequence[Tuple[str, str]] = []
+        try:
+            await gate.wait_complete(self.step_deadline)
+        except asyncio.TimeoutError:
+            missing = barrier.missing()
+            if self.verbose:
+                print(f'Step {self.timestep}: {system} deadline expired, missing {missing}')
+        self.deadline_metrics.record(system, missing)
+        if system == "actuator" and self.missing_policy == "zero":
+            for room_name, unit in missing:
+                if unit == "heater":
+                    self.heating_power[room_name] = 0.0
+                else:
+                    self.cooling_power[room_name] = 0.0
+        elif system == "actuator" and self.missing_policy == "stale":
+            for room_name, unit in missing:
+                self.stale_units.setdefault(room_name, set()).add(unit)
 
     def update_room_temperatures(
             self,
-            previous_room_temperatures: Mapping[str, float],
             current_heat_output: Mapping[str, float],
             time_delta: float
     ):
-        for room_name, output in current_heat_output.items():
-            self.rooms[room_name].update_temperature(
-                    previous_room_temperatures, time_delta, 1e-4, output
+        self.thermal_model.step(
+                time_delta,
+                self.coefficient,
+                self.thermal_model.power_vector(current_heat_output),
+        )
+
+    def advance(
+            self,
+            dt: float,
+            outside_temperature: float,
+            power: npt.ArrayLike,
+            setpoints: npt.ArrayLike = None,
+    ):
+        """
+        Advance one step without waiting for any device.
+
+        ``power`` is ordered like the thermal model and ``setpoints`` are only used for recording,
+        they default to :attr:`setpoints`.
+        """
+        self.outside.static_temp = outside_temperature + 273.15
+        self.thermal_model.step(dt, self.coefficient, power)
+        if self.recorder is not None:
+            self.recorder.record(
+                    self.timestep,
+                    self.thermal_model.temperatures,
+                    power,
+                    self.thermal_model.power_vector(self.setpoints) if setpoints is None else setpoints,
+            )
+        self.timestep += 1
+
+    def start_recording(self, sink: RecordingSink, chunk_size: int = 1024) -> StepRecorder:
+        """
+        Record the temperature, power, and setpoint of every room, including the outside, after each step.
+        """
+        self.recorder = StepRecorder(self.thermal_model.names, sink, chunk_size)
+        return self.recorder
+
+    def start_state_plane(self, name: Optional[str] = None) -> StatePlane:
+        """
+        Publish the temperature and setpoint of every room to shared memory at the start of each step.
+
+        Sensors then read their temperature from the shared memory instead of checking in over ipyc,
+        so the read phase of a step only waits for the sensors that still send their messages over ipyc.
+        """
+        self.state_plane = StatePlane(self.room_names, name)
+        self.temperatures_read = StepBarrier(self.room_names, expected=False)
+        return self.state_plane
+
+    def stop_state_plane(self):
+        if self.state_plane is not None:
+            self.state_plane.unlink()
+            self.state_plane = None
+
+    def publish_state(self):
+        assert self.state_plane is not None
+        # Rooms follow the outside in the model, ghost rooms come after them
+        self.state_plane.publish(
+                self.timestep,
+                self.thermal_model.temperatures[1:1 + len(self.room_names)],
+                list(self.setpoints.values()),
         )
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
     async def step(
             self,
             dt: float,
@@ -196,58 +392,128 @@ class ArrowheadEnvironment():
             outside_temperature: float,
             noise_vector: npt.ArrayLike = None,
     ):
-        async with self.temp_read_cond:
-            self.outside.static_temp = outside_temperature + 273.15
+        step_start = time.perf_counter()
+        self.outside.static_temp = outside_temperature + 273.15
+        if self.verbose:
             current_room_temperatures = {name: room.temperature for name, room in self.rooms.items()}
             print(f'{current_room_temperatures = }')
-            await asyncio.sleep(0.2)
-            self.temp_read_cond.notify_all()
-            await self.temp_read_cond.wait_for(self.all_temperatures_read)
-            self.temperatures_read = cleared_update_dict()
+        self.read_gate.open()
+        await self.wait_for_devices(self.read_gate, self.temperatures_read, "sensor")
+        self.read_gate.close()
+        self.temperatures_read.reset()
+        read_end = time.perf_counter()
 
         self.update_random_setpoints()
-
-        await asyncio.sleep(0.5)
-        async with self.temp_update_cond:
-            heat_output = self.current_heat_output
-            self.update_room_temperatures(current_room_temperatures, heat_output, dt)
-            self.temp_update_cond.notify_all()
-            await self.temp_update_cond.wait_for(self.all_temperatures_updated)
+        if self.state_plane is not None:
+            # Sensors on the state plane wait for the new timestep in shared memory
+            self.publish_state()
+
+        heat_output = self.current_heat_output
+        self.update_room_temperatures(heat_output, dt)
+        model_end = time.perf_counter()
+        self.update_gate.open()
+        await self.wait_for_devices(self.update_gate, self.temperatures_updated, "actuator")
+        self.update_gate.close()
+        if self.verbose:
             print(f'{heat_output = }')
-            self.temperatures_updated = cleared_update_dict()
+        self.temperatures_updated.reset()
+        if self.recorder is not None:
+            self.recorder.record(
+                    self.timestep,
+                    self.thermal_model.temperatures,
+                    self.thermal_model.power_vector(heat_output),
+                    # Setpoints are ordered like the model the same way as the power
+                    self.thermal_model.power_vector(self.setpoints),
+                    self.thermal_model.power_vector(
+                            {room_name: 1.0 for room_name, units in self.stale_units.items() if units}
+                    ),
+            )
+        step_end = time.perf_counter()
+
+        self.step_timings = {
+            'read_barrier': read_end - step_start,
+            'model': model_end - read_end,
+            'update_barrier': step_end - model_end,
+            'step': step_end - step_start,
+        }
+        self.timestep += 1
 
-    async def run_simulation(self):
-        self.simulation_started = asyncio.Event()
-        self.temp_read_cond = asyncio.Condition()
-        self.setpoint_read_cond = asyncio.Condition()
-        self.temp_update_cond = asyncio.Condition()
+    async def run_simulation(
+            self,
+            dt: float = 10.0,
+            outside_temperature: float = 25.0,
+            policy: Optional[StepPolicy] = None,
+            ipc_port: int = 9999,
+            prompt: bool = True,
+    ):
+        policy = policy or AsFastAsPossible()
+        self.sync_init()
         # Wrapper function for the handling of ipc
         async def on_connect_linker(connection):
             return await self.on_connect(connection)
-        self.ipc_host = AsyncIPyCHost()
+        self.ipc_host = AsyncIPyCHost(port=ipc_port)
         self.ipc_host.add_connection_handler(on_connect_linker)
         asyncio.create_task(self.ipc_host.start())
-        await ainput("Press enter to start simulation >")
+        if prompt:
+            await ainput("Press enter to start simulation >")
         self._started = True
         self.simulation_started.set()
         print("Waiting five seconds to let everything start up")
         await asyncio.sleep(1)
         while True:
             print('----------------------------')
-            await self.step(10, 0, 25)
+            await self.step(dt, self.timestep * dt, outside_temperature)
             print('Finished one simulation step')
-            await asyncio.sleep(2)
+            await policy.wait(dt)
 
 
-async def main(env: ArrowheadEnvironment):
+async def main(env: ArrowheadEnvironment, dt: float = 10.0, policy: Optional[StepPolicy] = None):
     try:
-        await env.run_simulation()
+        await env.run_simulation(dt=dt, policy=policy)
     except KeyboardInterrupt:
         await env.ipc_host.close()
+    finally:
+        env.stop_recording()
+        env.stop_state_plane()
 
 if __name__ == '__main__':
+    import argparse
     from pprint import pprint
-    env = ArrowheadEnvironment()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--topology', help='JSON or TOML building topology, defaults to the Lübeck A-building')
+    parser.add_argument('--dt', type=float, default=10.0, help='Simulated seconds per step')
+    parser.add_argument(
+            '--policy',
+            choices=('fast', 'fixed', 'realtime'),
+            default='fast',
+            help='Run steps as fast as possible, at a fixed rate, or scaled to real time',
+    )
+    parser.add_argument('--rate', type=float, help='Steps per second for "fixed", time scale for "realtime"')
+    parser.add_argument('--record', help='Record every step to a directory, or to a .parquet file')
+    parser.add_argument('--integrator', choices=tuple(INTEGRATORS), default='euler')
+    parser.add_argument('--coefficient', type=float, default=CONDUCTANCE_COEFFICIENT, help='Conductance scale factor')
+    parser.add_argument('--deadline', type=float, help='Seconds each step phase waits for devices, forever by default')
+    parser.add_argument(
+            '--missing-policy',
+            choices=MISSING_POLICIES,
+            default='hold',
+            help='Keep the last actuation of a device that missed the deadline, turn it off, or keep it and flag it stale',
+    )
+    parser.add_argument('--state-plane', help='Publish room state to shared memory with this name for co-located devices')
+    args = parser.parse_args()
+
+    env = ArrowheadEnvironment(
+            load_topology(args.topology) if args.topology else None,
+            coefficient=args.coefficient,
+            integrator=args.integrator,
+            step_deadline=args.deadline,
+            missing_policy=args.missing_policy,
+    )
+    if args.record:
+        env.start_recording(make_sink(args.record))
+    if args.state_plane:
+        env.start_state_plane(args.state_plane)
     pprint(env.rooms)
 
-    asyncio.run(main(env))
+    asyncio.run(main(env, args.dt, make_policy(args.policy, args.rate)))
@@ -0,0 +1,83 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class StepPolicy(ABC):
+    """
+    Decides how long the simulation waits after a step before starting the next one.
+    """
+
+    @abstractmethod
+    async def wait(self, dt: float) -> None:
+        pass
+
+
+class AsFastAsPossible(StepPolicy):
+    """
+    Start the next step as soon as the previous one is finished.
+    """
+
+    async def wait(self, dt: float) -> None:
+        # Still yield to the event loop so that connection handlers get to run between steps
+        await asyncio.sleep(0)
+
+
+class _PacedPolicy(StepPolicy):
+    def __init__(self):
+        self._deadline: Optional[float] = None
+
+    @abstractmethod
+    def period(self, dt: float) -> float:
+        pass
+
+    async def wait(self, dt: float) -> None:
+        now = asyncio.get_running_loop().time()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.period(dt)
+        if self._deadline < now:
+            # Running behind, do not try to catch up with a burst of steps
+            self._deadline = now
+        await asyncio.sleep(self._deadline - now)
+
+
+class FixedRate(_PacedPolicy):
+    """
+    Run ``steps_per_second`` steps per wall-clock second, regardless of the simulated step length.
+    """
+
+    def __init__(self, steps_per_second: float):
+        super().__init__()
+        self.steps_per_second = steps_per_second
+
+    def period(self, dt: float) -> float:
+        return 1.0 / self.steps_per_second
+
+
+class ScaledRealTime(_PacedPolicy):
+    """
+    Run simulated time ``scale`` times faster than wall-clock time, ``scale = 1`` is real time.
+    """
+
+    def __init__(self, scale: float = 1.0):
+        super().__init__()
+        self.scale = scale
+
+    def period(self, dt: float) -> float:
+        return dt / self.scale
+
+
+def make_policy(name: str, value: Optional[float] = None) -> StepPolicy:
+    """
+    Create a step policy from its command line name, ``'fast'``, ``'fixed'`` or ``'realtime'``.
+    ``value`` is the step rate of ``'fixed'`` and the time scale of ``'realtime'``.
+    """
+    if name == 'fast':
+        return AsFastAsPossible()
+    elif name == 'fixed':
+        return FixedRate(value or 1.0)
+    elif name == 'realtime':
+        return ScaledRealTime(value or 1.0)
+
+    raise ValueError(f'Unknown step policy "{name}", must be either "fast", "fixed", or "realtime".')
@@ -0,0 +1,227 @@
+"""
+Per-step simulation state kept in preallocated buffers and flushed in chunks to disk.
+
+Two on-disk formats are supported. A :class:`MemmapSink` directory holds one raw little endian file
+per column, which :func:`load_recording` maps back into memory. A :class:`ParquetSink` file gets one
+row group per chunk and needs pyarrow.
+"""
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columns with one value per room, all stored as float64, stale is 1.0 for rooms whose power was kept from an
+# earlier step because an actuator missed the step deadline
+COLUMNS = ('temperature', 'heating', 'cooling', 'setpoint', 'stale')
+METADATA_FILE = 'recording.json'
+
+
+class RecordingSink(ABC):
+    """
+    Destination of the chunks written by a :class:`StepRecorder`.
+    """
+
+    def open(self, names: Sequence[str]):
+        pass
+
+    @abstractmethod
+    def write(self, timesteps: npt.NDArray[np.int64], columns: Dict[str, npt.NDArray[np.float64]]):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemmapSink(RecordingSink):
+    """
+    Appends every column to its own raw file in ``directory``.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._files: Dict[str, object] = {}
+
+    def open(self, names: Sequence[str]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / METADATA_FILE, 'w') as metadata:
+            json.dump({'names': list(names), 'columns': list(COLUMNS)}, metadata)
+        self._files = {
+            column: open(self.directory / f'{column}.f64', 'wb')
+            for column in COLUMNS
+        }
+        self._files['timestep'] = open(self.directory / 'timestep.i64', 'wb')
+
+    def write(self, timesteps: npt.NDArray[np.int64], columns: Dict[str, npt.NDArray[np.float64]]):
+        timesteps.astype('<i8', copy=False).tofile(self._files['timestep'])
+        for column, values in columns.items():
+            values.astype('<f8', copy=False).tofile(self._files[column])
+
+    def close(self):
+        for column_file in self._files.values():
+            column_file.close()  # type: ignore
+        self._files = {}
+
+
+class ParquetSink(RecordingSink):
+    """
+    Writes every chunk as one row group of the Parquet file ``path``, with one column per room and value.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        try:
+            import pyarrow  # type: ignore
+            import pyarrow.parquet  # type: ignore
+        except ImportError as e:
+            raise RuntimeError('Recording to Parquet requires the pyarrow package') from e
+        self._pyarrow = pyarrow
+        self.path = Path(path)
+        self.names: Sequence[str] = ()
+        self._writer = None
+
+    def open(self, names: Sequence[str]):
+        self.names = list(names)
+        fields = [self._pyarrow.field('timestep', self._pyarrow.int64())] + [
+            self._pyarrow.field(f'{column}/{name}', self._pyarrow.float64())
+            for column in COLUMNS
+            for name in self.names
+        ]
+        self._writer = self._pyarrow.parquet.ParquetWriter(self.path, self._pyarrow.schema(fields))
+
+    def write(self, timesteps: npt.NDArray[np.int64], columns: Dict[str, npt.NDArray[np.float64]]):
+        arrays = [self._pyarrow.array(timesteps)] + [
+            self._pyarrow.array(columns[column][:, i])
+            for column in COLUMNS
+            for i in range(len(self.names))
+        ]
+        self._writer.write_table(self._pyarrow.Table.from_arrays(arrays, schema=self._writer.schema))  # type: ignore
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class StepRecorder:
+    """
+    Records the state of every room once per step.
+
+    Rows are copied into buffers of ``chunk_size`` steps that are allocated once, and each full buffer
+    is written to ``sink`` before it is reused, so memory use does not grow with the length of a run.
+    ``names`` are the rooms in the order of the arrays passed to :meth:`record`.
+    """
+
+    def __init__(self, names: Sequence[str], sink: RecordingSink, chunk_size: int = 1024):
+        self.names = tuple(names)
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.timesteps = np.zeros(chunk_size, dtype=np.int64)
+        self.buffers = {column: np.zeros((chunk_size, len(self.names))) for column in COLUMNS}
+        self.rows = 0
+        self.recorded = 0
+        self.sink.open(self.names)
+
+    def record(
+            self,
+            timestep: int,
+            temperatures: npt.ArrayLike,
+            power: npt.ArrayLike,
+            setpoints: npt.ArrayLike,
+            stale: npt.ArrayLike = 0.0,
+    ):
+        """
+        Record one step, ``power`` is positive for heating and negative for cooling.
+        """
+        row = self.rows
+        self.timesteps[row] = timestep
+        self.buffers['temperature'][row] = temperatures
+        np.maximum(power, 0.0, out=self.buffers['heating'][row])
+        np.minimum(power, 0.0, out=self.buffers['cooling'][row])
+        self.buffers['setpoint'][row] = setpoints
+        self.buffers['stale'][row] = stale
+        self.rows += 1
+        self.recorded += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.sink.write(
+                    self.timesteps[:self.rows],
+                    {column: buffer[:self.rows] for column, buffer in self.buffers.items()},
+            )
+            self.rows = 0
+
+    def close(self):
+        self.flush()
+        self.sink.close()
+
+
+class Recording:
+    """
+    A recording written by a :class:`MemmapSink`, with every column mapped from disk instead of read.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        with open(self.directory / METADATA_FILE, 'r') as metadata:
+            description = json.load(metadata)
+        self.names = tuple(description['names'])
+        self.timesteps = self._map('timestep.i64', '<i8')
+
+    def _map(self, file_name: str, dtype: str) -> np.ndarray:
+        path = self.directory / file_name
+        if path.stat().st_size == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def __len__(self):
+        return len(self.timesteps)
+
+    def column(self, column: str) -> np.ndarray:
+        """
+        Values of ``column`` with one row per step and one column per room.
+        """
+        return self._map(f'{column}.f64', '<f8').reshape(-1, len(self.names))
+
+    def room(self, name: str, column: str = 'temperature') -> np.ndarray:
+        return self.column(column)[:, self.names.index(name)]
+
+    def to_dataframe(self, columns: Optional[Sequence[str]] = None) -> 'pd.DataFrame':
+        """
+        Recording as a data frame indexed by timestep, with a ``(column, room)`` column index.
+        """
+        import pandas as pd
+
+        columns = columns or COLUMNS
+        return pd.concat(
+                {column: pd.DataFrame(self.column(column), index=self.timesteps, columns=self.names) for column in columns},
+                axis=1,
+        ).rename_axis('timestep')
+
+
+def load_recording(path: Union[str, Path]) -> Union[Recording, 'pd.DataFrame']:
+    """
+    Open a recording directory lazily, or read a Parquet recording into a data frame.
+    """
+    if Path(path).is_dir():
+        return Recording(path)
+
+    import pandas as pd
+
+    return pd.read_parquet(path)
+
+
+def make_sink(path: Union[str, Path]) -> RecordingSink:
+    """
+    Parquet sink for ``.parquet`` paths, memory-mapped directory otherwise.
+    """
+    if Path(path).suffix == '.parquet':
+        return ParquetSink(path)
+
+    return MemmapSink(path)
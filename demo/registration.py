@@ -0,0 +1,283 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import aiohttp
+
+from demo.utils import DeviceSpec, address, device_specs, get_core_config, system_name
+
+SystemKey = Tuple[str, str, int]
+# Service definition, service uri, interface, provider
+ServiceKey = Tuple[str, str, str, SystemKey]
+# Service definition, interface, provider, consumer
+RuleKey = Tuple[str, str, SystemKey, SystemKey]
+
+INTERFACE = 'HTTP-INSECURE-JSON'
+# Service definition and service uri provided by each kind of device, must match the provided_service decorators
+PROVIDED_SERVICES = {
+    'sensor': ('temperature', 'temperature'),
+    'actuator': ('actuator', 'actuation'),
+}
+STAGES = ('systems', 'services', 'orchestration')
+
+
+def system_key(name: str, system_address: str, port: int) -> SystemKey:
+    # The core systems store system names in lower case
+    return name.lower(), system_address, port
+
+
+class DesiredState:
+    """
+    Systems, services, and orchestration rules the local cloud should hold for a set of devices.
+    """
+
+    def __init__(self, specs: Iterable[DeviceSpec], system_address: str = address):
+        self.systems: Set[SystemKey] = set()
+        self.services: Set[ServiceKey] = set()
+        self.rules: Set[RuleKey] = set()
+
+        devices: Dict[Tuple[str, str, str], SystemKey] = {}
+        for spec in specs:
+            role, flavor = spec['kind'].split('_')
+            key = system_key(system_name(spec['kind'], spec['room_name']), system_address, spec['port'])
+            self.systems.add(key)
+            devices[(spec['room_name'], role, flavor)] = key
+
+        for (room_name, role, flavor), provider in devices.items():
+            if role not in PROVIDED_SERVICES:
+                continue
+            service_definition, service_uri = PROVIDED_SERVICES[role]
+            self.services.add((service_definition, service_uri, INTERFACE, provider))
+            consumer = devices.get((room_name, 'controller', flavor))
+            if consumer is not None:
+                self.rules.add((service_definition, INTERFACE, provider, consumer))
+
+
+class CoreSystemsSession:
+    """
+    Management API calls to the service registry, orchestrator, and authorization systems
+    through one pooled aiohttp session, with at most ``concurrency`` requests in flight.
+    """
+
+    def __init__(self, config: Dict, concurrency: int = 32, scheme: str = 'http'):
+        self.urls = {
+            core_system: f'{scheme}://{entry["address"]}:{entry["port"]}'
+            for core_system, entry in config.items()
+        }
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.http_session: aiohttp.ClientSession
+
+    async def __aenter__(self):
+        self.http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.http_session.close()
+
+    async def request(self, method: str, core_system: str, path: str, **kwargs):
+        async with self._semaphore:
+            async with self.http_session.request(method, f'{self.urls[core_system]}/{path}', **kwargs) as resp:
+                payload = await resp.json(content_type=None)
+                status = resp.status
+
+        error_message = payload.get('errorMessage', '') if isinstance(payload, dict) else ''
+        if status >= 400 and not str(error_message).endswith('already exists.'):
+            raise RuntimeError(f'{method} {core_system}/{path} failed with status {status}: {payload}')
+
+        return payload
+
+    async def systems(self) -> Dict[SystemKey, int]:
+        payload = await self.request('GET', 'service_registry', 'serviceregistry/mgmt/systems')
+        return {
+            system_key(system['systemName'], system['address'], system['port']): system['id']
+            for system in payload.get('data', [])
+        }
+
+    async def services(self) -> Dict[ServiceKey, Tuple[int, int]]:
+        """
+        Registered services, mapped to the ids of their service definition and interface.
+        """
+        payload = await self.request('GET', 'service_registry', 'serviceregistry/mgmt')
+        services = {}
+        for entry in payload.get('data', []):
+            provider = entry['provider']
+            for interface in entry['interfaces']:
+                key = (
+                    entry['serviceDefinition']['serviceDefinition'],
+                    entry['serviceUri'].strip('/'),
+                    interface['interfaceName'],
+                    system_key(provider['systemName'], provider['address'], provider['port']),
+                )
+                services[key] = (entry['serviceDefinition']['id'], interface['id'])
+
+        return services
+
+    async def orchestration_rules(self) -> Set[RuleKey]:
+        payload = await self.request('GET', 'orchestrator', 'orchestrator/mgmt/store')
+        return {
+            (
+                rule['serviceDefinition']['serviceDefinition'],
+                rule['serviceInterface']['interfaceName'],
+                system_key(
+                        rule['providerSystem']['systemName'],
+                        rule['providerSystem']['address'],
+                        rule['providerSystem']['port'],
+                ),
+                system_key(
+                        rule['consumerSystem']['systemName'],
+                        rule['consumerSystem']['address'],
+                        rule['consumerSystem']['port'],
+                ),
+            )
+            for rule in payload.get('data', [])
+        }
+
+    async def authorization_rules(self) -> Set[Tuple[int, int, int, int]]:
+        payload = await self.request('GET', 'authorization', 'authorization/mgmt/intracloud')
+        return {
+            (rule['consumerSystem']['id'], rule['providerSystem']['id'], rule['serviceDefinition']['id'], interface['id'])
+            for rule in payload.get('data', [])
+            for interface in rule['interfaces']
+        }
+
+    async def add_system(self, system: SystemKey):
+        name, system_address, port = system
+        await self.request(
+                'POST',
+                'service_registry',
+                'serviceregistry/mgmt/systems',
+                json={"systemName": name, "address": system_address, "port": port},
+        )
+
+    async def add_service(self, service: ServiceKey):
+        service_definition, service_uri, interface, (name, system_address, port) = service
+        await self.request(
+                'POST',
+                'service_registry',
+                'serviceregistry/mgmt',
+                json={
+                    "serviceDefinition": service_definition,
+                    "serviceUri": service_uri,
+                    "interfaces": [interface],
+                    "secure": "NOT_SECURE",
+                    "providerSystem": {"systemName": name, "address": system_address, "port": port},
+                },
+        )
+
+    async def add_orchestration_rules(self, rules: Sequence[RuleKey], system_ids: Dict[SystemKey, int]):
+        # The orchestrator store accepts any number of rules in one request
+        await self.request(
+                'POST',
+                'orchestrator',
+                'orchestrator/mgmt/store',
+                json=[
+                    {
+                        "serviceDefinitionName": service_definition,
+                        "serviceInterfaceName": interface,
+                        "consumerSystemId": system_ids[consumer],
+                        "providerSystem": dict(zip(("systemName", "address", "port"), provider)),
+                        "priority": 1,
+                    } for service_definition, interface, provider, consumer in rules
+                ],
+        )
+
+    async def add_authorization_rule(
+            self,
+            consumer_id: int,
+            provider_ids: List[int],
+            service_definition_id: int,
+            interface_id: int,
+    ):
+        await self.request(
+                'POST',
+                'authorization',
+                'authorization/mgmt/intracloud',
+                json={
+                    "consumerId": consumer_id,
+                    "providerIds": provider_ids,
+                    "interfaceIds": [interface_id],
+                    "serviceDefinitionIds": [service_definition_id],
+                },
+        )
+
+
+async def apply_registration(
+        state: DesiredState,
+        config: Dict,
+        stages: Sequence[str] = STAGES,
+        concurrency: int = 32,
+) -> Dict[str, int]:
+    """
+    Diff ``state`` against what the core systems already hold and add only what is missing.
+
+    Returns the number of systems, services, orchestration rules, and authorization rules added.
+    """
+    added = {'systems': 0, 'services': 0, 'orchestration': 0, 'authorization': 0}
+    async with CoreSystemsSession(config, concurrency) as core:
+        if 'systems' in stages:
+            missing_systems = state.systems - set(await core.systems())
+            await asyncio.gather(*(core.add_system(system) for system in missing_systems))
+            added['systems'] = len(missing_systems)
+
+        if 'services' in stages:
+            missing_services = state.services - set(await core.services())
+            await asyncio.gather(*(core.add_service(service) for service in missing_services))
+            added['services'] = len(missing_services)
+
+        if 'orchestration' in stages:
+            system_ids, services, existing_rules, existing_authorizations = await asyncio.gather(
+                    core.systems(),
+                    core.services(),
+                    core.orchestration_rules(),
+                    core.authorization_rules(),
+            )
+            missing_rules = sorted(state.rules - existing_rules)
+            if missing_rules:
+                await core.add_orchestration_rules(missing_rules, system_ids)
+            added['orchestration'] = len(missing_rules)
+
+            provider_uris = {
+                (service_definition, interface, provider): service_uri
+                for service_definition, service_uri, interface, provider in state.services
+            }
+            # Group the providers of each consumer, service definition and interface into one request
+            authorizations: Dict[Tuple[int, int, int], List[int]] = {}
+            for service_definition, interface, provider, consumer in state.rules:
+                service_uri = provider_uris[(service_definition, interface, provider)]
+                service_definition_id, interface_id = services[(service_definition, service_uri, interface, provider)]
+                consumer_id, provider_id = system_ids[consumer], system_ids[provider]
+                if (consumer_id, provider_id, service_definition_id, interface_id) in existing_authorizations:
+                    continue
+                authorizations.setdefault((consumer_id, service_definition_id, interface_id), []).append(provider_id)
+            await asyncio.gather(*(
+                core.add_authorization_rule(consumer_id, provider_ids, service_definition_id, interface_id)
+                for (consumer_id, service_definition_id, interface_id), provider_ids in authorizations.items()
+            ))
+            added['authorization'] = sum(len(provider_ids) for provider_ids in authorizations.values())
+
+    return added
+
+
+def main(stages: Sequence[str] = STAGES, specs: Optional[Sequence[DeviceSpec]] = None):
+    state = DesiredState(specs if specs is not None else device_specs())
+    added = asyncio.run(apply_registration(state, get_core_config(), stages))
+    print(f'Added {added}')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from demo.topology import load_topology
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--topology', help='JSON or TOML building topology, defaults to the Lübeck A-building')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    args = parser.parse_args()
+
+    if args.topology:
+        topology = load_topology(args.topology)
+        topology_specs = device_specs(topology.room_names, [spec['position'] for spec in topology.room_specs])
+    else:
+        topology_specs = device_specs()
+
+    main(args.stages, topology_specs)
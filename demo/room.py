@@ -1,4 +1,7 @@
-from typing import Tuple, Set, Dict, Mapping
+from typing import Tuple, Set, Dict, Iterable, Mapping
+
+import numpy as np
+import numpy.typing as npt
 
 
 class Temperature:
@@ -6,15 +9,15 @@ class Temperature:
         if instance is None:
             return self
 
-        return instance._temp
+        return float(instance._temperatures[instance._index])
 
     def __set__(self, instance, value: float) -> None:
         if instance.static:
             return
         if value < 0.0:
-            instance._temp = 0.0
+            instance._temperatures[instance._index] = 0.0
 
-        instance._temp = value
+        instance._temperatures[instance._index] = value
 
 
 class StaticTemperature:
@@ -22,15 +25,15 @@ class StaticTemperature:
         if instance is None:
             return self
 
-        return instance._temp
+        return float(instance._temperatures[instance._index])
 
     def __set__(self, instance, value: float) -> None:
         if not instance.static:
             return
         if value < 0.0:
-            instance._temp = 0.0
+            instance._temperatures[instance._index] = 0.0
 
-        instance._temp = value
+        instance._temperatures[instance._index] = value
 
 
 class StaticBool:
@@ -59,6 +62,8 @@ class Room:
             metadata: Dict = None,
     ):
         self.static = False
+        self._temperatures: npt.NDArray[np.float64] = np.zeros(1)
+        self._index = 0
         self.name = name
         self.temperature = temperature
         self.neighbors = {}
@@ -93,11 +98,20 @@ class Room:
                 for neighbor_multiplier, neighbor_temperature in neighbor_temperatures
         ) - equipment_power / self.heat_capacity)
 
-    def add_neighbors(self, neighbors: Set[Tuple[int, "Room"]]) -> None:
+    def bind(self, temperatures: npt.NDArray[np.float64], index: int) -> None:
+        """
+        Make the room a view over ``temperatures[index]``, e.g. the state vector of a ``ThermalModel``.
+        The current temperature of the room is copied into the array.
         """
+        temperatures[index] = self._temperatures[self._index]
+        self._temperatures = temperatures
+        self._index = index
 
+    def add_neighbors(self, neighbors: Iterable[Tuple[float, "Room"]]) -> None:
+        """
+        Add or replace neighbors in place, given as ``(multiplier, room)`` pairs.
         """
-        self.neighbors = {**self.neighbors, **{room.name: (multiplier, room) for multiplier, room in neighbors}}
+        self.neighbors.update((room.name, (multiplier, room)) for multiplier, room in neighbors)
         """
         for neighbor in neighbors:
             if not isinstance(neighbor, Room):
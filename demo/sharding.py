@@ -0,0 +1,266 @@
+"""
+Sharded simulation, the rooms of a building are split over several environment processes.
+
+Every shard simulates its own rooms and holds the rooms of other shards it is coupled to as static
+ghost rooms. After each step the shards publish the temperatures of their rooms to shared memory,
+wait for each other at a barrier, and copy the new temperatures of their ghost rooms from it.
+
+    python -m demo.sharding --shards 4 --steps 8640 [--topology building.toml] [--devices]
+"""
+import asyncio
+from multiprocessing import Barrier, Process
+from multiprocessing.shared_memory import SharedMemory
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from demo.headless import DEFAULT_SCENARIO, HeadlessEngine, Scenario
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.topology import BuildingTopology, RoomSpec
+
+BASE_IPC_PORT = 9999
+
+
+class Shard:
+    """
+    Topology of one shard, and where its rooms and ghost rooms are in the building's temperature array.
+    """
+
+    def __init__(self, shard_id: int, topology: BuildingTopology, building_index: Dict[str, int]):
+        self.shard_id = shard_id
+        self.topology = topology
+        self.owned = np.array([building_index[name] for name in topology.room_names], dtype=np.intp)
+        self.ghosts = np.array([building_index[name] for name in topology.ghost_names], dtype=np.intp)
+        # Positions in the shard's own temperature array
+        self.local_owned = np.array([topology.index[name] for name in topology.room_names], dtype=np.intp)
+        self.local_ghosts = np.array([topology.index[name] for name in topology.ghost_names], dtype=np.intp)
+
+    @property
+    def ipc_port(self) -> int:
+        return BASE_IPC_PORT + self.shard_id
+
+
+def split_topology(topology: BuildingTopology, num_shards: int) -> List[Shard]:
+    """
+    Split the rooms of ``topology`` into ``num_shards`` contiguous blocks.
+
+    Grid buildings list their rooms floor by floor and row by row, so contiguous blocks only touch
+    along a few rows and the shards have few ghost rooms.
+    """
+    specs = topology.room_specs
+    num_shards = max(1, min(num_shards, len(specs)))
+    bounds = np.linspace(0, len(specs), num_shards + 1).astype(int)
+    adjacency = topology.adjacency
+    shards = []
+    for shard_id, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        # Building indices of the rooms of this shard, the outside is index 0
+        owned = set(range(start + 1, end + 1))
+        couplings: List[Tuple[str, str, float]] = []
+        boundaries: Dict[str, float] = {}
+        ghosts: Dict[int, RoomSpec] = {}
+        for i in sorted(owned):
+            row_start, row_end = adjacency.indptr[i], adjacency.indptr[i + 1]
+            for j, multiplier in zip(adjacency.indices[row_start:row_end], adjacency.data[row_start:row_end]):
+                if j == 0:
+                    boundaries[topology.names[i]] = float(multiplier)
+                    continue
+                if j not in owned:
+                    ghosts[j] = specs[j - 1]
+                elif j < i:
+                    # Couplings are undirected, owned pairs are added once
+                    continue
+                couplings.append((topology.names[i], topology.names[j], float(multiplier)))
+
+        shard_topology = BuildingTopology(
+                specs[start:end],
+                couplings,
+                boundaries,
+                outside_name=topology.outside_name,
+                outside_temperature=topology.outside_temperature,
+                outside_position=topology.outside_position,
+                ghosts=[ghosts[j] for j in sorted(ghosts)],
+        )
+        shards.append(Shard(shard_id, shard_topology, topology.index))
+
+    return shards
+
+
+class BoundaryExchange:
+    """
+    Shared temperatures of the whole building, written by every shard once per step.
+
+    The array has two halves that are used on alternate steps, so a shard can publish the next step
+    while a slower shard is still reading the previous one.
+    """
+
+    def __init__(self, memory_name: str, num_rooms: int, barrier):
+        self.memory = SharedMemory(name=memory_name)
+        self.buffers: npt.NDArray[np.float64] = np.ndarray((2, num_rooms), dtype=np.float64, buffer=self.memory.buf)
+        self.barrier = barrier
+
+    def exchange(self, shard: Shard, temperatures: npt.NDArray[np.float64], step: int):
+        buffer = self.buffers[step % 2]
+        buffer[shard.owned] = temperatures[shard.local_owned]
+        self.barrier.wait()
+        temperatures[shard.local_ghosts] = buffer[shard.ghosts]
+
+    def close(self):
+        del self.buffers
+        self.memory.close()
+
+
+class ShardEnvironment(ArrowheadEnvironment):
+    """
+    Environment of one shard, which exchanges boundary temperatures with the other shards after every step.
+    """
+
+    def __init__(self, shard: Shard, exchange: BoundaryExchange, **kwargs):
+        super().__init__(shard.topology, **kwargs)
+        self.shard = shard
+        self.exchange = exchange
+        self.steps_exchanged = 0
+
+    def exchange_boundaries(self):
+        self.exchange.exchange(self.shard, self.thermal_model.temperatures, self.steps_exchanged)
+        self.steps_exchanged += 1
+
+    async def step(self, *args, **kwargs):
+        await super().step(*args, **kwargs)
+        # The barrier blocks, so wait for the other shards without blocking the connection handlers
+        await asyncio.get_running_loop().run_in_executor(None, self.exchange_boundaries)
+
+    def advance(self, *args, **kwargs):
+        super().advance(*args, **kwargs)
+        self.exchange_boundaries()
+
+
+def run_shard(
+        shard: Shard,
+        memory_name: str,
+        num_rooms: int,
+        barrier,
+        steps: Optional[int],
+        dt: float,
+        scenario: Optional[Scenario],
+        integrator: str,
+):
+    """
+    Run one shard, headless with ``scenario`` or driven by devices over the shard's own ipyc port.
+    """
+    exchange = BoundaryExchange(memory_name, num_rooms, barrier)
+    try:
+        env = ShardEnvironment(shard, exchange, verbose=False, integrator=integrator)
+        if scenario is not None:
+            HeadlessEngine(env).run(scenario, steps or 0, dt)
+        else:
+            print(f'Shard {shard.shard_id} with {len(shard.owned)} rooms listening on ipyc port {shard.ipc_port}')
+            asyncio.run(env.run_simulation(dt=dt, ipc_port=shard.ipc_port, prompt=False))
+    finally:
+        exchange.close()
+
+
+class ShardCoordinator:
+    """
+    Starts one process per shard and keeps them in lockstep with a barrier over shared memory.
+    """
+
+    def __init__(self, topology: BuildingTopology, num_shards: int):
+        self.topology = topology
+        self.shards = split_topology(topology, num_shards)
+        self.num_rooms = len(topology.names)
+        self.memory = SharedMemory(create=True, size=2 * self.num_rooms * np.dtype(np.float64).itemsize)
+        self.barrier = Barrier(len(self.shards))
+        initial = [topology.outside_temperature] + [spec['temperature'] for spec in topology.room_specs]
+        self.buffers: npt.NDArray[np.float64] = np.ndarray((2, self.num_rooms), dtype=np.float64, buffer=self.memory.buf)
+        self.buffers[:] = initial
+
+    def run(
+            self,
+            steps: Optional[int],
+            dt: float = 10.0,
+            scenario: Optional[Scenario] = None,
+            integrator: str = 'euler',
+    ) -> Dict[str, float]:
+        """
+        Run every shard and return the final temperature of every room.
+
+        With a ``scenario`` the shards run headless for ``steps`` steps, otherwise they wait for devices
+        on their ipyc ports and run until interrupted.
+        """
+        processes = [
+            Process(
+                    target=run_shard,
+                    args=(shard, self.memory.name, self.num_rooms, self.barrier, steps, dt, scenario, integrator),
+            )
+            for shard in self.shards
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+        if any(process.exitcode for process in processes):
+            raise RuntimeError(f'Shard exit codes: {[process.exitcode for process in processes]}')
+
+        # The last step was published to the half of its parity
+        final = self.buffers[(steps - 1) % 2] if steps else self.buffers[0]
+        return {name: float(final[i]) for i, name in enumerate(self.topology.names) if i > 0}
+
+    def close(self):
+        del self.buffers
+        self.memory.close()
+        self.memory.unlink()
+
+
+def run_sharded(
+        topology: BuildingTopology,
+        num_shards: int,
+        steps: int,
+        dt: float = 10.0,
+        scenario: Optional[Scenario] = None,
+        integrator: str = 'euler',
+) -> Dict[str, float]:
+    coordinator = ShardCoordinator(topology, num_shards)
+    try:
+        return coordinator.run(steps, dt, scenario or DEFAULT_SCENARIO, integrator)
+    finally:
+        coordinator.close()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    import argparse
+    import os
+
+    from demo.integrators import INTEGRATORS
+    from demo.topology import grid_topology, load_topology
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--topology', help='JSON or TOML building topology, defaults to a 100 x 100 room grid')
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--steps', type=int, default=8640, help='Headless steps')
+    parser.add_argument('--dt', type=float, default=10.0, help='Simulated seconds per step')
+    parser.add_argument('--integrator', choices=tuple(INTEGRATORS), default='euler')
+    parser.add_argument('--devices', action='store_true', help='Wait for devices instead of running headless')
+    args = parser.parse_args(argv)
+
+    topology = load_topology(args.topology) if args.topology else grid_topology(100, 100)
+    coordinator = ShardCoordinator(topology, args.shards)
+    try:
+        start = time.perf_counter()
+        if args.devices:
+            coordinator.run(None, args.dt, integrator=args.integrator)
+        else:
+            coordinator.run(args.steps, args.dt, DEFAULT_SCENARIO, args.integrator)
+            elapsed = time.perf_counter() - start
+            print(f'{len(coordinator.shards)} shards, {args.steps / elapsed:.1f} steps per second')
+    finally:
+        coordinator.close()
+
+
+if __name__ == '__main__':
+    main()
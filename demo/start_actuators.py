@@ -1,60 +1,65 @@
-from typing import Tuple
+from typing import TYPE_CHECKING, Dict, Tuple
 import itertools
-from multiprocessing import Process
 import time
 
-from demo.devices.arrowhead_a_devices import Heater
-from demo.devices.arrowhead_b_devices import Cooler
-
+from demo.launcher import start_processes
 from demo.utils import get_core_config
 from demo.utils import ROOM_COORDINATES, ROOM_NAMES, actuator_a_ports, actuator_b_ports
 
+if TYPE_CHECKING:
+    from demo.devices.arrowhead_a_devices import Heater
+    from demo.devices.arrowhead_b_devices import Cooler
+
+
+def create_actuator_a(room_name: str, room_position: Tuple[int, int], port: int, config: Dict) -> 'Heater':
+    # Device modules are imported on first use, they are preloaded by the launcher's forkserver
+    from demo.devices.arrowhead_a_devices import Heater
 
-def start_actuator_a(room_name: str, room_position: Tuple[int, int], port: int):
-    config = get_core_config()
     system_name = f'{room_name}_actuator'
 
-    heater = Heater.create(
+    return Heater.create(
             system_name=system_name,
             address='172.16.1.1',
             port=port,
             config=config
     )
 
-    heater.run_forever()
-
 
-def start_actuator_b(room_name: str, room_position: Tuple[int, int], port: int):
-    config = get_core_config()
+def create_actuator_b(room_name: str, room_position: Tuple[int, int], port: int, config: Dict) -> 'Cooler':
+    from demo.devices.arrowhead_b_devices import Cooler
 
-    cooler = Cooler.create(
+    return Cooler.create(
             system_name='actuator_cooler',
             room_name=room_name,
-            coordinates=room_position,
+            coordinate=room_position,
             address='172.16.1.1',
             port=port,
             config=config,
     )
 
+
+def start_actuator_a(room_name: str, room_position: Tuple[int, int], port: int):
+    heater = create_actuator_a(room_name, room_position, port, get_core_config())
+
+    heater.run_forever()
+
+
+def start_actuator_b(room_name: str, room_position: Tuple[int, int], port: int):
+    cooler = create_actuator_b(room_name, room_position, port, get_core_config())
+
     cooler.run_forever()
 
 
 def main():
-    actuator_a_processes = [
-        Process(target=start_actuator_a, args=(room_name, pos, port))
+    actuator_a_targets = [
+        (start_actuator_a, (room_name, pos, port))
         for room_name, pos, port in zip(ROOM_NAMES, ROOM_COORDINATES, actuator_a_ports())
     ]
-    actuator_b_processes = [
-        Process(target=start_actuator_b, args=(room_name, pos, port))
+    actuator_b_targets = [
+        (start_actuator_b, (room_name, pos, port))
         for room_name, pos, port in zip(ROOM_NAMES, ROOM_COORDINATES, actuator_b_ports())
     ]
-        #Process(target=start_sensor_b, args=(room_name, pos, port))
-        #for room_name, pos, port in zip(ROOM_NAMES, ROOM_COORDINATES, itertools.count(5010))
-    #]
-    processes = itertools.chain(actuator_a_processes, actuator_b_processes)
-    for process in processes:
-        process.start()
-        print(f'Started process with {process.pid = }')
+    start_processes(list(itertools.chain(actuator_a_targets, actuator_b_targets)))
     while True:
         time.sleep(20)
 
@@ -1,74 +1,82 @@
 import asyncio
-from typing import Tuple
+from typing import TYPE_CHECKING, Dict, Sequence, Tuple
 import itertools
-from multiprocessing import Process
 import time
 
-from pyrrowhead.management.systemregistry import _add_system
-
-from demo.devices.arrowhead_a_devices import Controller as ControllerA
-from demo.devices.arrowhead_b_devices import Controller as ControllerB
-from demo.utils import get_core_config
+from demo.launcher import start_processes
+from demo.utils import DeviceSpec, device_specs, get_core_config
 from demo.utils import ROOM_COORDINATES, ROOM_NAMES, controller_a_ports, controller_b_ports
 
+if TYPE_CHECKING:
+    from demo.devices.arrowhead_a_devices import Controller as ControllerA
+    from demo.devices.arrowhead_b_devices import Controller as ControllerB
+
+
+def create_controller_a(room_name: str, room_position: Tuple[int, int], port: int, config: Dict) -> 'ControllerA':
+    # Device modules are imported on first use, they are preloaded by the launcher's forkserver
+    from demo.devices.arrowhead_a_devices import Controller as ControllerA
 
-def start_controller_a(room_name: str, room_position: Tuple[int, int], port: int):
-    config = get_core_config()
     system_name = f'{room_name}_controller'
 
-    controller = ControllerA.create(
+    return ControllerA.create(
             system_name=system_name,
             address='172.16.1.1',
             port=port,
             config=config
     )
 
-    system = controller.system
-    try:
-        _add_system(system.system_name, system.address, system.port)
-    except:
-        print("NOPE, PYRROWHEAD DOESN'T WORK IN YOUR SHODDY PROGRAM")
-
-    asyncio.run(controller.main())
 
+def create_controller_b(room_name: str, room_position: Tuple[int, int], port: int, config: Dict) -> 'ControllerB':
+    from demo.devices.arrowhead_b_devices import Controller as ControllerB
 
-def start_controller_b(room_name: str, room_position: Tuple[int, int], port: int):
-    config = get_core_config()
-
-    controller = ControllerB.create(
+    return ControllerB.create(
             system_name='controller_cooler',
             room_name=room_name,
-            coordinates=room_position,
+            coordinate=room_position,
             address='172.16.1.1',
             port=port,
             config=config,
     )
 
-    system = controller.system
+
+def register_controller_systems(specs: Sequence[DeviceSpec]):
+    """
+    Add the systems of the controllers in ``specs`` to the service registry, once from the launching process.
+
+    Controllers provide no services, so they are not registered like the sensors and actuators when they start.
+    """
+    # Imported here so that device processes do not import the registration client
+    from demo.registration import main as register
+
     try:
-        _add_system(system.system_name, system.address, system.port)
-    except:
-        print("NOPE, PYRROWHEAD DOESN'T WORK IN YOUR SHODDY PROGRAM")
+        register(stages=('systems',), specs=[spec for spec in specs if spec['kind'].startswith('controller')])
+    except OSError as e:
+        print(f'Could not register controller systems: {e}')
+
+
+def start_controller_a(room_name: str, room_position: Tuple[int, int], port: int):
+    controller = create_controller_a(room_name, room_position, port, get_core_config())
+
+    asyncio.run(controller.main())
+
+
+def start_controller_b(room_name: str, room_position: Tuple[int, int], port: int):
+    controller = create_controller_b(room_name, room_position, port, get_core_config())
 
     asyncio.run(controller.main())
 
 
 def main():
-    controller_a_processes = [
-        Process(target=start_controller_a, args=(room_name, pos, port))
+    register_controller_systems(device_specs())
+    controller_a_targets = [
+        (start_controller_a, (room_name, pos, port))
         for room_name, pos, port in zip(ROOM_NAMES, ROOM_COORDINATES, controller_a_ports())
     ]
-    controller_b_processes = [
-        Process(target=start_controller_b, args=(room_name, pos, port))
+    controller_b_targets = [
+        (start_controller_b, (room_name, pos, port))
         for room_name, pos, port in zip(ROOM_NAMES, ROOM_COORDINATES, controller_b_ports())
     ]
-    #Process(target=start_sensor_b, args=(room_name, pos, port))
-    #for room_name, pos, port in zip(ROOM_NAMES, ROOM_COORDINATES, itertools.count(5010))
-    #]
-    processes = itertools.chain(controller_a_processes, controller_b_processes)
-    for process in processes:
-        process.start()
-        print(f'Started process with {process.pid = }')
+    start_processes(list(itertools.chain(controller_a_targets, controller_b_targets)))
     while True:
         time.sleep(20)
 
@@ -0,0 +1,131 @@
+"""
+Room temperatures, setpoints, and the timestep, published by the environment in shared memory.
+
+Devices on the same host read them directly instead of asking the environment over ipyc. The block
+starts with a sequence counter that the writer makes odd while it writes and even when it is done,
+so readers retry whenever the counter was odd or changed during their read (a seqlock).
+
+Layout: ``int64 sequence, int64 timestep, int64 rooms, int64 names length``, then ``rooms`` float64
+temperatures, ``rooms`` float64 setpoints, and the room names as a JSON list.
+"""
+import asyncio
+import json
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+HEADER_SIZE = 4 * 8
+# Attempts of a read before it gives up while the writer is publishing, and the caller yields instead
+SPIN_LIMIT = 64
+
+
+class _StateBlock:
+    def __init__(self, memory: SharedMemory, num_rooms: int):
+        self.memory = memory
+        self.header: npt.NDArray[np.int64] = np.ndarray((4,), dtype=np.int64, buffer=memory.buf)
+        self.temperatures: npt.NDArray[np.float64] = np.ndarray(
+                (num_rooms,), dtype=np.float64, buffer=memory.buf, offset=HEADER_SIZE,
+        )
+        self.setpoints: npt.NDArray[np.float64] = np.ndarray(
+                (num_rooms,), dtype=np.float64, buffer=memory.buf, offset=HEADER_SIZE + 8 * num_rooms,
+        )
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def close(self):
+        del self.header, self.temperatures, self.setpoints
+        self.memory.close()
+
+
+class StatePlane(_StateBlock):
+    """
+    Writer side, owned by the environment.
+    """
+
+    def __init__(self, room_names: Sequence[str], name: Optional[str] = None):
+        names = json.dumps(list(room_names)).encode()
+        num_rooms = len(room_names)
+        memory = SharedMemory(name=name, create=True, size=HEADER_SIZE + 16 * num_rooms + len(names))
+        super().__init__(memory, num_rooms)
+        self.header[:] = (0, -1, num_rooms, len(names))
+        memory.buf[HEADER_SIZE + 16 * num_rooms:HEADER_SIZE + 16 * num_rooms + len(names)] = names
+
+    def publish(self, timestep: int, temperatures: npt.ArrayLike, setpoints: npt.ArrayLike):
+        """
+        Publish the state of ``timestep``, ``temperatures`` and ``setpoints`` are ordered like the room names.
+        """
+        header = self.header
+        header[0] += 1
+        self.temperatures[:] = temperatures
+        self.setpoints[:] = setpoints
+        header[1] = timestep
+        header[0] += 1
+
+    def unlink(self):
+        self.close()
+        self.memory.unlink()
+
+
+class StatePlaneReader(_StateBlock):
+    """
+    Reader side, shared by every device in a process.
+    """
+
+    def __init__(self, name: str, poll_interval: float = 0.001):
+        memory = SharedMemory(name=name)
+        num_rooms, names_length = (int(value) for value in np.ndarray((4,), dtype=np.int64, buffer=memory.buf)[2:])
+        start = HEADER_SIZE + 16 * num_rooms
+        self.room_names: Tuple[str, ...] = tuple(json.loads(bytes(memory.buf[start:start + names_length])))
+        super().__init__(memory, num_rooms)
+        self.index: Dict[str, int] = {room_name: i for i, room_name in enumerate(self.room_names)}
+        self.poll_interval = poll_interval
+
+    def read(self, room_name: str) -> Optional[Tuple[float, float, int]]:
+        """
+        Consistent temperature, setpoint, and timestep of ``room_name``, without waiting.
+
+        Returns None if the writer was publishing during all :data:`SPIN_LIMIT` attempts.
+        """
+        i = self.index[room_name]
+        header = self.header
+        for _ in range(SPIN_LIMIT):
+            sequence = int(header[0])
+            if sequence % 2 == 0:
+                temperature, setpoint, timestep = float(self.temperatures[i]), float(self.setpoints[i]), int(header[1])
+                if int(header[0]) == sequence:
+                    return temperature, setpoint, timestep
+
+        return None
+
+    async def temperature(self, room_name: str, after_timestep: int = -1) -> Dict:
+        """
+        Temperature of ``room_name`` once a step later than ``after_timestep`` has been published,
+        in the same format as the environment's ipyc replies.
+
+        Polls with a delay that doubles from a few microseconds up to ``poll_interval``, so a step
+        that is about to be published is picked up quickly without spinning through a long wait.
+        A read that overlaps a publish waits the same way.
+        """
+        delay = 0.0
+        while True:
+            state = self.read(room_name)
+            if state is not None and state[2] > after_timestep:
+                return {"temp": state[0], "timestep": state[2]}
+            await asyncio.sleep(delay)
+            delay = min(self.poll_interval, 2 * delay or 1e-5)
+
+    async def setpoint(self, room_name: str) -> Dict:
+        """
+        Setpoint of ``room_name`` once the first step has been published.
+        """
+        delay = 0.0
+        while True:
+            state = self.read(room_name)
+            if state is not None and state[2] >= 0:
+                return {"setpoint": state[1], "timestep": state[2]}
+            await asyncio.sleep(delay)
+            delay = min(self.poll_interval, 2 * delay or 1e-5)
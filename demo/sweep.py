@@ -0,0 +1,140 @@
+"""
+Controller tuning sweeps, runs many headless scenarios in parallel worker processes.
+
+    python -m demo.sweep --grid 'heater_k_P=[10, 20, 40]' 'setpoint=[298, [293, 298, 298, 293]]' --output sweep.jsonl
+    python -m demo.sweep --random 'heater_k_P=[1, 100]' 'heater_k_I=[0.1, 5]' --samples 1000 --output sweep.jsonl
+"""
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import json
+import os
+import random
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from demo.headless import HeadlessEngine, Scenario
+from demo.integrators import INTEGRATORS
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.topology import BuildingTopology, load_topology
+
+# Engine and run length of the current worker process, set by _init_worker
+_worker_engine: Optional[HeadlessEngine] = None
+_worker_run: Tuple[int, float] = (0, 0.0)
+
+
+def grid(axes: Mapping[str, Sequence[Any]]) -> List[Scenario]:
+    """
+    Every combination of the values of ``axes``, a mapping from scenario field to values.
+    """
+    names = list(axes)
+    return [
+        dict(zip(names, values), name=str(i))  # type: ignore
+        for i, values in enumerate(itertools.product(*(axes[name] for name in names)))
+    ]
+
+
+def random_sample(ranges: Mapping[str, Tuple[float, float]], samples: int, seed: int = 0) -> List[Scenario]:
+    """
+    ``samples`` scenarios with every field drawn uniformly from its ``(low, high)`` range.
+    """
+    rng = random.Random(seed)
+    return [
+        {**{name: rng.uniform(low, high) for name, (low, high) in ranges.items()}, 'name': str(i)}  # type: ignore
+        for i in range(samples)
+    ]
+
+
+def _init_worker(topology: Optional[BuildingTopology], steps: int, dt: float, integrator: str):
+    global _worker_engine, _worker_run
+    # Each worker builds its environment once and reuses it for every scenario it is given
+    _worker_engine = HeadlessEngine(ArrowheadEnvironment(topology, verbose=False, integrator=integrator))
+    _worker_run = (steps, dt)
+
+
+def _run_scenario(scenario: Scenario) -> Dict:
+    assert _worker_engine is not None
+    steps, dt = _worker_run
+    return {**scenario, **_worker_engine.run(scenario, steps, dt)}
+
+
+def run_sweep(
+        scenarios: Sequence[Scenario],
+        steps: int,
+        dt: float = 10.0,
+        topology: Optional[BuildingTopology] = None,
+        workers: Optional[int] = None,
+        output: Optional[str] = None,
+        integrator: str = 'euler',
+) -> Iterator[Dict]:
+    """
+    Run ``scenarios`` on ``workers`` processes, yielding each result in order as soon as it is ready.
+
+    Results are also appended to the JSON lines file ``output``, one line per scenario, as they arrive.
+    Scenarios are sent to the workers in chunks, so that a sweep scales with the number of cores
+    instead of being limited by inter-process communication.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(scenarios) // (4 * workers))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(topology, steps, dt, integrator)) as executor:
+        results_file = open(output, 'a') if output else None
+        try:
+            for result in executor.map(_run_scenario, scenarios, chunksize=chunksize):
+                if results_file is not None:
+                    results_file.write(json.dumps(result) + '\n')
+                    results_file.flush()
+                yield result
+        finally:
+            if results_file is not None:
+                results_file.close()
+
+
+def report(results: Sequence[Dict]) -> str:
+    if not results:
+        return '0 scenarios, no results'
+
+    best_comfort = min(results, key=lambda result: (result['discomfort'], result['energy']))
+    least_energy = min(results, key=lambda result: result['energy'])
+    return '\n'.join([
+        f'{len(results)} scenarios',
+        f'Best comfort: {best_comfort}',
+        f'Least energy: {least_energy}',
+    ])
+
+
+def _parse_axes(specs: Sequence[str]) -> Dict[str, Any]:
+    # name=<JSON value>
+    axes = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        axes[name] = json.loads(values)
+
+    return axes
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--topology', help='JSON or TOML building topology, defaults to the Lübeck A-building')
+    parser.add_argument('--grid', nargs='+', default=[], help='Scenario field and JSON list of values to combine')
+    parser.add_argument('--random', nargs='+', default=[], help='Scenario field and JSON [low, high] range to sample')
+    parser.add_argument('--samples', type=int, default=100, help='Number of random scenarios')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--steps', type=int, default=8640, help='Steps per scenario')
+    parser.add_argument('--dt', type=float, default=10.0, help='Simulated seconds per step')
+    parser.add_argument('--workers', type=int, help='Worker processes, defaults to the CPU count')
+    parser.add_argument('--output', help='JSON lines file the results are appended to')
+    parser.add_argument('--integrator', choices=tuple(INTEGRATORS), default='euler')
+    args = parser.parse_args(argv)
+
+    if args.random:
+        scenarios = random_sample(_parse_axes(args.random), args.samples, args.seed)
+    else:
+        scenarios = grid(_parse_axes(args.grid))
+    topology = load_topology(args.topology) if args.topology else None
+
+    results = list(run_sweep(scenarios, args.steps, args.dt, topology, args.workers, args.output, args.integrator))
+    print(report(results))
+
+
+if __name__ == '__main__':
+    main()
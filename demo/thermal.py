@@ -0,0 +1,141 @@
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+
+from demo.integrators import ExplicitEuler, Integrator
+from demo.room import Room
+
+
+class ThermalModel:
+    """
+    Vectorized thermal model of a building.
+
+    Temperatures, heat capacities and the weighted neighbor conductances of all rooms are stored in
+    NumPy arrays, so that one simulation step is a single sparse matrix-vector product instead of
+    one ``Room.update_temperature`` call per room.
+
+    Args:
+        names: Room names, the position of a name is the index of that room in every array.
+        temperatures: Initial room temperatures in Kelvin.
+        heat_capacities: Room heat capacities, ``inf`` for rooms that do not react to power.
+        static: ``True`` for rooms with a fixed temperature, e.g. the outside.
+        conductance: Matrix where element ``(i, j)`` is the multiplier of neighbor ``j`` of room ``i``.
+        integrator: How :meth:`step` advances the temperatures, explicit Euler by default.
+    """
+
+    def __init__(
+            self,
+            names: Sequence[str],
+            temperatures: npt.ArrayLike,
+            heat_capacities: npt.ArrayLike,
+            static: npt.ArrayLike,
+            conductance: sparse.spmatrix,
+            integrator: Optional[Integrator] = None,
+    ):
+        self.names = tuple(names)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.temperatures = np.array(temperatures, dtype=np.float64)
+        self.heat_capacities = np.array(heat_capacities, dtype=np.float64)
+        self.static = np.array(static, dtype=bool)
+        self.conductance = sparse.csr_matrix(conductance, dtype=np.float64)
+
+        self.integrator = integrator or ExplicitEuler()
+
+        self._inverse_capacity = np.where(self.static, 0.0, 1.0 / self.heat_capacities)
+        self._laplacian = self._build_laplacian()
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def inverse_capacity(self) -> npt.NDArray[np.float64]:
+        return self._inverse_capacity
+
+    @property
+    def laplacian(self) -> sparse.csr_matrix:
+        return self._laplacian
+
+    def _build_laplacian(self) -> sparse.csr_matrix:
+        degree = np.asarray(self.conductance.sum(axis=1)).ravel()
+        laplacian = sparse.diags(degree) - self.conductance
+        # Static rooms are boundary conditions, so their rows never contribute to a step
+        free = sparse.diags((~self.static).astype(np.float64))
+        return sparse.csr_matrix(free @ laplacian)
+
+    @classmethod
+    def from_rooms(
+            cls,
+            rooms: Mapping[str, Room],
+            conductance: Optional[sparse.spmatrix] = None,
+            integrator: Optional[Integrator] = None,
+    ) -> 'ThermalModel':
+        """
+        Create a model from ``rooms`` and turn every room into a view over the model state.
+
+        If ``conductance`` is not given it is assembled from the ``neighbors`` of each room,
+        otherwise it must be ordered the same way as ``rooms``.
+        """
+        names = list(rooms)
+        if conductance is None:
+            conductance = neighbor_conductance(rooms)
+
+        model = cls(
+                names=names,
+                temperatures=[room.temperature for room in rooms.values()],
+                heat_capacities=[room.heat_capacity for room in rooms.values()],
+                static=[room.static for room in rooms.values()],
+                conductance=conductance,
+                integrator=integrator,
+        )
+
+        for i, room in enumerate(rooms.values()):
+            room.bind(model.temperatures, i)
+
+        return model
+
+    def power_vector(self, power: Mapping[str, float]) -> npt.NDArray[np.float64]:
+        power_vector = np.zeros(len(self.names))
+        for room_name, room_power in power.items():
+            power_vector[self.index[room_name]] = room_power
+
+        return power_vector
+
+    def derivative(
+            self,
+            temperatures: npt.NDArray[np.float64],
+            coefficient: float,
+            power: npt.ArrayLike,
+    ) -> npt.NDArray[np.float64]:
+        return self._inverse_capacity * power - coefficient * (self._laplacian @ temperatures)
+
+    def step(self, dt: float, coefficient: float, power: npt.ArrayLike) -> None:
+        """
+        Advance all room temperatures one step of length ``dt`` with the model's integrator.
+
+        Args:
+            dt: Step length.
+            coefficient: Scale factor of the conductances.
+            power: Heating (positive) or cooling (negative) power per room, ordered as ``names``.
+        """
+        # Integrators update the array in-place, the rooms are views over it
+        self.integrator.step(self, dt, coefficient, power)
+
+
+def neighbor_conductance(rooms: Mapping[str, Room]) -> sparse.csr_matrix:
+    """
+    Conductance matrix built from the ``neighbors`` multipliers of ``rooms``.
+    """
+    index = {name: i for i, name in enumerate(rooms)}
+
+    rows, cols, multipliers = [], [], []
+    for i, room in enumerate(rooms.values()):
+        for neighbor_name, (multiplier, _) in room.neighbors.items():
+            if neighbor_name not in index:
+                continue
+            rows.append(i)
+            cols.append(index[neighbor_name])
+            multipliers.append(multiplier)
+
+    return sparse.csr_matrix((multipliers, (rows, cols)), shape=(len(index), len(index)))
@@ -0,0 +1,258 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple, TypedDict, Union
+import json
+
+import numpy as np
+from scipy import sparse
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None  # type: ignore
+
+from demo.room import Room
+from demo.utils import ROOM_COORDINATES
+
+DEFAULT_TEMPERATURE = 273.0
+DEFAULT_HEAT_CAPACITY = 46e3
+OUTSIDE_NAME = 'OO'
+
+
+class RoomSpec(TypedDict):
+    name: str
+    position: Tuple[float, float]
+    heat_capacity: float
+    temperature: float
+
+
+class BuildingTopology:
+    """
+    Rooms and couplings of a building, together with a CSR adjacency index over them.
+
+    The adjacency index is built once, row ``i`` holds the neighbors of room ``i`` and their multipliers.
+    Index 0 is always the outside, the next indices follow the order of ``rooms`` and then ``ghosts``.
+
+    Args:
+        rooms: Room specifications.
+        couplings: Undirected ``(room, room, multiplier)`` couplings between rooms.
+        boundaries: Multiplier of the coupling between a room and the outside.
+        outside_name: Name of the outside.
+        outside_temperature: Initial outside temperature in Kelvin.
+        outside_position: Position of the outside.
+        ghosts: Rooms simulated elsewhere, e.g. by another shard. They are static like the outside and
+            their temperature is set from outside of the model, and they are not part of ``room_names``.
+    """
+
+    def __init__(
+            self,
+            rooms: Sequence[RoomSpec],
+            couplings: Iterable[Tuple[str, str, float]],
+            boundaries: Mapping[str, float],
+            outside_name: str = OUTSIDE_NAME,
+            outside_temperature: float = DEFAULT_TEMPERATURE,
+            outside_position: Tuple[float, float] = (0, 2),
+            ghosts: Sequence[RoomSpec] = (),
+    ):
+        self.room_specs = list(rooms)
+        self.ghost_specs = list(ghosts)
+        self.outside_name = outside_name
+        self.outside_temperature = outside_temperature
+        self.outside_position = outside_position
+        self.names: Tuple[str, ...] = (
+            outside_name,
+            *(spec['name'] for spec in self.room_specs),
+            *(spec['name'] for spec in self.ghost_specs),
+        )
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            raise ValueError('Room names in a topology must be unique')
+
+        rows: List[int] = []
+        cols: List[int] = []
+        multipliers: List[float] = []
+        for room_a, room_b, multiplier in couplings:
+            a, b = self.index[room_a], self.index[room_b]
+            rows.extend((a, b))
+            cols.extend((b, a))
+            multipliers.extend((multiplier, multiplier))
+        # The outside is static, so boundary couplings only go one way
+        for room_name, multiplier in boundaries.items():
+            rows.append(self.index[room_name])
+            cols.append(0)
+            multipliers.append(multiplier)
+
+        self.adjacency = sparse.csr_matrix(
+                (np.array(multipliers, dtype=np.float64), (rows, cols)),
+                shape=(len(self.names), len(self.names)),
+        )
+        self.adjacency.sum_duplicates()
+
+    @property
+    def room_names(self) -> Tuple[str, ...]:
+        return self.names[1:1 + len(self.room_specs)]
+
+    @property
+    def ghost_names(self) -> Tuple[str, ...]:
+        return self.names[1 + len(self.room_specs):]
+
+    def neighbors(self, room_name: str) -> Dict[str, float]:
+        i = self.index[room_name]
+        start, end = self.adjacency.indptr[i], self.adjacency.indptr[i + 1]
+        return {
+            self.names[j]: multiplier
+            for j, multiplier in zip(self.adjacency.indices[start:end], self.adjacency.data[start:end])
+        }
+
+    def create_rooms(self) -> Dict[str, Room]:
+        """
+        Create one ``Room`` per entry in ``names``, with neighbors taken from the adjacency index.
+        """
+        outside = Room(
+                name=self.outside_name,
+                temperature=self.outside_temperature,
+                heat_capacity=float('inf'),
+                position=self.outside_position,
+                static=True,
+        )
+        rooms = {outside.name: outside} | {
+            spec['name']: Room(
+                    name=spec['name'],
+                    temperature=spec['temperature'],
+                    heat_capacity=spec['heat_capacity'],
+                    position=spec['position'],
+            ) for spec in self.room_specs
+        } | {
+            spec['name']: Room(
+                    name=spec['name'],
+                    temperature=spec['temperature'],
+                    heat_capacity=float('inf'),
+                    position=spec['position'],
+                    static=True,
+            ) for spec in self.ghost_specs
+        }
+
+        room_list = list(rooms.values())
+        indptr, indices, data = self.adjacency.indptr, self.adjacency.indices, self.adjacency.data
+        for i, room in enumerate(room_list):
+            room.add_neighbors(
+                    (float(data[k]), room_list[indices[k]]) for k in range(indptr[i], indptr[i + 1])
+            )
+
+        return rooms
+
+    @classmethod
+    def from_dict(cls, description: Mapping) -> 'BuildingTopology':
+        """
+        Create a topology from a mapping of the same format as the JSON and TOML topology files::
+
+            {
+                "outside": {"name": "OO", "temperature": 273.0, "position": [0, 2]},
+                "defaults": {"temperature": 273.0, "heat_capacity": 46000.0},
+                "rooms": [{"name": "A11", "position": [0, 0]}, ...],
+                "couplings": [["A11", "A12", 1], ...],
+                "boundaries": {"A11": 2, ...}
+            }
+
+        Everything except ``rooms`` is optional. ``"grid"`` can be given instead of ``rooms``,
+        ``couplings`` and ``boundaries``, in which case its contents are passed to :func:`grid_topology`.
+        """
+        if 'grid' in description:
+            return grid_topology(**description['grid'])
+
+        outside = description.get('outside', {})
+        defaults = description.get('defaults', {})
+        default_temperature = defaults.get('temperature', DEFAULT_TEMPERATURE)
+        default_heat_capacity = defaults.get('heat_capacity', DEFAULT_HEAT_CAPACITY)
+        rooms: List[RoomSpec] = [
+            {
+                'name': room['name'],
+                'position': tuple(room.get('position', (0, 0))),  # type: ignore
+                'heat_capacity': room.get('heat_capacity', default_heat_capacity),
+                'temperature': room.get('temperature', default_temperature),
+            } for room in description['rooms']
+        ]
+
+        return cls(
+                rooms,
+                [tuple(coupling) for coupling in description.get('couplings', [])],  # type: ignore
+                description.get('boundaries', {}),
+                outside_name=outside.get('name', OUTSIDE_NAME),
+                outside_temperature=outside.get('temperature', DEFAULT_TEMPERATURE),
+                outside_position=tuple(outside.get('position', (0, 2))),  # type: ignore
+        )
+
+
+def load_topology(path: Union[str, Path]) -> BuildingTopology:
+    """
+    Load a topology from a ``.json`` or ``.toml`` file, see :meth:`BuildingTopology.from_dict` for the format.
+    """
+    path = Path(path)
+    if path.suffix == '.toml':
+        if tomllib is None:
+            raise RuntimeError('TOML topologies require Python 3.11 or newer')
+        with open(path, 'rb') as topology_toml:
+            description = tomllib.load(topology_toml)
+    else:
+        with open(path, 'r') as topology_json:
+            description = json.load(topology_json)
+
+    return BuildingTopology.from_dict(description)
+
+
+def grid_topology(
+        rows: int,
+        columns: int,
+        floors: int = 1,
+        heat_capacity: float = DEFAULT_HEAT_CAPACITY,
+        temperature: float = DEFAULT_TEMPERATURE,
+        wall_multiplier: float = 1,
+        floor_multiplier: float = 1,
+        name_format: str = 'F{floor}R{row}C{column}',
+) -> BuildingTopology:
+    """
+    Procedurally generate a building with ``floors`` floors of ``rows`` x ``columns`` rooms.
+
+    Rooms are coupled to the rooms next to them on the same floor and to the rooms directly above and below.
+    Every exterior wall of a room adds ``wall_multiplier`` to its coupling with the outside,
+    so corner rooms are coupled twice as strongly as the other rooms along the facade.
+    Indices in ``name_format`` start at 1.
+    """
+    def name(floor: int, row: int, column: int) -> str:
+        return name_format.format(floor=floor + 1, row=row + 1, column=column + 1)
+
+    rooms: List[RoomSpec] = []
+    couplings: List[Tuple[str, str, float]] = []
+    boundaries: Dict[str, float] = {}
+    for floor in range(floors):
+        for row in range(rows):
+            for column in range(columns):
+                room_name = name(floor, row, column)
+                rooms.append({
+                    'name': room_name,
+                    'position': (column, row + floor * rows),
+                    'heat_capacity': heat_capacity,
+                    'temperature': temperature,
+                })
+                if column + 1 < columns:
+                    couplings.append((room_name, name(floor, row, column + 1), wall_multiplier))
+                if row + 1 < rows:
+                    couplings.append((room_name, name(floor, row + 1, column), wall_multiplier))
+                if floor + 1 < floors:
+                    couplings.append((room_name, name(floor + 1, row, column), floor_multiplier))
+
+                exterior_walls = (row == 0) + (row == rows - 1) + (column == 0) + (column == columns - 1)
+                if exterior_walls:
+                    boundaries[room_name] = wall_multiplier * exterior_walls
+
+    return BuildingTopology(rooms, couplings, boundaries, outside_temperature=temperature)
+
+
+def lubeck_topology() -> BuildingTopology:
+    """
+    The two rows of four offices used in the Lübeck demo, named ``ROOM_NAMES`` and placed at ``ROOM_COORDINATES``.
+    """
+    topology = grid_topology(2, 4, name_format='A{row}{column}')
+    for spec, position in zip(topology.room_specs, ROOM_COORDINATES):
+        spec['position'] = position
+
+    return topology
@@ -1,5 +1,6 @@
 import itertools
 import json
+from typing import Dict, List, Sequence, Tuple, TypedDict
 
 ROOM_NAMES = ('A11', 'A12', 'A13', 'A14', 'A21', 'A22', 'A23', 'A24')
 ROOM_COORDINATES = ((0, 0), (1, 0), (2, 0), (3, 0), (1, 1), (2, 1), (3, 1), (4, 1))
@@ -8,6 +9,8 @@ def get_core_config():
     with open('core_config.json', 'r') as config_json:
         config = json.load(config_json)
 
+    return config
+
 
 address = '172.16.1.1'
 sensor_a_ports = lambda: itertools.count(5000)
@@ -24,4 +27,52 @@ zipped_ports = lambda: zip(
         sensor_b_ports(),
         actuator_b_ports(),
         controller_b_ports()
-)
\ No newline at end of file
+)
+
+DEVICE_KINDS = ('sensor_a', 'sensor_b', 'actuator_a', 'actuator_b', 'controller_a', 'controller_b')
+SYSTEM_NAME_FORMATS = {
+    'sensor_a': '{room_name}_temp_sensor',
+    'actuator_a': '{room_name}_actuator',
+    'controller_a': '{room_name}_controller',
+    'sensor_b': 'temp_sensor_cooler',
+    'actuator_b': 'actuator_cooler',
+    'controller_b': 'controller_cooler',
+}
+
+
+class DeviceSpec(TypedDict):
+    kind: str
+    room_name: str
+    position: Tuple[int, int]
+    port: int
+
+
+def system_name(kind: str, room_name: str) -> str:
+    return SYSTEM_NAME_FORMATS[kind].format(room_name=room_name)
+
+
+def device_specs(
+        room_names: Sequence[str] = ROOM_NAMES,
+        room_coordinates: Sequence[Tuple[int, int]] = ROOM_COORDINATES,
+) -> List[DeviceSpec]:
+    """
+    Specifications of every sensor, actuator, and controller of both flavors in every room.
+    """
+    if len(room_names) <= 10:
+        kind_ports = {
+            'sensor_a': sensor_a_ports(),
+            'sensor_b': sensor_b_ports(),
+            'actuator_a': actuator_a_ports(),
+            'actuator_b': actuator_b_ports(),
+            'controller_a': controller_a_ports(),
+            'controller_b': controller_b_ports(),
+        }
+    else:
+        # The fixed port ranges above only leave room for ten rooms per kind
+        kind_ports = {kind: itertools.count(5000 + i * len(room_names)) for i, kind in enumerate(DEVICE_KINDS)}
+
+    return [
+        {'kind': kind, 'room_name': room_name, 'position': position, 'port': next(ports)}
+        for kind, ports in kind_ports.items()
+        for room_name, position in zip(room_names, room_coordinates)
+    ]
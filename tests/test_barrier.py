@@ -0,0 +1,86 @@
+import asyncio
+
+from demo.barrier import PhaseGate, StepBarrier
+
+
+def test_barrier_completes_once_every_device_arrived():
+    barrier = StepBarrier(['A', 'B'])
+
+    assert barrier.arrive('A', 'heater')
+    assert not barrier.arrive('A', 'heater')
+    assert barrier.arrive('A', 'cooler')
+    assert barrier.arrive('B', 'heater')
+    assert not barrier.complete
+    assert barrier.missing() == [('B', 'cooler')]
+
+    barrier.arrive('B', 'cooler')
+
+    assert barrier.complete
+
+
+def test_barrier_only_waits_for_expected_devices():
+    barrier = StepBarrier(['A'], expected=False)
+
+    assert barrier.complete
+    assert barrier.expect('A', 'heater')
+    assert not barrier.expect('A', 'heater')
+    assert barrier.missing() == [('A', 'heater')]
+
+    barrier.arrive('A', 'cooler')
+    assert not barrier.complete
+    barrier.arrive('A', 'heater')
+    assert barrier.complete
+
+    barrier.reset()
+    assert barrier.pending == 1
+
+
+def test_reset_reuses_the_arrival_array():
+    barrier = StepBarrier(['A'])
+    arrived = barrier.arrived
+    barrier.arrive('A', 'heater')
+    barrier.arrive('A', 'cooler')
+
+    barrier.reset()
+
+    assert barrier.arrived is arrived
+    assert barrier.pending == 2
+    assert not barrier.arrived.any()
+
+
+def test_gate_wakes_every_waiter_of_a_generation():
+    async def run():
+        gate = PhaseGate()
+        waiters = [asyncio.create_task(gate.wait_open()) for _ in range(100)]
+        await asyncio.sleep(0)
+        gate.open()
+        generations = await asyncio.gather(*waiters)
+        gate.close()
+
+        late = asyncio.create_task(gate.wait_open())
+        await asyncio.sleep(0)
+        assert not late.done()
+        gate.open()
+        return generations, await late
+
+    generations, late_generation = asyncio.run(asyncio.wait_for(run(), timeout=1))
+
+    assert generations == [1] * 100
+    assert late_generation == 2
+
+
+def test_gate_completion_belongs_to_one_generation():
+    async def run():
+        gate = PhaseGate()
+        gate.open()
+        gate.complete()
+        await gate.wait_complete(timeout=0.1)
+        gate.close()
+        gate.open()
+        try:
+            await gate.wait_complete(timeout=0.01)
+        except asyncio.TimeoutError:
+            return True
+        return False
+
+    assert asyncio.run(run())
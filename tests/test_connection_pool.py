@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from aiohttp import web
+from arrowhead_client import constants
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+from demo.devices.arrowhead_a_devices import Controller
+from demo.devices.connection_pool import ConnectionPools, PooledAiohttpConsumer
+
+
+async def temperature(request):
+    return web.json_response([{"n": "A11_temp_sensor", "t": 0, "u": "K", "v": 293.15}])
+
+
+async def consume_repeatedly(requests):
+    app = web.Application()
+    app.add_routes([web.get('/temperature', temperature)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    rule = OrchestrationRule(
+            Service(
+                    'temperature',
+                    'temperature',
+                    ServiceInterface.from_str('HTTP-INSECURE-JSON'),
+                    constants.AccessPolicy.UNRESTRICTED,
+            ),
+            ArrowheadSystem.make('A11_temp_sensor', '127.0.0.1', port),
+            'GET',
+    )
+    consumer = PooledAiohttpConsumer('', '', '')
+    consumer.pools = ConnectionPools(limit_per_provider=2)
+    await consumer.async_startup()
+    try:
+        responses = [await consumer.consume_service(rule) for _ in range(requests)]
+        metrics = consumer.pools.metrics()[f'127.0.0.1:{port}']
+    finally:
+        await consumer.async_shutdown()
+        await runner.cleanup()
+
+    return responses, metrics
+
+
+def test_consumer_reuses_keep_alive_connection():
+    responses, metrics = asyncio.run(consume_repeatedly(5))
+
+    assert responses[-1].read_json()[0]["v"] == 293.15
+    assert metrics['requests'] == 5
+    assert metrics['connections_created'] == 1
+    assert metrics['connections_reused'] == 4
+    assert metrics['errors'] == 0
+
+
+def test_pools_close_after_every_controller_exits():
+    with open('core_config.json', 'r') as json_config:
+        config = json.load(json_config)
+    pools = ConnectionPools()
+    controllers = [
+        Controller.create(system_name=f'{room_name}_controller', address='127.0.0.1', port=port, config=config)
+        for room_name, port in (('A11', 5200), ('A12', 5201))
+    ]
+    for controller in controllers:
+        controller.consumer.pools = pools
+        # The services of every device class end up in one shared list, controllers provide none of them
+        controller.__arrowhead_services__ = []
+
+    async def run():
+        async with controllers[0], controllers[1]:
+            for controller in controllers:
+                # Like client_setup, which sets up the client a second time
+                await controller.setup()
+            session = pools.pool('127.0.0.1:5000').session
+            assert pools.users == 2
+        return session
+
+    session = asyncio.run(run())
+
+    assert pools.users == 0
+    assert pools.pools == {}
+    assert session.closed
@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from demo.devices.arrowhead_b_devices import Controller
+from demo.devices.controller_bank import ControllerBank
+
+
+def test_bank_matches_controller_control_loop():
+    rng = np.random.default_rng(0)
+    k_P, k_I = rng.uniform(0.1, 40, 50), rng.uniform(0.01, 1, 50)
+    bank = ControllerBank(k_P, k_I, -1.0, 1.0)
+    controllers = [SimpleNamespace(k_P=p, k_I=i, integral=0.0) for p, i in zip(k_P, k_I)]
+    rows = rng.permutation(50)
+
+    for _ in range(20):
+        setpoint, temperature = rng.uniform(290, 300, 50), rng.uniform(285, 305, 50)
+        expected = []
+        for row in rows:
+            controller = controllers[row]
+            controller.setpoint, controller.temperature = setpoint[row], temperature[row]
+            expected.append(Controller.control_loop(controller, 10.0)[0])
+
+        assert np.allclose(bank.update(rows, setpoint[rows], temperature[rows], 10.0), expected)
+    assert np.allclose(bank.integral, [controller.integral for controller in controllers])
+
+
+def test_concurrent_requests_share_one_update():
+    bank = ControllerBank([40.0] * 100, 1.0)
+
+    async def run():
+        return await asyncio.gather(*(bank.control(row, 298.0, 290.0 + row / 10, 10.0) for row in range(100)))
+
+    results = asyncio.run(run())
+
+    assert bank.updates == 1
+    assert bank.rows_updated == 100
+    assert results[0] == (40.0 * 8.0 + 1.0 * 80.0, 0.0)
+    assert all(old_integral == 0.0 for _, old_integral in results)
+
+
+def test_repeated_row_is_computed_in_order():
+    bank = ControllerBank([1.0], 1.0)
+
+    async def run():
+        return await asyncio.gather(bank.control(0, 298.0, 297.0, 1.0), bank.control(0, 298.0, 297.0, 1.0))
+
+    (_, first_integral), (_, second_integral) = asyncio.run(run())
+
+    assert (first_integral, second_integral) == (0.0, 1.0)
+    assert bank.updates == 2
+
+
+def test_cancelled_request_leaves_its_row_untouched():
+    bank = ControllerBank([1.0, 1.0], 1.0)
+
+    async def run():
+        cancelled = asyncio.ensure_future(bank.control(0, 298.0, 297.0, 1.0))
+        kept = asyncio.ensure_future(bank.control(1, 298.0, 297.0, 1.0))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    asyncio.run(run())
+
+    assert bank.integral.tolist() == [0.0, 1.0]
+    assert bank.rows_updated == 1
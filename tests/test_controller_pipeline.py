@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+from demo.devices.arrowhead_a_devices import Controller
+
+with open('core_config.json', 'r') as json_config:
+    config = json.load(json_config)
+
+
+class Stop(Exception):
+    pass
+
+
+class FakeResponse:
+    def __init__(self, message):
+        self.message = message
+
+    def read_json(self):
+        return self.message
+
+
+def pipelined_controller(cycles):
+    controller = Controller.create(system_name='A11_controller', address='127.0.0.1', port=5200, config=config)
+    events = []
+
+    async def nothing(*args, **kwargs):
+        pass
+
+    async def consume_cached(service_definition, **kwargs):
+        events.append(f'{service_definition} start')
+        await asyncio.sleep(0.01)
+        events.append(f'{service_definition} end')
+        if service_definition == 'temperature':
+            return FakeResponse([{"n": "A11_temp_sensor", "t": len(events), "u": "K", "v": 290.0}])
+
+    async def get_setpoint():
+        await asyncio.sleep(0.01)
+        if events.count('temperature start') > cycles:
+            raise Stop()
+        return 298.0, 0
+
+    controller.setup = nothing
+    controller.client_setup = nothing
+    controller.start_orchestration_cache = lambda services: None
+    controller.consume_cached = consume_cached
+    controller.get_setpoint = get_setpoint
+    return controller, events
+
+
+def test_next_reading_overlaps_previous_actuation():
+    controller, events = pipelined_controller(cycles=3)
+
+    with pytest.raises(Stop):
+        asyncio.run(asyncio.wait_for(controller.main(), timeout=5))
+
+    # The second reading is requested before the first actuation has finished
+    second_reading = events.index('temperature start', events.index('temperature start') + 1)
+    assert second_reading < events.index('actuator end')
+    assert events.count('actuator end') == 3
+    assert controller.setpoint == 298.0
+    assert controller.control > 0.0
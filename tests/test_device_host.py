@@ -0,0 +1,27 @@
+from demo.device_host import partition
+from demo.utils import ROOM_NAMES, device_specs
+
+
+def test_partition_covers_every_device_once():
+    specs = device_specs()
+    hosts = partition(specs, 5)
+
+    assert len(specs) == 6 * len(ROOM_NAMES)
+    assert len(hosts) == 5
+    assert sorted(spec['port'] for host in hosts for spec in host) == sorted(spec['port'] for spec in specs)
+
+
+def test_partition_never_creates_empty_hosts():
+    specs = device_specs()[:3]
+
+    assert [len(host) for host in partition(specs, 8)] == [1, 1, 1]
+
+
+def test_partition_by_room_keeps_rooms_together():
+    specs = device_specs()
+    hosts = partition(specs, 3, by_room=True)
+
+    assert sum(len(host) for host in hosts) == len(specs)
+    for host in hosts:
+        for room_name in {spec['room_name'] for spec in host}:
+            assert sum(spec['room_name'] == room_name for spec in host) == 6
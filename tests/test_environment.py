@@ -0,0 +1,215 @@
+import asyncio
+
+import pytest
+
+from demo.devices.ipc_mixin import IPyCBatcher
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.pacing import FixedRate, ScaledRealTime, StepPolicy
+from demo.recorder import MemmapSink, Recording
+
+from benchmarks.inprocess import InProcessDevices, InProcessLink
+
+
+async def control_loop(env, room_name, unit, steps):
+    sensor, actuator = InProcessLink(), InProcessLink()
+    handlers = [asyncio.create_task(env.on_connect(link)) for link in (sensor, actuator)]
+    timesteps = []
+    for _ in range(steps):
+        reading = await sensor.request({"name": room_name, "unit": unit, "system": "sensor"})
+        timesteps.append(reading["timestep"])
+        await actuator.request({"name": room_name, "unit": unit, "system": "actuator", "actuation": 100.0})
+    for handler in handlers:
+        handler.cancel()
+
+    return timesteps
+
+
+async def run_steps(env, steps):
+    env.sync_init()
+    env.simulation_started.set()
+    devices = asyncio.gather(*(
+        control_loop(env, room_name, unit, steps)
+        for room_name in env.room_names
+        for unit in ('heater', 'cooler')
+    ))
+    for _ in range(steps):
+        await env.step(10.0, 0.0, 25.0)
+
+    return await devices
+
+
+def test_step_advances_when_all_devices_checked_in():
+    env = ArrowheadEnvironment()
+
+    timesteps = asyncio.run(asyncio.wait_for(run_steps(env, 3), timeout=5))
+
+    assert env.timestep == 3
+    assert all(device_timesteps == [0, 1, 2] for device_timesteps in timesteps)
+    assert env.heating_power['A11'] == 100.0
+
+
+async def run_batched_steps(env, steps):
+    env.sync_init()
+    env.simulation_started.set()
+    links = {system: InProcessLink() for system in ('sensor', 'actuator')}
+    handlers = [asyncio.create_task(env.on_connect(link)) for link in links.values()]
+    batchers = {system: IPyCBatcher(link.client_side()) for system, link in links.items()}
+
+    async def room_loop(room_name, unit):
+        for _ in range(steps):
+            await batchers['sensor'].request({"name": room_name, "unit": unit, "system": "sensor"})
+            await batchers['actuator'].request(
+                    {"name": room_name, "unit": unit, "system": "actuator", "actuation": 50.0}
+            )
+
+    devices = asyncio.gather(*(
+        room_loop(room_name, unit)
+        for room_name in env.room_names
+        for unit in ('heater', 'cooler')
+    ))
+    for _ in range(steps):
+        await env.step(10.0, 0.0, 25.0)
+    await devices
+    for handler in handlers:
+        handler.cancel()
+
+
+def test_batched_messages_share_one_connection():
+    env = ArrowheadEnvironment()
+    frames = []
+    answer_batch = env.answer_batch
+
+    async def counting_answer_batch(messages):
+        frames.append(len(messages))
+        return await answer_batch(messages)
+
+    env.answer_batch = counting_answer_batch
+
+    asyncio.run(asyncio.wait_for(run_batched_steps(env, 2), timeout=5))
+
+    assert env.timestep == 2
+    assert sum(frames) == 2 * 2 * 2 * len(env.room_names)
+    assert len(frames) < sum(frames)
+    assert env.heating_power['A24'] == 50.0
+
+
+def test_batcher_fails_every_request_of_a_short_reply():
+    link = InProcessLink()
+    batcher = IPyCBatcher(link.client_side())
+
+    async def run():
+        requests = asyncio.gather(
+                batcher.request({"name": "A11", "unit": "heater", "system": "sensor"}),
+                batcher.request({"name": "A12", "unit": "heater", "system": "sensor"}),
+                return_exceptions=True,
+        )
+        frame = await link.receive()
+        await link.send({"replies": [{"temp": 290.0}] * (len(frame["messages"]) - 1)})
+        return await requests
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.closed
+    assert not batcher.connection.is_active()
+    with pytest.raises(ConnectionError):
+        asyncio.run(batcher.request({"name": "A11", "unit": "heater", "system": "sensor"}))
+
+
+def test_batcher_fails_pending_requests_after_an_io_error():
+    class BrokenLink(InProcessLink):
+        async def send(self, message):
+            raise ConnectionResetError('Connection reset by peer')
+
+    batcher = IPyCBatcher(BrokenLink())
+
+    async def run():
+        return await asyncio.gather(
+                batcher.request({"name": "A11", "unit": "heater", "system": "actuator", "actuation": 1.0}),
+                batcher.request({"name": "A12", "unit": "heater", "system": "actuator", "actuation": 1.0}),
+                return_exceptions=True,
+        )
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert all(isinstance(result, ConnectionResetError) for result in results)
+    assert batcher.closed
+
+
+def test_paced_policies():
+    assert FixedRate(4).period(10.0) == 0.25
+    assert ScaledRealTime(100).period(10.0) == 0.1
+    with pytest.raises(TypeError):
+        StepPolicy()  # type: ignore
+
+
+def test_in_process_devices_drive_steps():
+    env = ArrowheadEnvironment(verbose=False)
+
+    async def run(steps):
+        env.sync_init()
+        env.simulation_started.set()
+        devices = InProcessDevices(env)
+        running = devices.start(steps)
+        for _ in range(steps):
+            await env.step(10.0, 0.0, 25.0)
+        await running
+        devices.stop()
+        return devices
+
+    devices = asyncio.run(asyncio.wait_for(run(3), timeout=5))
+
+    assert env.timestep == 3
+    assert len(devices.round_trips) == 3 * 3 * 2 * len(env.room_names)
+    assert set(env.step_timings) == {'read_barrier', 'model', 'update_barrier', 'step'}
+
+
+async def run_without_heater(env, steps):
+    """
+    Run ``steps`` steps in which the heater of A11 reads its temperature but never sends an actuation.
+    """
+    env.sync_init()
+    env.simulation_started.set()
+    devices = asyncio.gather(*(
+        control_loop(env, room_name, unit, steps)
+        for room_name in env.room_names
+        for unit in ('heater', 'cooler')
+        if (room_name, unit) != ('A11', 'heater')
+    ))
+    sensor = InProcessLink()
+    handler = asyncio.create_task(env.on_connect(sensor))
+    readings = []
+    for _ in range(steps):
+        reading = sensor.request({"name": 'A11', "unit": 'heater', "system": "sensor"})
+        readings.append((await asyncio.gather(env.step(10.0, 0.0, 25.0), reading))[1])
+    await devices
+    handler.cancel()
+
+    return readings
+
+
+def test_step_deadline_skips_missing_actuator():
+    env = ArrowheadEnvironment(verbose=False, step_deadline=0.05, missing_policy='zero')
+    env.heating_power['A11'] = 500.0
+
+    asyncio.run(asyncio.wait_for(run_without_heater(env, 2), timeout=5))
+
+    assert env.timestep == 2
+    assert env.deadline_metrics.expired == {'sensor': 0, 'actuator': 2}
+    assert env.deadline_metrics.misses == {('actuator', 'A11', 'heater'): 2}
+    assert env.deadline_metrics.stale['actuator'] == [('A11', 'heater')]
+    assert env.heating_power['A11'] == 0.0
+
+
+def test_stale_policy_keeps_and_flags_missing_actuator(tmp_path):
+    env = ArrowheadEnvironment(verbose=False, step_deadline=0.05, missing_policy='stale')
+    env.start_recording(MemmapSink(tmp_path))
+
+    readings = asyncio.run(asyncio.wait_for(run_without_heater(env, 3), timeout=5))
+    env.stop_recording()
+
+    assert [reading["stale"] for reading in readings] == [False, True, True]
+    assert env.stale_units == {'A11': {'heater'}}
+    stale = Recording(tmp_path).room('A11', 'stale')
+    assert list(stale) == [1.0, 1.0, 1.0]
+    assert not Recording(tmp_path).room('A12', 'stale').any()
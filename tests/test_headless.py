@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from demo.headless import HeadlessEngine, PIControllers, main, profile_values, run_scenarios
+from demo.lubeck_environment import ArrowheadEnvironment
+
+
+def test_pi_controllers_clamp_integral_and_output():
+    controllers = PIControllers(2, k_P=0.1, k_I=0.01, low=-1.0, high=1.0)
+
+    control = controllers.update([300.0, 280.0], [290.0, 290.0], 10.0)
+
+    assert np.allclose(controllers.integral, [1.0, -1.0])
+    assert np.allclose(control, [1.0, -1.0])
+
+
+def test_headless_engine_tracks_setpoint():
+    engine = HeadlessEngine(ArrowheadEnvironment(verbose=False))
+
+    summary = engine.run({'setpoint': 298.0, 'outside_temperature': 10.0}, steps=2000)
+
+    assert engine.env.timestep == 2000
+    assert abs(summary['mean_temperature'] - 298.0) < 1.0
+    assert summary['energy'] > 0
+
+
+def test_scenarios_start_from_the_same_state():
+    first, second = run_scenarios([{'name': 'a'}, {'name': 'b'}], steps=50)
+
+    assert (first['name'], second['name']) == ('a', 'b')
+    assert first['rms_error'] == second['rms_error']
+
+
+@pytest.mark.parametrize('integrator', ['adaptive', 'exact'])
+def test_reset_engine_repeats_the_same_run(integrator):
+    def run(engine):
+        # Long steps, so the adaptive integrator ends a run with a substep shorter than a step
+        summary = engine.run({'outside_temperature': [0.0, 30.0]}, steps=50, dt=600.0)
+        return summary, engine.env.thermal_model.temperatures.copy()
+
+    engine = HeadlessEngine(ArrowheadEnvironment(verbose=False, integrator=integrator))
+    first_summary, first_temperatures = run(engine)
+    second_summary, second_temperatures = run(engine)
+    fresh_summary, fresh_temperatures = run(HeadlessEngine(ArrowheadEnvironment(verbose=False, integrator=integrator)))
+
+    assert first_summary == second_summary == fresh_summary
+    assert np.array_equal(first_temperatures, second_temperatures)
+    assert np.array_equal(first_temperatures, fresh_temperatures)
+
+
+def test_command_line_prints_one_summary_per_scenario(tmp_path, capsys):
+    scenarios = tmp_path / 'scenarios.json'
+    scenarios.write_text(json.dumps([{'setpoint': 295.0}, {'setpoint': 300.0}]))
+
+    main(['--scenarios', str(scenarios), '--steps', '10'])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['name'] for line in lines] == ['0', '1']
+
+
+def test_daily_profiles_are_cycled():
+    values = profile_values([1.0, 2.0], steps=4, dt=43200.0)
+
+    assert list(values) == [1.0, 2.0, 1.0, 2.0]
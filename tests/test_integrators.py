@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from scipy import linalg
+
+from demo.integrators import Adaptive, BackwardEuler, Exact, ExplicitEuler, Integrator, RungeKutta4, make_integrator
+from demo.lubeck_environment import ArrowheadEnvironment
+
+
+def exact_step(model, dt, coefficient, power):
+    # Affine system dT/dt = A T + b, solved exactly through the exponential of the augmented matrix
+    n = len(model)
+    augmented = np.zeros((n + 1, n + 1))
+    augmented[:n, :n] = -coefficient * model.laplacian.toarray()
+    augmented[:n, n] = model.inverse_capacity * power
+    return (linalg.expm(dt * augmented) @ np.append(model.temperatures, 1.0))[:n]
+
+
+def model_with_power():
+    env = ArrowheadEnvironment(verbose=False)
+    model = env.thermal_model
+    power = np.linspace(0.0, 1500.0, len(model))
+    return model, power
+
+
+@pytest.mark.parametrize('integrator, dt, tolerance', [
+    (ExplicitEuler(), 10.0, 1e-3),
+    (RungeKutta4(), 600.0, 1e-3),
+    (BackwardEuler(), 10.0, 1e-3),
+    (Adaptive(rtol=1e-9, atol=1e-9), 3600.0, 1e-5),
+    (Exact(), 86400.0, 1e-8),
+    (Exact(max_dense=0), 86400.0, 1e-8),
+])
+def test_integrators_match_exact_solution(integrator, dt, tolerance):
+    model, power = model_with_power()
+    model.integrator = integrator
+    expected = exact_step(model, dt, 1e-4, power)
+
+    model.step(dt, 1e-4, power)
+
+    assert np.allclose(model.temperatures, expected, atol=tolerance, rtol=0)
+
+
+def test_backward_euler_is_stable_for_long_steps():
+    explicit, power = model_with_power()
+    implicit, _ = model_with_power()
+    implicit.integrator = make_integrator('implicit')
+
+    for _ in range(20):
+        explicit.step(86400.0, 1e-2, power)
+        implicit.step(86400.0, 1e-2, power)
+
+    assert not np.all(np.isfinite(explicit.temperatures)) or np.ptp(explicit.temperatures) > 1e6
+    assert np.all(np.isfinite(implicit.temperatures))
+    assert np.ptp(implicit.temperatures) < 100.0
+
+
+def test_backward_euler_reuses_factorization():
+    model, power = model_with_power()
+    integrator = BackwardEuler()
+    model.integrator = integrator
+
+    for _ in range(3):
+        model.step(600.0, 1e-4, power)
+
+    assert len(integrator._factorizations) == 1
+
+
+def test_unknown_integrator():
+    with pytest.raises(ValueError):
+        make_integrator('leapfrog')
+
+
+def test_exact_propagator_is_cached_per_step_length():
+    model, power = model_with_power()
+    integrator = Exact()
+    model.integrator = integrator
+
+    model.step(600.0, 1e-4, power)
+    model.step(600.0, 1e-4, power)
+    model.step(60.0, 1e-4, power)
+
+    assert set(integrator._propagators) == {(600.0, 1e-4), (60.0, 1e-4)}
+
+
+def test_integrator_base_is_abstract():
+    with pytest.raises(TypeError):
+        Integrator()  # type: ignore
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+from demo.launcher import device_context, start_processes
+
+
+def exit_unless_preloaded():
+    if 'demo.devices.arrowhead_a_devices' not in sys.modules:
+        sys.exit(1)
+
+
+def test_entry_points_import_device_modules_lazily():
+    modules = ('demo.start_temperature_sensors', 'demo.start_actuators', 'demo.start_controllers', 'demo.device_host')
+    result = subprocess.run(
+            [
+                sys.executable,
+                '-c',
+                f'import sys\nfor module in {modules}: __import__(module)\n'
+                'print("arrowhead_client" in sys.modules, "numpy" in sys.modules)',
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+    )
+
+    assert result.stdout.strip() == 'False False'
+
+
+def test_processes_fork_from_preloaded_server():
+    processes = start_processes([(exit_unless_preloaded, ())] * 2, device_context())
+    for process in processes:
+        process.join(timeout=30)
+
+    assert [process.exitcode for process in processes] == [0, 0]
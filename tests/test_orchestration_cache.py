@@ -0,0 +1,134 @@
+import asyncio
+
+from arrowhead_client.errors import OrchestrationError
+
+from demo.devices.orchestration_cache import OrchestrationCache, OrchestrationCacheMixin
+
+
+class FakeClient:
+    def __init__(self, failures=0):
+        self.orchestration_rules = {}
+        self.orchestrations = 0
+        self.failures = failures
+
+    async def add_orchestration_rule(self, service_definition, method):
+        self.orchestrations += 1
+        if self.failures:
+            self.failures -= 1
+            raise OrchestrationError('No providers')
+        self.orchestration_rules[service_definition] = f'{method} rule {self.orchestrations}'
+
+
+async def resolve_with_retries():
+    client = FakeClient(failures=2)
+    cache = OrchestrationCache(client, ttl=60.0, min_backoff=0.01)
+    cache.start({'temperature': 'GET'})
+    await asyncio.wait_for(cache.ready('temperature'), timeout=1)
+    await cache.stop()
+
+    return client
+
+
+async def invalidate_and_refresh():
+    client = FakeClient()
+    cache = OrchestrationCache(client, ttl=60.0, min_backoff=0.01)
+    cache.start({'actuator': 'POST'})
+    await cache.ready('actuator')
+    cache.invalidate('actuator')
+    assert 'actuator' not in client.orchestration_rules
+    await asyncio.wait_for(cache.ready('actuator'), timeout=1)
+    await cache.stop()
+
+    return client
+
+
+def test_failed_orchestration_is_retried_with_backoff():
+    client = asyncio.run(resolve_with_retries())
+
+    assert client.orchestrations == 3
+    assert client.orchestration_rules['temperature'] == 'GET rule 3'
+
+
+def test_invalidated_rule_is_refreshed():
+    client = asyncio.run(invalidate_and_refresh())
+
+    assert client.orchestrations == 2
+    assert client.orchestration_rules['actuator'] == 'POST rule 2'
+
+
+async def invalidate_repeatedly(seconds, confirm=False):
+    client = FakeClient()
+    cache = OrchestrationCache(client, ttl=60.0, min_backoff=0.05)
+    cache.start({'actuator': 'POST'})
+
+    async def consume_failing_provider():
+        while True:
+            await cache.ready('actuator')
+            if confirm:
+                cache.confirm('actuator')
+            cache.invalidate('actuator')
+
+    try:
+        await asyncio.wait_for(consume_failing_provider(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+    await cache.stop()
+
+    return client, cache
+
+
+def test_repeated_invalidation_backs_off():
+    client, cache = asyncio.run(invalidate_repeatedly(0.3))
+
+    # Resolves at 0, then after backoffs of 0.05, 0.1, and 0.2 seconds
+    assert client.orchestrations <= 4
+    assert cache.rules['actuator'].backoff >= 0.2
+
+
+def test_confirmed_rule_resets_backoff():
+    client, cache = asyncio.run(invalidate_repeatedly(0.3, confirm=True))
+
+    assert client.orchestrations > 4
+    assert cache.rules['actuator'].backoff == 0.05
+
+
+class SlowlyRefreshedClient(OrchestrationCacheMixin, FakeClient):
+    """
+    Resolves the first rule at once and holds every refresh until ``release`` is set.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.refreshing = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def add_orchestration_rule(self, service_definition, method):
+        if self.orchestrations:
+            self.refreshing.set()
+            await self.release.wait()
+        await super().add_orchestration_rule(service_definition, method)
+
+    async def consume_service(self, service_definition, **kwargs):
+        return self.orchestration_rules[service_definition]
+
+
+async def consume_during_refresh():
+    client = SlowlyRefreshedClient()
+    client.start_orchestration_cache({'temperature': 'GET'}, ttl=0.01)
+    await asyncio.wait_for(client.refreshing.wait(), timeout=1)
+    during_refresh = await client.consume_cached('temperature')
+    client.release.set()
+    while client.orchestrations < 2:
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0)
+    after_refresh = await client.consume_cached('temperature')
+    await client.orchestration_cache.stop()
+
+    return during_refresh, after_refresh
+
+
+def test_rule_stays_in_use_during_refresh():
+    during_refresh, after_refresh = asyncio.run(consume_during_refresh())
+
+    assert during_refresh == 'GET rule 1'
+    assert after_refresh == 'GET rule 2'
@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+import pytest
+
+from demo.devices.arrowhead_a_devices import Controller, Heater, TemperatureSensor
+from demo.devices.publish import Deadband, LocalBroker
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.topology import grid_topology
+
+from benchmarks.inprocess import EnvironmentLinks
+
+with open('core_config.json', 'r') as json_config:
+    config = json.load(json_config)
+
+
+def test_deadband_skips_small_changes_until_heartbeat():
+    deadband = Deadband(threshold=0.5, max_interval=10)
+
+    published = [deadband.update(value, timestep) for timestep, value in enumerate([290.0, 290.2, 290.4, 290.6, 290.7])]
+    heartbeat = deadband.update(290.7, 13)
+
+    assert published == [True, False, False, True, False]
+    assert heartbeat
+
+
+def test_slow_subscriber_gets_latest_reading():
+    broker = LocalBroker()
+
+    async def run():
+        readings = broker.subscribe('temperature/A11/heater')
+        first = asyncio.ensure_future(readings.__anext__())
+        await asyncio.sleep(0)
+        broker.publish('temperature/A11/heater', [{"v": 1.0}])
+        received = [await first]
+        for value in (2.0, 3.0, 4.0):
+            broker.publish('temperature/A11/heater', [{"v": value}])
+        broker.publish('temperature/A12/heater', [{"v": 5.0}])
+        received.append(await readings.__anext__())
+        await readings.aclose()
+        return received
+
+    received = asyncio.run(run())
+
+    assert received == [[{"v": 1.0}], [{"v": 4.0}]]
+    assert broker.mailboxes == {'temperature/A11/heater': []}
+
+
+@pytest.mark.parametrize('first_timestep', [0, 1])
+def test_controller_reacts_to_published_readings(first_timestep):
+    controller = Controller.create(system_name='A11_controller', address='127.0.0.1', port=5200, config=config)
+    controller.reading_broker = LocalBroker()
+    actuations = []
+
+    async def nothing(*args, **kwargs):
+        pass
+
+    async def consume_cached(service_definition, json=None):
+        actuations.append(json[0]['v'])
+
+    async def get_setpoint():
+        return 298.0, 0
+
+    controller.setup = nothing
+    controller.client_setup = nothing
+    controller.start_orchestration_cache = lambda services: None
+    controller.consume_cached = consume_cached
+    controller.get_setpoint = get_setpoint
+
+    async def run():
+        task = asyncio.create_task(controller.main())
+        await asyncio.sleep(0)
+        for timestep in (first_timestep, first_timestep + 3):
+            controller.reading_broker.publish(
+                    'temperature/A11/heater',
+                    [{"n": "A11_temp_sensor", "t": timestep, "u": "K", "v": 297.0}],
+            )
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(run())
+
+    assert len(actuations) == 2
+    # The second reading came three steps later, so the integral grew by three steps of error
+    assert controller.integral == 1.0 * 10.0 + 1.0 * 30.0
+
+
+class FakeResponse:
+    def __init__(self, message):
+        self.message = message
+
+    def read_json(self):
+        return self.message
+
+
+def applied_heating(publish, deadband=None, steps=6):
+    """
+    Heating power the environment applies at every step, with the A devices of one room in polling or publish mode.
+    """
+    env = ArrowheadEnvironment(topology=grid_topology(1, 1), verbose=False)
+    room_name = env.room_names[0]
+    sensor = TemperatureSensor.create(
+            system_name=f'{room_name}_temp_sensor', address='127.0.0.1', port=5000, config=config,
+    )
+    heater = Heater.create(system_name=f'{room_name}_actuator', address='127.0.0.1', port=5100, config=config)
+    controller = Controller.create(
+            system_name=f'{room_name}_controller', address='127.0.0.1', port=5200, config=config,
+    )
+    broker = LocalBroker() if publish else None
+    for device in (sensor, heater, controller):
+        device.ipyc_batch_client = EnvironmentLinks(env)
+        device.reading_broker = broker
+    sensor.deadband = deadband
+
+    async def nothing(*args, **kwargs):
+        pass
+
+    async def consume_cached(service_definition, json=None):
+        if service_definition == 'temperature':
+            return FakeResponse(await sensor.get_temperature.func())
+        await heater.update_actuation.func(json)
+
+    async def get_setpoint():
+        return 298.0, 0
+
+    controller.setup = nothing
+    controller.client_setup = nothing
+    controller.start_orchestration_cache = lambda services: None
+    controller.consume_cached = consume_cached
+    controller.get_setpoint = get_setpoint
+
+    async def cooler(links):
+        while True:
+            await links.request({"name": room_name, "unit": "cooler", "system": "sensor"})
+            # Holding keeps the cooler off, an actuation of 0.0 would also turn off the heater
+            await links.request({"name": room_name, "unit": "cooler", "system": "actuator", "actuation": None})
+
+    applied = []
+    update_room_temperatures = env.update_room_temperatures
+
+    def record_heating(heat_output, time_delta):
+        applied.append((env.timestep, heat_output[room_name]))
+        update_room_temperatures(heat_output, time_delta)
+
+    env.update_room_temperatures = record_heating
+
+    async def run():
+        env.sync_init()
+        env.simulation_started.set()
+        devices = [controller.main(), cooler(EnvironmentLinks(env))]
+        if publish:
+            devices += [sensor.publish_readings('heater'), heater.hold_actuation('heater')]
+        tasks = [asyncio.create_task(device) for device in devices]
+        for _ in range(steps):
+            await env.step(10.0, 0.0, 25.0)
+        for task in tasks:
+            task.cancel()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+    return applied
+
+
+def test_publish_mode_applies_actuations_at_the_same_steps_as_polling():
+    polled = applied_heating(publish=False)
+
+    assert polled[0] == (0, 0.0)
+    assert polled[1][1] > 0.0
+    assert applied_heating(publish=True, deadband=Deadband(threshold=0.0)) == polled
+
+
+def test_held_back_readings_keep_the_last_actuation():
+    applied = applied_heating(publish=True, deadband=Deadband(threshold=100.0, max_interval=3))
+
+    # Only the readings of steps 0 and 3 reach the controller, their actuations apply from the next step
+    powers = [power for _, power in applied]
+    assert powers[1] == powers[2] == powers[3] > 0.0
+    assert powers[4] == powers[5] != powers[1]
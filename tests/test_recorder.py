@@ -0,0 +1,67 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from demo.headless import HeadlessEngine
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.recorder import MemmapSink, ParquetSink, RecordingSink, StepRecorder, load_recording
+
+
+def test_headless_run_is_recorded_across_chunks(tmp_path):
+    env = ArrowheadEnvironment(verbose=False)
+    engine = HeadlessEngine(env)
+    env.start_recording(MemmapSink(tmp_path / 'run'), chunk_size=16)
+    engine.run({'setpoint': 298.0}, steps=40)
+    final_temperatures = env.thermal_model.temperatures.copy()
+    env.stop_recording()
+
+    recording = load_recording(tmp_path / 'run')
+
+    assert len(recording) == 40
+    assert list(recording.timesteps) == list(range(40))
+    assert np.array_equal(recording.column('temperature')[-1], final_temperatures)
+    assert np.all(recording.column('setpoint')[:, 1:] == 298.0)
+    assert recording.room('A11', 'heating').max() > 0
+    frame = recording.to_dataframe(['temperature'])
+    assert frame[('temperature', 'A11')].iloc[-1] == recording.room('A11')[-1]
+
+
+def test_recording_does_not_allocate_per_step(tmp_path):
+    recorder = StepRecorder(['OO', 'A11'], MemmapSink(tmp_path / 'run'), chunk_size=4096)
+    temperatures = np.array([273.0, 293.0])
+    power = np.array([0.0, -100.0])
+    recorder.record(0, temperatures, power, 298.0)
+
+    tracemalloc.start()
+    for timestep in range(1, 2000):
+        recorder.record(timestep, temperatures, power, 298.0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    recorder.close()
+
+    assert peak < 10_000
+    assert load_recording(tmp_path / 'run').column('cooling')[-1, 1] == -100.0
+
+
+def test_parquet_recording(tmp_path):
+    pytest.importorskip('pyarrow')
+    recorder = StepRecorder(['OO', 'A11'], ParquetSink(tmp_path / 'run.parquet'), chunk_size=3)
+    for timestep in range(5):
+        recorder.record(timestep, [273.0, 290.0 + timestep], [0.0, 50.0], 298.0)
+    recorder.close()
+
+    frame = load_recording(tmp_path / 'run.parquet')
+
+    assert list(frame['timestep']) == [0, 1, 2, 3, 4]
+    assert list(frame['temperature/A11']) == [290.0, 291.0, 292.0, 293.0, 294.0]
+    assert frame['heating/A11'].iloc[0] == 50.0
+
+
+def test_sink_without_write_cannot_be_created():
+    class OpenOnlySink(RecordingSink):
+        def open(self, names):
+            pass
+
+    with pytest.raises(TypeError):
+        OpenOnlySink()  # type: ignore
@@ -0,0 +1,37 @@
+import asyncio
+
+from demo.registration import DesiredState, apply_registration
+from demo.utils import ROOM_NAMES, device_specs
+
+from benchmarks.inprocess import FakeCoreSystems
+
+
+async def register_twice(core):
+    runner, config = await core.serve()
+    state = DesiredState(device_specs())
+    try:
+        first = await apply_registration(state, config)
+        second = await apply_registration(state, config)
+    finally:
+        await runner.cleanup()
+
+    return first, second
+
+
+def test_desired_state():
+    state = DesiredState(device_specs())
+
+    assert len(state.systems) == 6 * len(ROOM_NAMES)
+    assert len(state.services) == 4 * len(ROOM_NAMES)
+    assert len(state.rules) == 4 * len(ROOM_NAMES)
+
+
+def test_registration_only_applies_missing_state():
+    core = FakeCoreSystems()
+
+    first, second = asyncio.run(register_twice(core))
+
+    assert first == {'systems': 48, 'services': 32, 'orchestration': 32, 'authorization': 32}
+    assert second == {'systems': 0, 'services': 0, 'orchestration': 0, 'authorization': 0}
+    # One request for all orchestration rules
+    assert core.posts == 48 + 32 + 1 + 32
@@ -0,0 +1,62 @@
+import pytest
+
+from demo.devices import senml
+from demo.devices.senml import RecordTemplate, decode, dumps, loads, resolve
+
+
+def test_flat_template_round_trip():
+    message = RecordTemplate('A11_temp_sensor', 'K').encode(3, 293.15)
+
+    assert message == [{"n": "A11_temp_sensor", "t": 3, "u": "K", "v": 293.15}]
+    assert decode(message, 'K') == ('A11_temp_sensor', 3, 293.15, None, None)
+
+
+def test_located_template_round_trip():
+    message = RecordTemplate('temp_sensor', 'Cel', (1, 2)).encode(3, 20.0)
+
+    assert message == [
+        {"bn": "temp_sensor", "bt": 3},
+        {"u": "Lon", "v": 1},
+        {"u": "Lat", "v": 2},
+        {"u": "Cel", "v": 20.0},
+    ]
+    assert decode(message, 'Cel') == ('temp_sensor', 3, 20.0, 1, 2)
+
+
+def test_messages_do_not_share_records():
+    template = RecordTemplate('temp_sensor', 'Cel', (1, 2))
+    first = template.encode(3, 20.0)
+    first[1]['v'] = 5
+
+    assert template.encode(4, 21.0)[1] == {"u": "Lon", "v": 1}
+
+
+def test_decode_resolves_other_layouts():
+    message = [
+        {"bn": "B11_", "bt": 10},
+        {"n": "cooler", "u": "/", "v": 0.5, "t": 1},
+        {"u": "Lat", "v": 2},
+    ]
+
+    assert resolve(message)[0] == {"n": "B11_cooler", "t": 11, "u": "/", "v": 0.5}
+    assert decode(message, '/') == ('B11_cooler', 11, 0.5, None, 2)
+    with pytest.raises(ValueError):
+        decode(message, 'Cel')
+
+
+@pytest.mark.parametrize('content_format', ['json', 'cbor'])
+def test_serialization_round_trip(content_format):
+    if content_format == 'cbor' and senml.cbor2 is None:
+        pytest.skip('cbor2 is not installed')
+    message = RecordTemplate('temp_sensor', 'Cel', (1, 2)).encode(3, 20.0)
+
+    assert loads(dumps(message, content_format), content_format) == message
+
+
+@pytest.mark.skipif(senml.cbor2 is None, reason='cbor2 is not installed')
+def test_cbor_keeps_every_field():
+    message = [{"bver": 10, "bn": "A11_", "n": "status", "vb": True, "s": 1.5, "ut": 60, "location": "roof"}]
+    payload = dumps(message, 'cbor')
+
+    assert senml.cbor2.loads(payload)[0] == {-1: 10, -2: "A11_", 0: "status", 4: True, 5: 1.5, 7: 60, "location": "roof"}
+    assert loads(payload, 'cbor') == message
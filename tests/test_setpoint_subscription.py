@@ -0,0 +1,43 @@
+import asyncio
+
+from demo.devices.ipc_mixin import IPyCMixin, SetpointSubscription
+from demo.lubeck_environment import ArrowheadEnvironment
+
+from benchmarks.inprocess import InProcessLink
+
+
+async def subscribed(env, room_names=None):
+    env.sync_init()
+    env.simulation_started.set()
+    link = InProcessLink()
+    handler = asyncio.create_task(env.on_connect(link))
+    subscription = SetpointSubscription(room_names=room_names)
+    await subscription.subscribe(link.client_side())
+    return subscription, handler
+
+
+def test_only_changed_setpoints_are_pushed():
+    env = ArrowheadEnvironment(verbose=False)
+
+    async def run():
+        subscription, handler = await subscribed(env, ['A11', 'A12'])
+        device = IPyCMixin()
+        device.setpoint_subscription = subscription
+        initial = await device.ipc_request({"name": 'A11', "unit": "heater", "system": "controller"})
+        for _ in range(3):
+            env.update_random_setpoints()
+            await asyncio.sleep(0.01)
+        env.set_setpoints({'A12': 300.0, 'A24': 290.0})
+        await asyncio.sleep(0.01)
+        handler.cancel()
+        await subscription.close()
+        await asyncio.sleep(0)
+        return initial, subscription
+
+    initial, subscription = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert initial == {"setpoint": 293.15, "timestep": 0}
+    # The snapshot, the change to 298 K, and the change of A12, rooms outside the subscription are not sent
+    assert subscription.updates == 3
+    assert subscription.setpoints == {'A11': 298.0, 'A12': 300.0}
+    assert env.setpoint_subscribers == []
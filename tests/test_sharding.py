@@ -0,0 +1,32 @@
+import numpy as np
+
+from demo.headless import HeadlessEngine
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.sharding import run_sharded, split_topology
+from demo.topology import grid_topology
+
+
+def test_split_keeps_every_coupling():
+    topology = grid_topology(4, 5)
+
+    shards = split_topology(topology, 3)
+
+    assert sorted(name for shard in shards for name in shard.topology.room_names) == sorted(topology.room_names)
+    for shard in shards:
+        for room_name in shard.topology.room_names:
+            assert shard.topology.neighbors(room_name) == topology.neighbors(room_name)
+        assert set(shard.topology.ghost_names).isdisjoint(shard.topology.room_names)
+    # Rooms 1-6 of the 4 x 5 grid, the rest of row 2 and the first room of row 3 are ghosts
+    assert shards[0].topology.ghost_names == ('F1R2C2', 'F1R2C3', 'F1R2C4', 'F1R2C5', 'F1R3C1')
+
+
+def test_sharded_run_matches_single_process():
+    topology = grid_topology(4, 5)
+    scenario = {'setpoint': 298.0, 'outside_temperature': 5.0, 'initial_temperature': 290.0}
+    env = ArrowheadEnvironment(topology, verbose=False)
+    HeadlessEngine(env).run(scenario, steps=50)
+
+    temperatures = run_sharded(topology, num_shards=3, steps=50, scenario=scenario)
+
+    expected = [env.rooms[name].temperature for name in topology.room_names]
+    assert np.allclose([temperatures[name] for name in topology.room_names], expected, rtol=0, atol=1e-9)
@@ -0,0 +1,138 @@
+import asyncio
+
+import numpy as np
+
+from demo.devices.ipc_mixin import IPyCMixin
+from demo.lubeck_environment import ArrowheadEnvironment
+from demo.state_plane import StatePlane, StatePlaneReader
+
+from benchmarks.inprocess import InProcessDevices
+
+
+def test_reader_sees_published_state():
+    plane = StatePlane(['A', 'B', 'C'])
+    reader = StatePlaneReader(plane.name)
+    try:
+        assert reader.room_names == ('A', 'B', 'C')
+        assert reader.read('B')[2] == -1
+
+        plane.publish(4, np.array([290.0, 291.0, 292.0]), [298.0, 297.0, 296.0])
+
+        assert reader.read('B') == (291.0, 297.0, 4)
+        assert plane.header[0] % 2 == 0
+        assert asyncio.run(reader.temperature('C', after_timestep=3)) == {"temp": 292.0, "timestep": 4}
+    finally:
+        reader.close()
+        plane.unlink()
+
+
+def test_temperature_waits_for_a_newer_step():
+    plane = StatePlane(['A'])
+    reader = StatePlaneReader(plane.name)
+
+    async def read_next():
+        plane.publish(0, [290.0], [298.0])
+        waiting = asyncio.create_task(reader.temperature('A', after_timestep=0))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        plane.publish(1, [291.0], [298.0])
+        return await asyncio.wait_for(waiting, timeout=1)
+
+    try:
+        assert asyncio.run(read_next()) == {"temp": 291.0, "timestep": 1}
+    finally:
+        reader.close()
+        plane.unlink()
+
+
+def test_devices_only_send_actuations_over_ipc():
+    env = ArrowheadEnvironment(verbose=False)
+    reader = StatePlaneReader(env.start_state_plane().name)
+
+    async def run(steps):
+        env.sync_init()
+        env.simulation_started.set()
+        devices = InProcessDevices(env, state_plane=reader)
+        running = devices.start(steps)
+        for _ in range(steps):
+            await env.step(10.0, 0.0, 25.0)
+        await running
+        devices.stop()
+        return devices
+
+    try:
+        devices = asyncio.run(asyncio.wait_for(run(3), timeout=5))
+    finally:
+        reader.close()
+        env.stop_state_plane()
+
+    assert env.timestep == 3
+    assert len(devices.round_trips) == 3 * 2 * len(env.room_names)
+
+
+def test_sensors_over_ipc_are_answered_next_to_the_plane():
+    env = ArrowheadEnvironment(verbose=False)
+    plane = env.start_state_plane()
+
+    async def run(steps):
+        env.sync_init()
+        env.simulation_started.set()
+        devices = InProcessDevices(env)
+        running = devices.start(steps)
+        for _ in range(steps):
+            await env.step(10.0, 0.0, 25.0)
+        await running
+        devices.stop()
+        return devices
+
+    try:
+        devices = asyncio.run(asyncio.wait_for(run(3), timeout=5))
+        # One publish per step, each one advances the sequence by two
+        assert plane.header[0] == 2 * 3
+    finally:
+        env.stop_state_plane()
+
+    assert env.timestep == 3
+    assert env.temperatures_read.num_expected == 2 * len(env.room_names)
+    assert len(devices.round_trips) == 3 * 3 * 2 * len(env.room_names)
+
+
+def test_mixin_answers_sensors_and_controllers_from_the_plane():
+    plane = StatePlane(['A11'])
+    plane.publish(2, [290.0], [298.0])
+    device = IPyCMixin()
+    device.state_plane = StatePlaneReader(plane.name)
+
+    async def requests():
+        temperature = await device.ipc_request({"name": "A11", "unit": "heater", "system": "sensor"})
+        setpoint = await device.ipc_request({"name": "A11", "unit": "heater", "system": "controller"})
+        return temperature, setpoint
+
+    try:
+        assert asyncio.run(requests()) == ({"temp": 290.0, "timestep": 2}, {"setpoint": 298.0, "timestep": 2})
+        assert device.state_plane_timestep == 2
+    finally:
+        device.state_plane.close()
+        plane.unlink()
+
+
+def test_read_during_publish_yields_to_the_writer():
+    plane = StatePlane(['A'])
+    plane.publish(0, [290.0], [298.0])
+    reader = StatePlaneReader(plane.name)
+
+    async def read_while_publishing():
+        # A publish that stopped halfway, the reader has to give the event loop back to finish it
+        plane.header[0] += 1
+        waiting = asyncio.create_task(reader.temperature('A', after_timestep=-1))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        plane.header[0] += 1
+        return await asyncio.wait_for(waiting, timeout=1)
+
+    try:
+        assert reader.read('A') == (290.0, 298.0, 0)
+        assert asyncio.run(read_while_publishing()) == {"temp": 290.0, "timestep": 0}
+    finally:
+        reader.close()
+        plane.unlink()
@@ -0,0 +1,35 @@
+import json
+
+from demo.sweep import grid, random_sample, report, run_sweep
+
+
+def test_grid_combines_every_value():
+    scenarios = grid({'heater_k_P': [10, 40], 'setpoint': [298, [293, 298]]})
+
+    assert len(scenarios) == 4
+    assert scenarios[1] == {'heater_k_P': 10, 'setpoint': [293, 298], 'name': '1'}
+
+
+def test_random_sample_stays_in_range():
+    scenarios = random_sample({'heater_k_P': (1, 100)}, samples=20, seed=3)
+
+    assert len(scenarios) == 20
+    assert all(1 <= scenario['heater_k_P'] <= 100 for scenario in scenarios)
+    assert scenarios == random_sample({'heater_k_P': (1, 100)}, samples=20, seed=3)
+
+
+def test_sweep_streams_results_to_disk(tmp_path):
+    output = tmp_path / 'sweep.jsonl'
+    scenarios = grid({'heater_k_P': [10, 40], 'outside_temperature': [0.0, [0.0, 10.0]]})
+
+    results = list(run_sweep(scenarios, steps=20, workers=2, output=str(output)))
+
+    assert [result['name'] for result in results] == ['0', '1', '2', '3']
+    assert [json.loads(line) for line in output.read_text().splitlines()] == results
+    assert all({'discomfort', 'energy', 'rms_error'} <= set(result) for result in results)
+
+
+def test_report_without_results():
+    results = list(run_sweep(random_sample({'heater_k_P': (1, 100)}, samples=0), steps=20, workers=1))
+
+    assert report(results) == '0 scenarios, no results'
@@ -0,0 +1,32 @@
+import numpy as np
+
+from demo.lubeck_environment import ArrowheadEnvironment
+
+
+def test_step_matches_room_update_temperature():
+    env = ArrowheadEnvironment()
+    env.outside.static_temp = 298.15
+    power = {name: 100.0 * i for i, name in enumerate(env.room_names)}
+
+    previous = {name: room.temperature for name, room in env.rooms.items()}
+    expected = {}
+    for room_name, output in power.items():
+        room = env.rooms[room_name]
+        neighbor_sum = sum(
+                multiplier * (previous[room_name] - previous[neighbor_name])
+                for neighbor_name, (multiplier, _) in room.neighbors.items()
+        )
+        expected[room_name] = previous[room_name] - 10.0 * (1e-4 * neighbor_sum - output / room.heat_capacity)
+
+    env.update_room_temperatures(power, 10.0)
+
+    for room_name, temperature in expected.items():
+        assert np.isclose(env.rooms[room_name].temperature, temperature)
+    assert env.outside.temperature == 298.15
+
+
+def test_rooms_are_views_over_model_state():
+    env = ArrowheadEnvironment()
+    env.rooms['A11'].temperature = 300.0
+
+    assert env.thermal_model.temperatures[env.thermal_model.index['A11']] == 300.0
@@ -0,0 +1,49 @@
+import json
+
+from demo.topology import grid_topology, load_topology, lubeck_topology
+from demo.utils import ROOM_NAMES, ROOM_COORDINATES
+
+
+def test_lubeck_topology_matches_original_rooms():
+    topology = lubeck_topology()
+
+    assert topology.room_names == ROOM_NAMES
+    assert [spec['position'] for spec in topology.room_specs] == list(ROOM_COORDINATES)
+    assert topology.neighbors('A11') == {'OO': 2, 'A12': 1, 'A21': 1}
+    assert topology.neighbors('A12') == {'OO': 1, 'A11': 1, 'A13': 1, 'A22': 1}
+    assert topology.neighbors('A24') == {'OO': 2, 'A23': 1, 'A14': 1}
+    assert topology.neighbors('OO') == {}
+
+
+def test_create_rooms_uses_adjacency():
+    rooms = lubeck_topology().create_rooms()
+
+    assert rooms['OO'].static
+    assert {name: multiplier for name, (multiplier, _) in rooms['A13'].neighbors.items()} == {
+        'OO': 1, 'A12': 1, 'A14': 1, 'A23': 1,
+    }
+
+
+def test_grid_topology_floors():
+    topology = grid_topology(3, 3, floors=2)
+
+    assert len(topology.room_names) == 18
+    assert topology.neighbors('F1R2C2') == {'F1R1C2': 1, 'F1R2C1': 1, 'F1R2C3': 1, 'F1R3C2': 1, 'F2R2C2': 1}
+    assert topology.neighbors('F2R1C1') == {'OO': 2, 'F2R1C2': 1, 'F2R2C1': 1, 'F1R1C1': 1}
+
+
+def test_load_json_topology(tmp_path):
+    path = tmp_path / 'building.json'
+    path.write_text(json.dumps({
+        'outside': {'temperature': 280.0},
+        'rooms': [{'name': 'B1', 'heat_capacity': 1e3}, {'name': 'B2'}],
+        'couplings': [['B1', 'B2', 3]],
+        'boundaries': {'B2': 0.5},
+    }))
+
+    topology = load_topology(path)
+
+    assert topology.outside_temperature == 280.0
+    assert topology.room_specs[0]['heat_capacity'] == 1e3
+    assert topology.neighbors('B1') == {'B2': 3}
+    assert topology.neighbors('B2') == {'B1': 3, 'OO': 0.5}